@@ -0,0 +1,64 @@
+'''Measures the cost of broadcasting one player move to every connected client, from the Server Writer to each client's send path.
+
+Run from the repository root with: python -m benchmarks.benchBroadcast
+'''
+import argparse
+from typing import Any, cast
+
+import server.models.serverClientWriterEvent as scwe
+import server.models.serverWriterEvent as swe
+from benchmarks.benchUtils import (BenchConnection, build_server_services,
+                                   time_per_call)
+from common.models.user import OctothorpeUser
+from server.serverEventPump import ServerEventPump
+from server.services.serverClientManager import ServerClientManager
+from server.services.serverClientWriterManager import ServerClientWriterManager
+from server.services.serverUserManager import ServerUserManager
+from server.services.serverWriterService import ServerWriterService
+
+
+def bench_broadcast(num_clients: int, number: int) -> tuple[float, float]:
+    service_manager = build_server_services()
+    client_manager = service_manager.get_service(ServerClientManager)
+    user_manager = service_manager.get_service(ServerUserManager)
+    server_writer_service = service_manager.get_service(ServerWriterService)
+    server_client_writer_manager = service_manager.get_service(ServerClientWriterManager)
+    event_pump = ServerEventPump(service_manager)
+
+    for idx in range(num_clients):
+        client_info = client_manager.initialize_client(cast(Any, BenchConnection()), f'bench-{idx}')
+        server_client_writer_manager.register_client(client_info.client_id)
+        event_pump.register_client(client_info)
+        user_manager.login_user(client_info.client_id, f'bench{idx}')
+
+    mover: OctothorpeUser | None = user_manager.get_user_by_client_id(client_manager.active_clients[0].client_id)
+    if not mover or not mover.position:
+        raise ValueError('Benchmark user was not logged in')
+
+    def per_recipient() -> None:
+        # the previous broadcast path: every recipient gets its own message, which its writer formats and encodes
+        for client in client_manager.active_clients:
+            server_client_writer_manager.get_writer_service(client.client_id).dispatch_event(
+                scwe.ServerClientWriterEventInfo(f'{mover.username}, {mover.position[0]}, {mover.position[1]}, {mover.score}')
+            )
+        event_pump.pump()
+
+    def encode_once() -> None:
+        server_writer_service.dispatch_event(swe.ServerWriterEventMove(mover))
+        event_pump.pump()
+
+    return time_per_call(per_recipient, number), time_per_call(encode_once, number)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the per-broadcast cost of a player move')
+    parser.add_argument('--clients', metavar='c', type=int, nargs='+', help='connected client counts', default=[10, 100, 1000], required=False)
+    parser.add_argument('--number', metavar='n', type=int, help='broadcasts per timing round', default=200, required=False)
+    args = parser.parse_args()
+
+    print(f'{"clients":>8} {"per-recipient (us)":>20} {"encode-once (us)":>18} {"speedup":>8}')
+    for num_clients in args.clients:
+        # keep the total work per round roughly constant across client counts
+        number: int = max(1, args.number * 10 // num_clients)
+        per_recipient_s, encode_once_s = bench_broadcast(num_clients, number)
+        print(f'{num_clients:>8} {per_recipient_s * 1e6:>20.1f} {encode_once_s * 1e6:>18.1f} {per_recipient_s / encode_once_s:>7.2f}x')
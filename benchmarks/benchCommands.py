@@ -0,0 +1,54 @@
+'''Measures how many client commands a single core can parse and dispatch, for a logged-in client sending each kind of command.
+
+Run from the repository root with: python -m benchmarks.benchCommands
+'''
+import argparse
+import itertools
+from typing import Any, cast
+
+from benchmarks.benchUtils import (BenchConnection, build_server_services,
+                                   time_per_call)
+from server.asyncServerClientReader import OctothorpeAsyncServerClientReader
+from server.serverEventPump import ServerEventPump
+from server.services.serverClientManager import ServerClientManager
+
+# each kind of command is sent in turns, so moves go back and forth and the player stays on the map
+COMMANDS: dict[str, list[str]] = {
+    'move': ['move east', 'move west'],
+    'move (short)': ['move e', 'move w'],
+    'view': ['view all', 'view near'],
+    'bad argument': ['move up', 'view far'],
+    'invalid operation': ['jump', 'look around']
+}
+
+
+def bench_commands(requests: list[str], number: int) -> tuple[float, float]:
+    '''Returns the time per command to parse and dispatch it, and to also handle the events it creates and send the responses.'''
+    service_manager = build_server_services()
+    client_manager = service_manager.get_service(ServerClientManager)
+    event_pump = ServerEventPump(service_manager)
+
+    client_info = client_manager.initialize_client(cast(Any, BenchConnection()), 'bench')
+    client_reader = OctothorpeAsyncServerClientReader(service_manager, client_info, event_pump)
+    client_reader.handle_requests(['login benchcommands'])
+    requests_iter = itertools.cycle([[request] for request in requests])
+
+    def dispatch() -> None:
+        # the events are left in the queues until the next benchmark, so only parsing and dispatching the command is measured
+        client_reader.process_requests(next(requests_iter))
+
+    def respond() -> None:
+        client_reader.handle_requests(next(requests_iter))
+
+    return time_per_call(dispatch, number), time_per_call(respond, number)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark parsing and dispatching client commands')
+    parser.add_argument('--number', metavar='n', type=int, help='commands per timing round', default=20000, required=False)
+    args = parser.parse_args()
+
+    print(f'{"command":>18} {"dispatch (us)":>14} {"dispatch (cmd/s)":>17} {"respond (us)":>13} {"respond (cmd/s)":>16}')
+    for kind, requests in COMMANDS.items():
+        dispatch_s, respond_s = bench_commands(requests, args.number)
+        print(f'{kind:>18} {dispatch_s * 1e6:>14.2f} {1 / dispatch_s:>17,.0f} {respond_s * 1e6:>13.2f} {1 / respond_s:>16,.0f}')
@@ -0,0 +1,266 @@
+'''Runs the microbenchmarks of the game logic, protocol encoding, fan-out and map rendering hot paths with fixed seeds, and saves or compares the results.
+
+Run from the repository root with: python -m benchmarks.benchSuite --output baseline.json
+Then, after a change: python -m benchmarks.benchSuite --compare baseline.json
+'''
+import argparse
+import itertools
+import json
+import platform
+import random
+import sys
+from queue import Empty
+from typing import Any, Callable, cast
+
+import server.models.serverWriterEvent as swe
+from benchmarks.benchUtils import (BenchConnection, build_server_services,
+                                   build_synthetic_map, load_map,
+                                   time_per_call)
+from client.clientServerReader import ServerReader
+from client.services.clientCoreService import ClientCoreService
+from client.services.clientMapService import ClientMapService
+from client.services.clientServerWriterService import \
+    ClientServerWriterService
+from client.services.clientWriterService import ClientWriterService
+from common.models.game.direction import Direction
+from common.models.protocol import ProtocolEnum
+from common.models.user import OctothorpeUser
+from common.services.serviceManager import ServiceManager
+from common.utils.eventQueue import EventQueue
+from server.asyncServerClientReader import OctothorpeAsyncServerClientReader
+from server.models.worldGrid import WorldGrid
+from server.serverClientInterface import OctothorpeServerClientInterface
+from server.serverEventPump import ServerEventPump
+from server.services.serverClientManager import ServerClientManager
+from server.services.serverClientWriterManager import ServerClientWriterManager
+from server.services.serverGameLogicService import ServerGameLogicService
+from server.services.serverUserManager import ServerUserManager
+
+# (width, height) of the synthetic maps. The small map is the size of the bundled one
+MAP_SIZES: dict[str, tuple[int, int]] = {
+    'small': (60, 21),
+    'medium': (250, 250),
+    'large': (1000, 1000)
+}
+FANOUT_CLIENTS: list[int] = [10, 100, 1000]
+DEFAULT_THRESHOLD: float = 15 # percent slower than the baseline that counts as a regression
+
+# a benchmark is a function that returns the call to time, how many calls make up a round, and what to run after each round
+BenchCase = tuple[Callable[[], object], int, Callable[[], object] | None]
+
+
+class BenchClientCoreService(ClientCoreService):
+    '''Stands in for the Client Core Service, which needs a terminal, with only the user info the Server Reader uses.'''
+    def __init__(self) -> None:
+        self.user_info = OctothorpeUser()
+
+
+def drain_queue(queue: EventQueue[Any]) -> None:
+    while True:
+        try:
+            queue.get_nowait()
+        except Empty:
+            return
+
+
+def open_positions(grid: WorldGrid, count: int, seed: int) -> list[tuple[int, int]]:
+    rng = random.Random(seed)
+    positions: list[tuple[int, int]] = []
+    while len(positions) < count:
+        x, y = rng.randrange(grid.width), rng.randrange(grid.height)
+        if grid.is_passable(x, y):
+            positions.append((x, y))
+    return positions
+
+
+def bench_nearby_treasures(grid: WorldGrid, seed: int) -> BenchCase:
+    service_manager = build_server_services()
+    load_map(service_manager, grid, seed)
+    game_logic = service_manager.get_service(ServerGameLogicService)
+    positions_iter = itertools.cycle(open_positions(grid, 1000, seed))
+    return lambda: game_logic.nearby_treasures(next(positions_iter)), 20000, None
+
+
+def bench_generate_treasures(grid: WorldGrid, seed: int) -> BenchCase:
+    service_manager = build_server_services()
+    load_map(service_manager, grid, seed)
+    game_logic = service_manager.get_service(ServerGameLogicService)
+    # a new generator with the same seed for every call, so every call places the same treasures
+    return lambda: game_logic._generate_treasures(random.Random(seed)), 5, None
+
+
+def bench_move(grid: WorldGrid, seed: int) -> BenchCase:
+    '''Moves a logged-in player back and forth next to the spawnpoint, which the synthetic maps keep clear.'''
+    service_manager = build_server_services()
+    load_map(service_manager, grid, seed)
+    client_manager = service_manager.get_service(ServerClientManager)
+    client_info = client_manager.initialize_client(cast(Any, BenchConnection()), 'bench')
+    client_reader = OctothorpeAsyncServerClientReader(service_manager, client_info, ServerEventPump(service_manager))
+    client_reader.handle_requests(['login benchsuite'])
+    game_logic = client_reader.client_game_logic
+    if not game_logic:
+        raise ValueError('Benchmark user was not logged in')
+    writer_queue: EventQueue[Any] = game_logic.server_client_writer_service.queue
+    commands_iter = itertools.cycle([['move', 'east'], ['move', 'west']])
+    return lambda: game_logic.move(next(commands_iter)), 20000, lambda: drain_queue(writer_queue)
+
+
+def bench_resp(protocol: ProtocolEnum) -> BenchCase:
+    service_manager = build_server_services()
+    client_info = service_manager.get_service(ServerClientManager).initialize_client(cast(Any, BenchConnection()), 'bench')
+    client_info.protocol = protocol
+    client_interface = OctothorpeServerClientInterface(client_info)
+    return lambda: client_interface.resp(200, 'move east'), 50000, None
+
+
+def bench_server_writer_fanout(num_clients: int) -> BenchCase:
+    '''Hands one player move to every client writer queue. The queued events are dropped after each round, so only the Server Writer is timed.'''
+    service_manager = build_server_services()
+    client_manager = service_manager.get_service(ServerClientManager)
+    user_manager = service_manager.get_service(ServerUserManager)
+    server_client_writer_manager = service_manager.get_service(ServerClientWriterManager)
+    server_writer = ServerEventPump(service_manager).server_writer
+
+    for idx in range(num_clients):
+        client_info = client_manager.initialize_client(cast(Any, BenchConnection()), f'bench-{idx}')
+        server_client_writer_manager.register_client(client_info.client_id)
+        user_manager.login_user(client_info.client_id, f'bench{idx}')
+    mover: OctothorpeUser | None = user_manager.get_user_by_client_id(client_manager.active_clients[0].client_id)
+    if not mover:
+        raise ValueError('Benchmark user was not logged in')
+
+    def drain_writer_queues() -> None:
+        for client in client_manager.active_clients:
+            drain_queue(server_client_writer_manager.get_writer_service(client.client_id).queue)
+
+    event = swe.ServerWriterEventMove(mover)
+    return lambda: server_writer.execute_cmd(event), max(10, 20000 // num_clients), drain_writer_queues
+
+
+def bench_enum_lookup(name: str) -> BenchCase:
+    return lambda: Direction[name], 200000, None
+
+
+def build_client_services(grid: WorldGrid) -> ServiceManager:
+    service_manager = ServiceManager()
+    # registered by hand, as register() would build the real service, which needs a terminal
+    service_manager.services[ClientCoreService] = BenchClientCoreService()
+    service_manager.register(ClientWriterService)
+    service_manager.register(ClientMapService)
+    service_manager.register(ClientServerWriterService)
+
+    client_map_service = service_manager.get_service(ClientMapService)
+    client_map_service.map_dimensions = (grid.height, grid.width)
+    client_map_service.map = [grid.row_text(y) + '\r\n' for y in range(grid.height)]
+    return service_manager
+
+
+def bench_client_reader(grid: WorldGrid, response: str, seed: int) -> BenchCase:
+    service_manager = build_client_services(grid)
+    client_map_service = service_manager.get_service(ClientMapService)
+    client_writer_service = service_manager.get_service(ClientWriterService)
+    server_reader = ServerReader(service_manager, cast(Any, None))
+    server_reader.username = 'benchsuite'
+    for idx, (x, y) in enumerate(open_positions(grid, 10, seed)):
+        client_map_service.update_player_position(chr(ord('A') + idx), x, y)
+
+    def after_round() -> None:
+        drain_queue(client_writer_service.queue)
+        client_map_service.treasure_mask.clear()
+
+    return lambda: server_reader.execute_cmd(response), 20000, after_round
+
+
+def bench_build_map(grid: WorldGrid, seed: int) -> BenchCase:
+    '''Draws the map with ten players and fifteen treasures on it.'''
+    service_manager = build_client_services(grid)
+    client_map_service = service_manager.get_service(ClientMapService)
+    positions: list[tuple[int, int]] = open_positions(grid, 25, seed)
+    for idx, (x, y) in enumerate(positions[:10]):
+        client_map_service.update_player_position(chr(ord('A') + idx), x, y)
+    for x, y in positions[10:]:
+        client_map_service.update_treasure_position(x, y)
+    return client_map_service.build_map, max(5, 200000 // (grid.width * grid.height)), None
+
+
+def build_cases(seed: int) -> dict[str, Callable[[], BenchCase]]:
+    '''Returns every benchmark by name. Each one is only set up when it is run.'''
+    cases: dict[str, Callable[[], BenchCase]] = {}
+    grids: dict[str, WorldGrid] = {size: build_synthetic_map(width, height, seed) for size, (width, height) in MAP_SIZES.items()}
+    for size, grid in grids.items():
+        cases[f'game_logic.nearby_treasures[{size}]'] = lambda grid=grid: bench_nearby_treasures(grid, seed)
+        cases[f'game_logic.generate_treasures[{size}]'] = lambda grid=grid: bench_generate_treasures(grid, seed)
+        cases[f'client_game_logic.move[{size}]'] = lambda grid=grid: bench_move(grid, seed)
+    for protocol in ProtocolEnum:
+        cases[f'client_interface.resp[{protocol}]'] = lambda protocol=protocol: bench_resp(protocol)
+    for num_clients in FANOUT_CLIENTS:
+        cases[f'server_writer.execute_cmd[move, {num_clients} clients]'] = lambda num_clients=num_clients: bench_server_writer_fanout(num_clients)
+    for name in ['e', 'east', 'EAST']:
+        cases[f'direction_lookup[{name}]'] = lambda name=name: bench_enum_lookup(name)
+    small_grid: WorldGrid = grids['small']
+    cases['client_reader.execute_cmd[player update]'] = lambda: bench_client_reader(small_grid, '101:bot1, 12, 4, 30', seed)
+    cases['client_reader.execute_cmd[treasure nearby]'] = lambda: bench_client_reader(small_grid, '102:3, 12, 4', seed)
+    cases['client_reader.execute_cmd[message]'] = lambda: bench_client_reader(small_grid, '200:move east', seed)
+    for size, grid in grids.items():
+        cases[f'client_map.build_map[{size}]'] = lambda grid=grid: bench_build_map(grid, seed)
+    return cases
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    '''Prints the change of every benchmark against the baseline and returns the names of the ones that regressed.'''
+    regressions: list[str] = []
+    print(f'\n{"benchmark":<48} {"baseline (us)":>14} {"current (us)":>13} {"change":>8}')
+    for name, seconds in results.items():
+        if name not in baseline:
+            print(f'{name:<48} {"-":>14} {seconds * 1e6:>13.2f} {"new":>8}')
+            continue
+        change: float = (seconds / baseline[name] - 1) * 100
+        flag: str = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f'{name:<48} {baseline[name] * 1e6:>14.2f} {seconds * 1e6:>13.2f} {change:>+7.1f}%{flag}')
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the hot path microbenchmarks, and save or compare their results')
+    parser.add_argument('--output', metavar='o', type=str, help='write the results as JSON to this file', default=None, required=False)
+    parser.add_argument('--compare', metavar='c', type=str, help='compare the results with a JSON file saved with --output, exiting with status 1 on a regression',
+                        default=None, required=False)
+    parser.add_argument('--threshold', metavar='t', type=float, help='percent slower than the baseline that counts as a regression',
+                        default=DEFAULT_THRESHOLD, required=False)
+    parser.add_argument('--filter', metavar='f', type=str, help='only run the benchmarks whose name contains this text', default='', required=False)
+    parser.add_argument('--scale', metavar='s', type=float, help='multiply the calls per timing round, e.g. 0.1 for a quick run', default=1, required=False)
+    parser.add_argument('--repeat', metavar='n', type=int, help='timing rounds per benchmark, of which the fastest is kept', default=7, required=False)
+    parser.add_argument('--seed', metavar='r', type=int, help='seed for the maps, treasures and positions', default=460, required=False)
+    args = parser.parse_args()
+
+    results: dict[str, float] = {}
+    print(f'{"benchmark":<48} {"time (us)":>12} {"calls/s":>14}')
+    for name, build_case in build_cases(args.seed).items():
+        if args.filter not in name:
+            continue
+        func, number, after_round = build_case()
+        seconds: float = time_per_call(func, max(1, int(number * args.scale)), args.repeat, after_round)
+        results[name] = seconds
+        print(f'{name:<48} {seconds * 1e6:>12.2f} {1 / seconds:>14,.0f}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'seed': args.seed,
+                'results': results # seconds per call
+            }, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline: dict[str, Any] = json.load(f)
+        if baseline.get('seed') != args.seed:
+            print(f'\nThe baseline was run with seed {baseline.get("seed")}, not {args.seed}, so the maps differ')
+        regressions: list[str] = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} benchmarks are more than {args.threshold:g}% slower than the baseline')
+            sys.exit(1)
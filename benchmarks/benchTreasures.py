@@ -0,0 +1,78 @@
+'''Measures the cost of the treasure proximity queries made on every move, scanning every treasure versus using the treasure index or the proximity field.
+
+Run from the repository root with: python -m benchmarks.benchTreasures
+'''
+import argparse
+import math
+import random
+
+from benchmarks.benchUtils import build_server_services, time_per_call
+from common.models.game.treasure import Treasure
+from server.models.treasureProximityField import TreasureProximityField
+from server.models.worldGrid import WorldGrid
+from server.services.serverGameLogicService import ServerGameLogicService
+
+# roughly the density of treasures on the bundled map
+CELLS_PER_TREASURE: int = 84
+
+
+def bench_treasures(num_treasures: int, number: int) -> tuple[list[float], int]:
+    '''Returns the time per query of each query kind, and the memory used by the proximity field in bytes.'''
+    service_manager = build_server_services()
+    game_logic = service_manager.get_service(ServerGameLogicService)
+    for treasure in list(game_logic.treasures.values()):
+        game_logic.remove_treasure(treasure)
+
+    rng = random.Random(num_treasures)
+    side: int = max(1, math.isqrt(num_treasures * CELLS_PER_TREASURE))
+    # an open map large enough for every treasure, so the proximity field covers every queried position
+    game_logic.map = WorldGrid(side, side, bytearray(b' ' * (side * side)))
+    game_logic.proximity_field = TreasureProximityField(game_logic.map, game_logic.TREASURE_FOW)
+    proximity_field: TreasureProximityField = game_logic.proximity_field
+    treasures: list[Treasure] = [
+        Treasure(idx, (rng.randrange(side), rng.randrange(side)), rng.randint(1, game_logic.NUM_TREASURES))
+        for idx in range(num_treasures)
+    ]
+    for treasure in treasures:
+        game_logic.add_treasure(treasure)
+
+    positions: list[tuple[int, int]] = [(rng.randrange(side), rng.randrange(side)) for _ in range(number)]
+
+    def nearby_scan() -> None:
+        game_logic.nearby_treasures(next(positions_iter), treasures)
+
+    def nearby_index() -> None:
+        game_logic.proximity_field = None
+        game_logic.nearby_treasures(next(positions_iter))
+        game_logic.proximity_field = proximity_field
+
+    def nearby_field() -> None:
+        game_logic.nearby_treasures(next(positions_iter))
+
+    def nearest_scan() -> None:
+        game_logic.distance_nearest_treasure(next(positions_iter), treasures)
+
+    def nearest_index() -> None:
+        game_logic.distance_nearest_treasure(next(positions_iter))
+
+    results: list[float] = []
+    for func in [nearby_scan, nearby_index, nearby_field, nearest_scan, nearest_index]:
+        # one position per call, across every timing round
+        positions_iter = iter(positions * 5)
+        results.append(time_per_call(func, number))
+    return results, proximity_field.memory_usage()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the per-move cost of treasure proximity queries')
+    parser.add_argument('--treasures', metavar='t', type=int, nargs='+', help='treasure counts', default=[15, 1000, 100000], required=False)
+    parser.add_argument('--number', metavar='n', type=int, help='queries per timing round', default=1000, required=False)
+    args = parser.parse_args()
+
+    columns: list[str] = ['nearby scan (us)', 'nearby index (us)', 'nearby field (us)', 'nearest scan (us)', 'nearest index (us)']
+    print(f'{"treasures":>10} ' + ' '.join(f'{column:>18}' for column in columns) + f' {"field (MiB)":>12}')
+    for num_treasures in args.treasures:
+        # the scans are linear in the treasure count, so use fewer queries for large counts
+        number: int = max(10, min(args.number, args.number * 1000 // num_treasures))
+        results, field_bytes = bench_treasures(num_treasures, number)
+        print(f'{num_treasures:>10} ' + ' '.join(f'{result * 1e6:>18.1f}' for result in results) + f' {field_bytes / 2**20:>12.1f}')
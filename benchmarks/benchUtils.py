@@ -0,0 +1,105 @@
+import os
+import random
+import time
+from typing import Callable
+
+from common.models.game.treasure import Treasure
+from common.services.serviceManager import ServiceManager
+from server.models.treasurePlacer import TreasurePlacer
+from server.models.treasureProximityField import TreasureProximityField
+from server.models.worldGrid import WorldGrid
+from server.services.serverClientManager import ServerClientManager
+from server.services.serverClientWriterManager import ServerClientWriterManager
+from server.services.serverCommandService import ServerCommandService
+from server.services.serverCoreService import ServerCoreService
+from server.services.serverGameLogicService import ServerGameLogicService
+from server.services.serverInterestManager import ServerInterestManager
+from server.services.serverMetricsService import ServerMetricsService
+from server.services.serverOutputService import ServerOutputService
+from server.services.serverUserManager import ServerUserManager
+from server.services.serverWriterService import ServerWriterService
+
+REPO_ROOT_PATH: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class BenchConnection(object):
+    '''Stands in for a client socket. Everything sent to it is counted and discarded.'''
+    def __init__(self) -> None:
+        self.bytes_sent: int = 0
+        self.sends: int = 0
+
+    def sendall(self, data: bytes) -> None:
+        self.bytes_sent += len(data)
+        self.sends += 1
+
+    def close(self) -> None:
+        pass
+
+
+def build_server_services(root_path: str = REPO_ROOT_PATH, aoi_radius: int = 0, proximity_field: bool = True, flush_policy: str = 'event') -> ServiceManager:
+    '''Registers the server services the same way octothorpeServer.py does, without binding a socket.'''
+    service_manager = ServiceManager()
+    service_manager.register(ServerCoreService, root_path=root_path)
+    service_manager.register(ServerClientManager)
+    service_manager.register(ServerMetricsService, service_manager=service_manager)
+    service_manager.register(ServerWriterService)
+    service_manager.register(ServerInterestManager, radius=aoi_radius)
+    service_manager.register(ServerGameLogicService, service_manager=service_manager, proximity_field=proximity_field)
+    service_manager.register(ServerUserManager, service_manager=service_manager)
+    service_manager.register(ServerClientWriterManager, service_manager=service_manager)
+    service_manager.register(ServerCommandService)
+    service_manager.register(ServerOutputService, flush_policy=flush_policy)
+    return service_manager
+
+
+def build_synthetic_map(width: int, height: int, seed: int) -> WorldGrid:
+    '''Builds a walled map with random wall segments over about a tenth of its cells and a spawnpoint in the middle of an open area.'''
+    rng = random.Random(seed)
+    cells: list[bytearray] = [bytearray(b'|' + b' ' * (width - 2) + b'|') for _ in range(height)]
+    cells[0] = cells[-1] = bytearray(b'+' + b'-' * (width - 2) + b'+')
+    for _ in range(width * height // 80):
+        x, y, length = rng.randrange(1, width - 1), rng.randrange(1, height - 1), rng.randint(2, 8)
+        if rng.random() < 0.5:
+            for dx in range(min(length, width - 1 - x)):
+                cells[y][x + dx] = ord('-')
+        else:
+            for dy in range(min(length, height - 1 - y)):
+                cells[y + dy][x] = ord('|')
+
+    spawn_x, spawn_y = width // 2, height // 2
+    for y in range(max(1, spawn_y - 1), min(height - 1, spawn_y + 2)):
+        for x in range(max(1, spawn_x - 1), min(width - 1, spawn_x + 2)):
+            cells[y][x] = ord(' ')
+    cells[spawn_y][spawn_x] = ord('S')
+    return WorldGrid.from_rows(bytes(row) for row in cells)
+
+
+def load_map(service_manager: ServiceManager, grid: WorldGrid, seed: int) -> None:
+    '''Replaces the bundled map of the game logic with the given map and places its treasures with a fixed seed.'''
+    game_logic = service_manager.get_service(ServerGameLogicService)
+    for treasure in list(game_logic.treasures.values()):
+        game_logic.remove_treasure(treasure)
+    game_logic.map = grid
+    game_logic.spawnpoint = grid.find_last('S') or (1, 1)
+    if game_logic.proximity_field is not None:
+        game_logic.proximity_field = TreasureProximityField(grid, game_logic.TREASURE_FOW)
+    rng = random.Random(seed)
+    placer = TreasurePlacer(grid, game_logic.TREASURE_BOUNDARY, rng)
+    for treasure_id, position in enumerate(placer.place(game_logic.NUM_TREASURES)):
+        game_logic.add_treasure(Treasure(treasure_id, position, rng.randint(1, game_logic.NUM_TREASURES)))
+
+
+def time_per_call(func: Callable[[], object], number: int, repeat: int = 5, after_round: Callable[[], object] | None = None) -> float:
+    '''Returns the best average time of a call, in seconds, over several rounds of calls.
+
+    If given, after_round is called after every round without being timed, e.g. to drain the queues the calls filled.
+    '''
+    best: float = float('inf')
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+        if after_round:
+            after_round()
+    return best
@@ -50,6 +50,9 @@ class OctothorpeClient(object):
         new_serverreader_thread.start()
 
     def sh_shutdown(self, signal: int, frame: FrameType | None) -> Any:
+        # wake up and stop both writer threads
+        self.client_writer_service.shutdown()
+        self.client_server_writer_service.shutdown()
         self.sock.close()
         sys.exit()
 
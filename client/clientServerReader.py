@@ -4,9 +4,15 @@ from socket import socket
 import client.models.clientWriterEvent as cwe
 from client.services.clientCoreService import ClientCoreService
 from client.services.clientMapService import ClientMapService
+from client.services.clientServerWriterService import \
+    ClientServerWriterService
 from client.services.clientWriterService import ClientWriterService
+from common.models.protocol import (BinaryRecordEnum, PlayerStatusEnum,
+                                    ProtocolEnum)
 from common.services.serviceManager import ServiceManager
-from constants import CLIENT_NAME
+from common.utils.binaryProtocolUtils import BinaryProtocolUtils
+from common.utils.lineFramer import LineFramer, LineTooLongError
+from constants import CLIENT_NAME, MAX_RESPONSE_LENGTH
 
 logger = logging.getLogger(CLIENT_NAME)
 logger.setLevel(logging.INFO)
@@ -14,6 +20,7 @@ logger.setLevel(logging.INFO)
 class ServerReader(object):
     '''The Server Reader is responsible for listening to and processing any incoming responses from the server.
 
+    Responses use the text protocol until the server confirms a switch to the binary protocol, if the client asked for it at login.
     The Server Reader is created once for each client and must be initialized on its own thread.
     '''
     def __init__(self, service_manager: ServiceManager, sock: socket):
@@ -21,11 +28,17 @@ class ServerReader(object):
         self.client_map_service = self.service_manager.get_service(ClientMapService)
         self.client_core_service = self.service_manager.get_service(ClientCoreService)
         self.client_writer_service = self.service_manager.get_service(ClientWriterService)
+        self.client_server_writer_service = self.service_manager.get_service(ClientServerWriterService)
         
         self.sock: socket = sock
         self.username: str | None = None
         self.map_buffer: list[str] = []
 
+        self.line_framer: LineFramer = LineFramer(MAX_RESPONSE_LENGTH) # received text responses
+        self.recv_buffer: bytearray = bytearray() # received binary records that don't make up a complete record yet
+        self.protocol: ProtocolEnum = ProtocolEnum.TEXT
+        self.player_names: dict[int, str] = {} # usernames of the player ids used by the binary protocol
+
     def server_reader_handler(self) -> None:
         # begin listening for responses from the server
         while True:
@@ -34,11 +47,34 @@ class ServerReader(object):
             except Exception as e:
                 logger.error(e)
                 break
-            server_res: str = server_res_raw.decode('utf-8')
-            for resp in server_res.split('\r\n'):
-                if not resp:
-                    continue
-                self.execute_cmd(resp)
+            if not server_res_raw:
+                break
+            if self.protocol == ProtocolEnum.TEXT:
+                self.line_framer.feed(server_res_raw)
+            else:
+                self.recv_buffer += server_res_raw
+            try:
+                self.process_buffer()
+            except LineTooLongError as e:
+                logger.error(e)
+                break
+
+    def process_buffer(self) -> None:
+        while self.protocol == ProtocolEnum.TEXT:
+            resp: str | None = self.line_framer.next_line()
+            if resp is None:
+                break
+            if not resp:
+                continue
+            self.execute_cmd(resp)
+            if self.client_server_writer_service.protocol == ProtocolEnum.BINARY and resp == f'200:{BinaryProtocolUtils.SWITCH_MSG}':
+                # every response after this one uses the binary protocol, including the rest of what was already received
+                self.protocol = ProtocolEnum.BINARY
+                self.recv_buffer += self.line_framer.take_remaining()
+
+        if self.protocol == ProtocolEnum.BINARY:
+            for kind, payload in BinaryProtocolUtils.decode_records(self.recv_buffer):
+                self.execute_record(kind, payload)
 
     def execute_cmd(self, resp: str) -> None:
         if 'Welcome' in resp and not self.username:
@@ -47,13 +83,7 @@ class ServerReader(object):
         operation, msg = resp.split(':', 1) # using maxsplit of 1 to protect against any colons in response message
         if operation == '101':
             username, x, y, score = self.unpack_user_update(msg)
-            if self.username and self.username in resp:
-                self.client_core_service.user_info.username = username
-                self.client_core_service.user_info.position = (x, y)
-                self.client_core_service.user_info.score = score
-                self.client_map_service.update_player_position(self.client_core_service.user_info.username[0].upper(), x, y)
-            else:
-                self.client_map_service.update_player_position(username[0].upper(), x, y)
+            self.update_user(username, x, y, score)
         elif operation == '102':
             _, x, y = self.unpack_treasure_update(msg)
             self.client_map_service.update_treasure_position(x, y)
@@ -64,14 +94,59 @@ class ServerReader(object):
                         for coord in msg.split(',')]
                 self.client_map_service.map_dimensions = (x, y)
             else:
-                if not self.client_map_service.map_dimensions:
-                    raise ValueError('map_dimensions was None!')
+                self.add_map_row(msg)
+
+        self.update_screen(operation, resp)
+
+    def execute_record(self, kind: BinaryRecordEnum, payload: bytes) -> None:
+        if kind == BinaryRecordEnum.PLAYER_NAME:
+            player_id, = BinaryProtocolUtils.PLAYER_NAME.unpack_from(payload)
+            self.player_names[player_id] = payload[BinaryProtocolUtils.PLAYER_NAME.size:].decode('utf-8')
+        elif kind == BinaryRecordEnum.PLAYER_UPDATE:
+            player_id, x, y, score, status = BinaryProtocolUtils.PLAYER_UPDATE.unpack(payload)
+            username: str = self.player_names.get(player_id, str(player_id))
+            resp: str = f'101:{username}, {x}, {y}, {score}{PlayerStatusEnum(status).text_suffix}'
+            if status != PlayerStatusEnum.UPDATE:
+                # ensure other users joining or leaving are shown, like in unpack_user_update
+                self.client_writer_service.dispatch_event(cwe.ClientWriterEventPrintScrolling(resp))
+            self.update_user(username, x, y, score)
+            self.update_screen('101', resp)
+        elif kind == BinaryRecordEnum.TREASURE_PROXIMITY:
+            treasure_id, x, y = BinaryProtocolUtils.TREASURE_PROXIMITY.unpack(payload)
+            self.client_map_service.update_treasure_position(x, y)
+            self.update_screen('102', f'102:{treasure_id}, {x}, {y}')
+        elif kind == BinaryRecordEnum.TREASURE_UPDATE:
+            player_id, treasure_id, score = BinaryProtocolUtils.TREASURE_UPDATE.unpack(payload)
+            self.update_screen('103', f'103:{self.player_names.get(player_id, str(player_id))}, {treasure_id}, {score}')
+        elif kind == BinaryRecordEnum.MAP_SIZE:
+            if not self.client_map_service.map:
+                self.client_map_service.map_dimensions = BinaryProtocolUtils.MAP_SIZE.unpack(payload)
+        elif kind == BinaryRecordEnum.MAP_ROW:
+            if not self.client_map_service.map:
+                self.add_map_row(payload[BinaryProtocolUtils.MAP_ROW.size:].decode('utf-8'))
+        elif kind == BinaryRecordEnum.MESSAGE:
+            code, = BinaryProtocolUtils.MESSAGE.unpack_from(payload)
+            self.execute_cmd(f'{code}:' + payload[BinaryProtocolUtils.MESSAGE.size:].decode('utf-8'))
+
+    def update_user(self, username: str, x: int, y: int, score: int) -> None:
+        if self.username and self.username == username:
+            self.client_core_service.user_info.username = username
+            self.client_core_service.user_info.position = (x, y)
+            self.client_core_service.user_info.score = score
+            self.client_map_service.update_player_position(self.client_core_service.user_info.username[0].upper(), x, y)
+        else:
+            self.client_map_service.update_player_position(username[0].upper(), x, y)
+
+    def add_map_row(self, row: str) -> None:
+        if not self.client_map_service.map_dimensions:
+            raise ValueError('map_dimensions was None!')
 
-                self.map_buffer.append(msg + '\r\n')
-                if len(self.map_buffer) >= self.client_map_service.map_dimensions[0]:
-                    self.client_map_service.map = self.map_buffer
-                    self.map_buffer = []
+        self.map_buffer.append(row + '\r\n')
+        if len(self.map_buffer) >= self.client_map_service.map_dimensions[0]:
+            self.client_map_service.map = self.map_buffer
+            self.map_buffer = []
 
+    def update_screen(self, operation: str, resp: str) -> None:
         if operation != '104': # 104 should not update screen
             if operation != '101' or logger.getEffectiveLevel() == logging.DEBUG: # 101 should not appear in the message log on normal execution
                 self.client_writer_service.dispatch_event(cwe.ClientWriterEventPrintScrolling(resp))
@@ -97,4 +172,4 @@ class ServerReader(object):
         t_id, x, y = msg.split(',')
         x = int(x.strip())
         y = int(y.strip())
-        return t_id, x, y
\ No newline at end of file
+        return t_id, x, y
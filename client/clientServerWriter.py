@@ -1,9 +1,7 @@
-import time
 from socket import socket
 
 from client.services.clientServerWriterService import ClientServerWriterService
 from common.services.serviceManager import ServiceManager
-from constants import POLLING_INTERVAL
 
 
 class ClientServerWriter(object):
@@ -18,10 +16,6 @@ class ClientServerWriter(object):
         self.sock: socket = sock
 
     def client_server_writer_handler(self) -> None:
-        while True:
-            if self.client_server_writer_service.queue.qsize() != 0:
-                client_cmd = self.client_server_writer_service.queue.get()
-                self.sock.send(client_cmd.encode('utf-8'))
-            else:
-                # this allows the server to poll the client only every 100ms, but allow the queue of events to be processed instantaneously
-                time.sleep(POLLING_INTERVAL)
\ No newline at end of file
+        # blocks until the next request arrives and returns once the Client Server Writer Service is shut down
+        for client_cmd in self.client_server_writer_service.queue:
+            self.sock.send(client_cmd.encode('utf-8'))
\ No newline at end of file
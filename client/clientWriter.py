@@ -1,36 +1,77 @@
 import logging
 import math
 import time
+from collections import deque
+from queue import Empty
 
 import client.models.clientWriterEvent as cwe
 from client.services.clientCoreService import ClientCoreService
 from client.services.clientMapService import ClientMapService
 from client.services.clientWriterService import ClientWriterService
 from common.services.serviceManager import ServiceManager
-from constants import CLIENT_NAME, POLLING_INTERVAL
+from constants import CLIENT_NAME
 
 logger = logging.getLogger(CLIENT_NAME)
 logger.setLevel(logging.INFO)
 
 
+def changed_span(old: str, new: str) -> tuple[int, int]:
+    '''Returns the start and end of the part of the new row that differs from the old row. The span is empty if the rows are the same.'''
+    limit: int = min(len(old), len(new))
+    start: int = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    if len(old) != len(new):
+        # the rest of the row moved, so everything after the first change is written
+        return start, len(new)
+    end: int = len(new)
+    while end > start and old[end - 1] == new[end - 1]:
+        end -= 1
+    return start, end
+
+
 class ClientWriter(object):
+    '''The Client Writer draws the screen: the status line, the part of the map around the player, the scrolling messages and the input line.
+
+    Screen updates are merged, and a frame is drawn at most frame_rate times per second. Each frame is compared with the last one drawn, and only the changed cells of each row are written, in a single write.
+    Typing redraws right away, so the input line never lags behind the keyboard.
+    The Client Writer is created once for each client and must be initialized on its own thread.
+    '''
     def __init__(self, service_manager: ServiceManager) -> None:
         self.service_manager: ServiceManager = service_manager
         self.client_map_service: ClientMapService = self.service_manager.get_service(ClientMapService)
         self.client_core_service: ClientCoreService = self.service_manager.get_service(ClientCoreService)
         self.client_writer_service = self.service_manager.get_service(ClientWriterService)
+        self.frame_interval: float = 1 / self.client_writer_service.frame_rate if self.client_writer_service.frame_rate else 0 # in seconds
 
         self.input_pos: int = math.floor(self.client_core_service.term.height * 0.6)
-        self.scroll_lines: list[str] = []
+        self.scroll_lines: deque[str] = deque(maxlen=self.scroll_capacity())
+        self.input_line: str = ''
+
+        self.frame: list[str] = [] # the rows on the terminal, as last drawn
+        self.frame_size: tuple[int, int] = (self.client_core_service.term.width, self.client_core_service.term.height)
+        self.dirty: bool = False # set when the screen changed since the last frame
+        self.next_frame_at: float = 0 # on the time.perf_counter() clock
+
+    def scroll_capacity(self) -> int:
+        '''Returns how many scrolling messages fit between the map and the input line, on the bottom row.'''
+        return max(1, self.client_core_service.term.height - self.input_pos - 1)
 
     def client_writer_handler(self) -> None:
+        # blocks until the next event arrives, or until the next frame is due, and returns once the Client Writer Service is shut down
+        queue = self.client_writer_service.queue
         while True:
-            if self.client_writer_service.queue.qsize() != 0:
-                event = self.client_writer_service.queue.get()
-                self.execute_cmd(event)
-            else:
-                # this allows the client to poll for incoming requests only every 100ms, but allow the queue of events to be processed instantaneously
-                time.sleep(POLLING_INTERVAL)
+            timeout: float | None = max(0, self.next_frame_at - time.perf_counter()) if self.dirty else None
+            try:
+                event = queue.get(timeout=timeout)
+            except Empty:
+                self.draw_frame()
+                continue
+            if event is None:
+                return
+            self.execute_cmd(event)
+            if self.dirty and (time.perf_counter() >= self.next_frame_at if self.frame_interval else queue.qsize() == 0):
+                self.draw_frame()
 
     def execute_cmd(self, event: cwe.ClientWriterEventBase) -> bool:
         if isinstance(event, cwe.ClientWriterEventPrintInputLine):
@@ -43,47 +84,74 @@ class ClientWriter(object):
         return True
 
     def update_screen(self) -> None:
-        self.input_pos = math.floor(self.client_core_service.term.height * 0.6)
-        username = self.client_core_service.user_info.username or 'N/A'
-        position = self.client_core_service.user_info.position or 'N/A'
-        score = self.client_core_service.user_info.score or 'N/A'
-        with self.client_core_service.term.hidden_cursor():
-            print(self.client_core_service.term.home + self.client_core_service.term.clear_eol +
-                  f'Username:{username}, Position:{position}, Score:{score}\n')
-            if self.client_map_service.has_valid_map():
-                temp_map: list[str] = self.client_map_service.build_map()
-                num_map_lines: int = self.input_pos - 1
-                upper_map: int = 0
-                lower_map: int = num_map_lines
-                if self.client_core_service.user_info.username:
-                    zone: int = (self.client_core_service.user_info.position[1] if self.client_core_service.user_info.position else 0) // num_map_lines
-                    upper_map = zone * num_map_lines
-                    lower_map = num_map_lines + upper_map
-                    if lower_map > len(temp_map):
-                        lower_map = len(temp_map)
-                        upper_map = lower_map - num_map_lines
-
-                scr_line_idx: int = 0
-                for map_line_idx in range(upper_map, lower_map):
-                    line: str = temp_map[map_line_idx]
-                    print(self.client_core_service.term.move_xy(0, scr_line_idx + 1) +
-                          self.client_core_service.term.clear_eol + line)
-                    scr_line_idx += 1
-
-            for line_idx in range(len(self.scroll_lines)):
-                line: str = self.scroll_lines[line_idx]
-                print(self.client_core_service.term.move_xy(0, self.input_pos +
-                      line_idx) + self.client_core_service.term.clear_eol + line)
-        print(self.client_core_service.term.move_xy(0, self.input_pos + len(self.scroll_lines) - 1))
+        self.dirty = True
 
     def print_to_input_line(self, msg: str) -> None:
-        print(self.client_core_service.term.move_xy(0, self.input_pos + len(self.scroll_lines)
-                                ) + self.client_core_service.term.clear_eol + msg, flush=True, end='')
+        self.input_line = msg
+        self.draw_frame()
 
     def print_to_scrolling(self, msg: str) -> None:
+        # the oldest message drops off once the scrolling area is full
         self.scroll_lines.append(msg)
-        if self.input_pos + len(self.scroll_lines) >= self.client_core_service.term.height:
-            lines_for_removal = (
-                self.input_pos + len(self.scroll_lines)) - self.client_core_service.term.height + 1
-            for line_idx in range(lines_for_removal):
-                self.scroll_lines.pop(line_idx)
\ No newline at end of file
+        self.dirty = True
+
+    def build_frame(self) -> list[str]:
+        '''Returns the text of every row of the screen, cut to the width of the terminal.'''
+        term = self.client_core_service.term
+        user_info = self.client_core_service.user_info
+        rows: list[str] = [''] * term.height
+        rows[0] = f'Username:{user_info.username or "N/A"}, Position:{user_info.position or "N/A"}, Score:{user_info.score or "N/A"}'
+
+        if self.client_map_service.has_valid_map():
+            temp_map: list[str] = self.client_map_service.build_map()
+            num_map_lines: int = self.input_pos - 1
+            upper_map: int = 0
+            lower_map: int = min(num_map_lines, len(temp_map))
+            if user_info.username and num_map_lines > 0:
+                # the map is shown one screen-high zone at a time, the one the player is in
+                zone: int = (user_info.position[1] if user_info.position else 0) // num_map_lines
+                upper_map = zone * num_map_lines
+                lower_map = num_map_lines + upper_map
+                if lower_map > len(temp_map):
+                    lower_map = len(temp_map)
+                    upper_map = max(0, lower_map - num_map_lines)
+            for scr_line_idx, map_line_idx in enumerate(range(upper_map, lower_map)):
+                rows[scr_line_idx + 1] = temp_map[map_line_idx].rstrip('\r\n')
+
+        for line_idx, line in enumerate(self.scroll_lines):
+            if self.input_pos + line_idx < term.height:
+                rows[self.input_pos + line_idx] = line
+        input_row: int = min(self.input_pos + len(self.scroll_lines), term.height - 1)
+        rows[input_row] = self.input_line
+        return [row[:term.width] for row in rows]
+
+    def draw_frame(self) -> None:
+        term = self.client_core_service.term
+        frame_size: tuple[int, int] = (term.width, term.height)
+        output: list[str] = []
+        if frame_size != self.frame_size:
+            # the terminal was resized, so the layout changes and the whole screen is drawn again
+            self.frame_size = frame_size
+            self.input_pos = math.floor(term.height * 0.6)
+            self.scroll_lines = deque(self.scroll_lines, maxlen=self.scroll_capacity())
+            self.frame = []
+            output.append(term.clear)
+
+        frame: list[str] = self.build_frame()
+        for row_idx, row in enumerate(frame):
+            old_row: str = self.frame[row_idx] if row_idx < len(self.frame) else ''
+            start, end = changed_span(old_row, row)
+            if start < end:
+                output.append(term.move_xy(start, row_idx) + row[start:end])
+            if len(row) < len(old_row):
+                output.append(term.move_xy(len(row), row_idx) + term.clear_eol)
+        self.frame = frame
+        self.dirty = False
+        self.next_frame_at = time.perf_counter() + self.frame_interval
+
+        if not output:
+            return
+        input_row: int = min(self.input_pos + len(self.scroll_lines), term.height - 1)
+        # one write per frame, leaving the cursor at the end of the input line
+        print(term.hide_cursor + ''.join(output) + term.move_xy(min(len(self.input_line), term.width - 1), input_row) + term.normal_cursor,
+              end='', flush=True)
@@ -33,7 +33,11 @@ class ClientMapService(ServiceBase):
             if item[0] == entity_abbr:
                 entity_idx = index
                 break
-        if entity_idx != -1:
+        if x < 0 or y < 0:
+            # the player left the game or the server stopped sending their position
+            if entity_idx != -1:
+                self.map_mask.pop(entity_idx)
+        elif entity_idx != -1:
             self.map_mask[entity_idx] = (entity_abbr, x, y)
         else:
             self.map_mask.append((entity_abbr, x, y))
@@ -1,11 +1,19 @@
-from queue import Queue
-
+from common.models.protocol import ProtocolEnum
 from common.services.serviceBase import ServiceBase
+from common.utils.eventQueue import EventQueue
 
 
 class ClientServerWriterService(ServiceBase):
-    def __init__(self) -> None:
-        self.queue: Queue[str] = Queue()
+    def __init__(self, protocol: ProtocolEnum = ProtocolEnum.TEXT) -> None:
+        self.queue: EventQueue[str] = EventQueue()
+        self.protocol: ProtocolEnum = protocol
 
     def dispatch_request(self, req: str) -> None:
-        self.queue.put(req)
\ No newline at end of file
+        tokens: list[str] = req.split()
+        if self.protocol != ProtocolEnum.TEXT and len(tokens) == 2 and tokens[0].lower() == 'login':
+            # ask the server to switch to the requested protocol once logged in
+            req = f'{tokens[0]} {tokens[1]} {self.protocol}\r\n'
+        self.queue.put(req)
+
+    def shutdown(self) -> None:
+        self.queue.close()
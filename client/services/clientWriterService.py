@@ -1,12 +1,16 @@
-from queue import Queue
-
 from client.models.clientWriterEvent import ClientWriterEventBase
 from common.services.serviceBase import ServiceBase
+from common.utils.eventQueue import EventQueue
+from constants import DEFAULT_FRAME_RATE
 
 
 class ClientWriterService(ServiceBase):
-    def __init__(self) -> None:
-        self.queue: Queue[ClientWriterEventBase] = Queue()
+    def __init__(self, frame_rate: float = DEFAULT_FRAME_RATE) -> None:
+        self.frame_rate: float = frame_rate # the most frames drawn per second (0 draws as soon as no events are waiting)
+        self.queue: EventQueue[ClientWriterEventBase] = EventQueue()
 
     def dispatch_event(self, event: ClientWriterEventBase) -> None:
-        self.queue.put(event)
\ No newline at end of file
+        self.queue.put(event)
+
+    def shutdown(self) -> None:
+        self.queue.close()
@@ -5,6 +5,10 @@ _T = TypeVar("_T", bound=Enum)
 
 
 class ComprehensiveSearchEnum(EnumMeta):
+    '''Lets an enum be looked up by its lowercase name or by any name starting with the same letter (e.g. 'n' for NORTH). If members share a letter, the first one wins.
+
+    The members are indexed by letter the first time the enum is searched, so each search is a single dict lookup.
+    '''
     def __contains__(cls: type[_T], obj: object) -> bool: # pyright: ignore[reportGeneralTypeIssues]
         if isinstance(obj, str):
             enum_item: _T | None = ComprehensiveSearchEnum._search_by_name(cls, str(obj))
@@ -19,14 +23,14 @@ class ComprehensiveSearchEnum(EnumMeta):
             return enum_item
 
         return super().__getitem__(name)
-    
+
     def _search_by_name(cls: type[_T], name: str) -> _T | None: # pyright: ignore[reportGeneralTypeIssues]
-        for direction in cls:
-            if direction.name.lower() == name.lower():
-                # check lowercase version of the name of each enum
-                return direction
-            elif direction.name[0].lower() == name[0].lower():
-                # check the first letter (n, e, w, s)
-                return direction
-        
-        return None
\ No newline at end of file
+        by_letter: dict[str, _T] | None = cls.__dict__.get('_members_by_letter')
+        if by_letter is None:
+            by_letter = {}
+            for member in cls:
+                # a lowercase name always starts with its member's letter, so the first member with a letter matches every name starting with it (n, e, w, s)
+                by_letter.setdefault(member.name[0].lower(), member)
+            setattr(cls, '_members_by_letter', by_letter)
+
+        return by_letter.get(name[:1].lower())
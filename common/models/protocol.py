@@ -0,0 +1,35 @@
+from enum import Enum, IntEnum, auto
+
+
+class ProtocolEnum(Enum):
+    TEXT = auto()
+    BINARY = auto()
+
+    def __str__(self) -> str:
+        return self.name.lower()
+
+
+class BinaryRecordEnum(IntEnum):
+    '''The kind of each record in the binary protocol. Every kind has a fixed layout, see BinaryProtocolUtils.'''
+    PLAYER_UPDATE = 1 # 101
+    TREASURE_PROXIMITY = 2 # 102
+    TREASURE_UPDATE = 3 # 103
+    MAP_SIZE = 4 # 104, map dimensions
+    MAP_ROW = 5 # 104, one row of the map
+    PLAYER_NAME = 6 # assigns a username to a player id
+    MESSAGE = 7 # any code with a text message, i.e. 200, 400 and 500
+
+
+class PlayerStatusEnum(IntEnum):
+    UPDATE = 0
+    JOINED = 1
+    LEFT = 2
+
+    @property
+    def text_suffix(self) -> str:
+        '''The text appended to a player update in the text protocol'''
+        if self == PlayerStatusEnum.JOINED:
+            return ', joined the game'
+        elif self == PlayerStatusEnum.LEFT:
+            return ', left the game'
+        return ''
@@ -0,0 +1,74 @@
+import struct
+
+from common.models.protocol import BinaryRecordEnum, PlayerStatusEnum
+
+
+class BinaryProtocolUtils(object):
+    '''Encodes and decodes the length-prefixed binary protocol.
+
+    Each record is a header of the payload length (uint16) and the record kind (uint8), followed by the payload. All integers are big-endian.
+    Players are referred to by a compact id. A PLAYER_NAME record is sent before the first record that refers to a player the client doesn't know yet.
+    '''
+    # the text response sent right before the server switches a client to the binary protocol
+    SWITCH_MSG: str = 'Switching to binary protocol'
+
+    HEADER = struct.Struct('>HB') # payload length, record kind
+    PLAYER_UPDATE = struct.Struct('>IiiiB') # player id, x, y, score, player status
+    TREASURE_PROXIMITY = struct.Struct('>Iii') # treasure id, x, y
+    TREASURE_UPDATE = struct.Struct('>IIi') # player id, treasure id, treasure score
+    MAP_SIZE = struct.Struct('>II') # rows, columns
+    MAP_ROW = struct.Struct('>I') # row index, followed by the row's characters
+    PLAYER_NAME = struct.Struct('>I') # player id, followed by the utf-8 username
+    MESSAGE = struct.Struct('>H') # code, followed by the utf-8 message
+
+    MAX_PAYLOAD: int = 0xFFFF
+
+    @staticmethod
+    def encode_record(kind: BinaryRecordEnum, payload: bytes) -> bytes:
+        if len(payload) > BinaryProtocolUtils.MAX_PAYLOAD:
+            raise ValueError(f'Binary record payload of {len(payload)} bytes exceeds the maximum of {BinaryProtocolUtils.MAX_PAYLOAD}')
+        return BinaryProtocolUtils.HEADER.pack(len(payload), kind) + payload
+
+    @staticmethod
+    def player_update(player_id: int, x: int, y: int, score: int, status: PlayerStatusEnum = PlayerStatusEnum.UPDATE) -> bytes:
+        return BinaryProtocolUtils.encode_record(BinaryRecordEnum.PLAYER_UPDATE, BinaryProtocolUtils.PLAYER_UPDATE.pack(player_id, x, y, score, status))
+
+    @staticmethod
+    def treasure_proximity(treasure_id: int, x: int, y: int) -> bytes:
+        return BinaryProtocolUtils.encode_record(BinaryRecordEnum.TREASURE_PROXIMITY, BinaryProtocolUtils.TREASURE_PROXIMITY.pack(treasure_id, x, y))
+
+    @staticmethod
+    def treasure_update(player_id: int, treasure_id: int, score: int) -> bytes:
+        return BinaryProtocolUtils.encode_record(BinaryRecordEnum.TREASURE_UPDATE, BinaryProtocolUtils.TREASURE_UPDATE.pack(player_id, treasure_id, score))
+
+    @staticmethod
+    def map_size(rows: int, columns: int) -> bytes:
+        return BinaryProtocolUtils.encode_record(BinaryRecordEnum.MAP_SIZE, BinaryProtocolUtils.MAP_SIZE.pack(rows, columns))
+
+    @staticmethod
+    def map_row(row_idx: int, row: bytes) -> bytes:
+        return BinaryProtocolUtils.encode_record(BinaryRecordEnum.MAP_ROW, BinaryProtocolUtils.MAP_ROW.pack(row_idx) + row)
+
+    @staticmethod
+    def player_name(player_id: int, username: str) -> bytes:
+        return BinaryProtocolUtils.encode_record(BinaryRecordEnum.PLAYER_NAME, BinaryProtocolUtils.PLAYER_NAME.pack(player_id) + username.encode('utf-8'))
+
+    @staticmethod
+    def message(code: int, msg: str) -> bytes:
+        return BinaryProtocolUtils.encode_record(BinaryRecordEnum.MESSAGE, BinaryProtocolUtils.MESSAGE.pack(code) + msg.encode('utf-8'))
+
+    @staticmethod
+    def decode_records(buffer: bytearray) -> list[tuple[BinaryRecordEnum, bytes]]:
+        '''Removes every complete record from the start of the buffer and returns them. An incomplete record is left in the buffer until the rest of it is received.'''
+        records: list[tuple[BinaryRecordEnum, bytes]] = []
+        offset: int = 0
+        header_size: int = BinaryProtocolUtils.HEADER.size
+        while len(buffer) - offset >= header_size:
+            payload_len, kind = BinaryProtocolUtils.HEADER.unpack_from(buffer, offset)
+            record_end: int = offset + header_size + payload_len
+            if record_end > len(buffer):
+                break
+            records.append((BinaryRecordEnum(kind), bytes(buffer[offset + header_size:record_end])))
+            offset = record_end
+        del buffer[:offset]
+        return records
@@ -0,0 +1,77 @@
+import threading
+import time
+from queue import Queue
+from typing import Generic, Iterator, TypeVar
+
+_T = TypeVar("_T")
+
+
+class EventQueueStats(object):
+    '''Running totals of how long events waited in an Event Queue before being picked up by its consumer. Times are in seconds.'''
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.total_wait: float = 0
+        self.max_wait: float = 0
+        self.last_wait: float = 0
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.count if self.count else 0
+
+    def record(self, wait: float) -> None:
+        self.count += 1
+        self.total_wait += wait
+        self.last_wait = wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+
+class EventQueue(Generic[_T]):
+    '''A FIFO queue of events whose consumer blocks until an event arrives or the queue is closed, instead of polling on an interval.
+
+    Every event is timestamped when it is put in the queue so the time it waited can be recorded when it is taken out.
+    Iterating over the queue yields events until close() is called; any events put before close() are still yielded.
+    '''
+    def __init__(self) -> None:
+        self._queue: Queue[tuple[float, _T] | None] = Queue()
+        self._closed: threading.Event = threading.Event()
+        self.stats: EventQueueStats = EventQueueStats()
+        self.last_enqueued_at: float = 0 # when the event last taken out was put in the queue, on the time.perf_counter() clock
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def put(self, event: _T) -> None:
+        self._queue.put((time.perf_counter(), event))
+
+    def get(self, block: bool = True, timeout: float | None = None) -> _T | None:
+        '''Returns the next event, or None once the queue has been closed. Raises queue.Empty if no event is available when not blocking.'''
+        item = self._queue.get(block, timeout)
+        if item is None:
+            # keep the sentinel in place so every consumer of a closed queue wakes up
+            self._queue.put(None)
+            return None
+        enqueued_at, event = item
+        self.last_enqueued_at = enqueued_at
+        self.stats.record(time.perf_counter() - enqueued_at)
+        return event
+
+    def get_nowait(self) -> _T | None:
+        return self.get(block=False)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self._closed.set()
+        self._queue.put(None)
+
+    def __iter__(self) -> Iterator[_T]:
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            yield event
@@ -0,0 +1,81 @@
+class LineTooLongError(ValueError):
+    pass
+
+
+class LineFramer(object):
+    '''Splits a stream of bytes received from a socket into lines ending in '\\r\\n'.
+
+    Received bytes are kept in a buffer until their line is complete, so lines and multi-byte characters split across reads come out whole.
+    Each byte is scanned for the end of a line only once, and the bytes of the lines already taken are dropped on the next feed.
+    With backspace handling on, a '\\b' deletes the character before it, as typed in telnet, but never the end of a line that was already complete.
+    '''
+    def __init__(self, max_line_length: int, backspace: bool = False) -> None:
+        self.max_line_length: int = max_line_length # in bytes, without the '\r\n'
+        self.backspace: bool = backspace
+
+        self.buffer: bytearray = bytearray()
+        self.start: int = 0 # where the next line starts
+        self.scan_pos: int = 0 # where to resume looking for the end of the next line
+
+    def feed(self, data: bytes) -> int:
+        '''Adds received bytes to the buffer. Returns the number of backspaces in them, which telnet expects to be echoed.'''
+        if self.start:
+            del self.buffer[:self.start]
+            self.scan_pos -= self.start
+            self.start = 0
+
+        if not self.backspace or b'\b' not in data:
+            self.buffer += data
+            return 0
+
+        segments: list[bytes] = data.split(b'\b')
+        self.buffer += segments[0]
+        for segment in segments[1:]:
+            self.delete_last_character()
+            self.buffer += segment
+        return len(segments) - 1
+
+    def delete_last_character(self) -> None:
+        buffer: bytearray = self.buffer
+        last_line_end: int = buffer.rfind(b'\r\n', self.start)
+        line_start: int = last_line_end + 2 if last_line_end != -1 else self.start
+        end: int = len(buffer)
+        if end <= line_start:
+            return
+        end -= 1
+        # continuation bytes (0b10xxxxxx) belong to the character before them, so a multi-byte character is deleted whole
+        while end > line_start and buffer[end] & 0xC0 == 0x80:
+            end -= 1
+        del buffer[end:]
+        self.scan_pos = min(self.scan_pos, end)
+
+    def next_line(self) -> str | None:
+        '''Returns the next complete line without its '\\r\\n', or None if the rest of the buffer isn't a complete line yet.'''
+        buffer: bytearray = self.buffer
+        line_end: int = buffer.find(b'\r\n', self.scan_pos)
+        if line_end == -1:
+            if len(buffer) - self.start > self.max_line_length:
+                raise LineTooLongError(f'Line is longer than the limit of {self.max_line_length} bytes')
+            # the last byte may be the '\r' of a '\r\n' split across reads
+            self.scan_pos = max(self.start, len(buffer) - 1)
+            return None
+        if line_end - self.start > self.max_line_length:
+            raise LineTooLongError(f'Line is longer than the limit of {self.max_line_length} bytes')
+
+        line: str = buffer[self.start:line_end].decode('utf-8', errors='replace')
+        self.start = self.scan_pos = line_end + 2
+        return line
+
+    def lines(self) -> list[str]:
+        '''Returns every complete line in the buffer.'''
+        lines: list[str] = []
+        while (line := self.next_line()) is not None:
+            lines.append(line)
+        return lines
+
+    def take_remaining(self) -> bytes:
+        '''Returns and clears the bytes after the last line taken, for when the rest of the stream is no longer made of lines.'''
+        remaining: bytes = bytes(self.buffer[self.start:])
+        self.buffer.clear()
+        self.start = self.scan_pos = 0
+        return remaining
@@ -7,7 +7,25 @@ DEFAULT_SERVER_PORT = 8001
 DEFAULT_ROOT_PATH = os.path.split(os.path.abspath(sys.argv[0]))[0]
 SERVER_NAME = 'cgif-octothorpe-gameserver'
 USER_AUTOSAVE_INTERVAL = 60 # in seconds
-POLLING_INTERVAL = 0.1 # in seconds
+CLIENT_WRITER_DRAIN_TIMEOUT = 5 # in seconds
+MAX_REQUEST_LENGTH = 1024 # in bytes
+COMMAND_STATS_INTERVAL = 60 # in seconds
+IO_WORKER_CHECK_INTERVAL = 1 # in seconds
+IO_WORKER_STOP_TIMEOUT = 5 # in seconds
+OUTPUT_BUFFER_FLUSH_BYTES = 65536 # in bytes
+MAX_SENDMSG_BUFFERS = 1024 # the usual IOV_MAX
+SLOW_CLIENT_TIMEOUT = 10 # in seconds
+SLOW_CLIENT_CHECK_INTERVAL = 1 # in seconds
+PROFILE_SECONDS = 30 # in seconds
+PROFILE_TOP_FUNCTIONS = 50
+PROFILE_TOP_ALLOCATIONS = 25
 
 # client constants
-CLIENT_NAME = 'cgif-octothorpe-gameclient'
\ No newline at end of file
+CLIENT_NAME = 'cgif-octothorpe-gameclient'
+MAX_RESPONSE_LENGTH = 65536 # in bytes
+DEFAULT_FRAME_RATE = 30 # in frames per second
+
+# load test constants
+LOAD_TEST_NAME = 'cgif-octothorpe-loadtest'
+LOAD_TEST_LOGIN_TIMEOUT = 10 # in seconds
+LOAD_TEST_DRAIN_TIMEOUT = 5 # in seconds
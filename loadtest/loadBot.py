@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from common.models.game.direction import Direction
+from common.utils.lineFramer import LineFramer, LineTooLongError
+from constants import (LOAD_TEST_DRAIN_TIMEOUT, LOAD_TEST_LOGIN_TIMEOUT,
+                       LOAD_TEST_NAME, MAX_RESPONSE_LENGTH)
+from loadtest.loadReport import LoadReport
+from loadtest.movementPatterns import MovementPattern, step
+from server.models.worldGrid import WorldGrid
+
+logger = logging.getLogger(LOAD_TEST_NAME)
+logger.setLevel(logging.INFO)
+
+
+class LoadBot(object):
+    '''A headless player for load tests. It logs in as its own user with the text protocol and sends the commands chosen by its movement pattern at a set rate.
+
+    A client's responses are sent in the order of its commands, so each answer is matched to the oldest command still waiting for one.
+    Moves are answered by a 200 or a 400, and map commands by the map rows. Player updates, treasure messages and the map sent at login aren't answers.
+    Every bot of a load test runs as a coroutine on the same event loop.
+    '''
+    def __init__(self, username: str, pattern: MovementPattern, rate: float, report: LoadReport, move_times: dict[str, dict[tuple[int, int], float]]) -> None:
+        self.username: str = username
+        self.pattern: MovementPattern = pattern
+        self.rate: float = rate # commands per second, 0 sends the next command once the last one is answered
+        self.report: LoadReport = report
+        self.move_times: dict[str, dict[tuple[int, int], float]] = move_times # shared by every bot (key: username, val: (key: position, val: when the move there was sent))
+        self.move_times[username] = {}
+
+        self.line_framer: LineFramer = LineFramer(MAX_RESPONSE_LENGTH)
+        self.pending: deque[tuple[str, float]] = deque() # commands waiting for an answer, with when they were sent
+        self.answered: asyncio.Event = asyncio.Event()
+        self.greeted: asyncio.Event = asyncio.Event() # set once the greeting sent on connect has arrived
+        self.logged_in: asyncio.Event = asyncio.Event()
+        self.closed: bool = False
+        self.quitting: bool = False
+
+        self.map_height: int = 0
+        self.map_rows: list[str] = [] # rows of the map being received
+        self.grid: WorldGrid | None = None
+        self.position: tuple[int, int] | None = None # where the bot will be once the server handles every move it was sent
+
+    def in_window(self, timestamp: float) -> bool:
+        return self.report.start_at <= timestamp < self.report.stop_at
+
+    async def run(self, host: str, port: int, connect_at: float) -> None:
+        await asyncio.sleep(max(0, connect_at - time.perf_counter()))
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError as ex:
+            logger.debug(f'{self.username} failed to connect: {ex}')
+            self.report.errors['connect_failed'] += 1
+            return
+
+        read_task: asyncio.Task[None] = asyncio.create_task(self.read_responses(reader))
+        try:
+            try:
+                # the login is only sent after the greeting, so the greeting isn't taken as its answer
+                await asyncio.wait_for(self.greeted.wait(), LOAD_TEST_LOGIN_TIMEOUT)
+                self.send(writer, 'login', f'login {self.username}')
+                await asyncio.wait_for(self.logged_in.wait(), LOAD_TEST_LOGIN_TIMEOUT)
+            except TimeoutError:
+                pass
+            if self.grid is None or self.position is None:
+                self.report.errors['login_failed'] += 1
+                return
+            self.report.logged_in += 1
+
+            await self.send_commands(writer)
+            await self.drain()
+            self.quitting = True
+            self.send(writer, None, 'quit')
+            await writer.drain()
+        except OSError:
+            pass
+        finally:
+            self.quitting = True
+            writer.close()
+            read_task.cancel()
+
+    async def send_commands(self, writer: asyncio.StreamWriter) -> None:
+        await asyncio.sleep(max(0, self.report.start_at - time.perf_counter()))
+        next_at: float = time.perf_counter()
+        while not self.closed:
+            now: float = time.perf_counter()
+            if now >= self.report.stop_at:
+                return
+            if self.rate:
+                if now < next_at:
+                    await asyncio.sleep(next_at - now)
+                    continue
+                # a bot that fell behind skips the commands it missed instead of sending them in a burst
+                next_at = max(next_at + 1 / self.rate, now)
+            elif self.pending:
+                self.answered.clear()
+                await self.answered.wait()
+                continue
+
+            if self.grid is None or self.position is None:
+                return
+            command: Direction | str = self.pattern.next_command(self.grid, self.position)
+            if isinstance(command, Direction):
+                target: tuple[int, int] = step(self.position, command)
+                if self.grid.is_passable(*target):
+                    self.position = target
+                    self.move_times[self.username][target] = now
+                self.send(writer, 'move', f'move {command}')
+            else:
+                self.send(writer, command, command)
+            self.report.commands_sent += 1
+            await writer.drain()
+
+    async def drain(self) -> None:
+        '''Waits for the answers to the commands already sent, counting the ones that don't arrive in time.'''
+        deadline: float = time.perf_counter() + LOAD_TEST_DRAIN_TIMEOUT
+        while self.pending and not self.closed:
+            remaining: float = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self.answered.clear()
+            try:
+                await asyncio.wait_for(self.answered.wait(), remaining)
+            except TimeoutError:
+                break
+        self.report.errors['unanswered'] += len(self.pending)
+
+    def send(self, writer: asyncio.StreamWriter, answered_by: str | None, request: str) -> None:
+        if answered_by:
+            self.pending.append((answered_by, time.perf_counter()))
+        writer.write(f'{request}\r\n'.encode('utf-8'))
+
+    async def read_responses(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                data: bytes = await reader.read(65536)
+                if not data:
+                    break
+                received_at: float = time.perf_counter()
+                if self.in_window(received_at):
+                    self.report.bytes_received += len(data)
+                self.line_framer.feed(data)
+                while (response := self.line_framer.next_line()) is not None:
+                    if response:
+                        self.handle_response(response, received_at)
+        except (OSError, LineTooLongError) as ex:
+            logger.debug(f'{self.username} stopped reading: {ex}')
+        finally:
+            if not self.quitting:
+                self.report.errors['disconnected'] += 1
+            self.closed = True
+            self.answered.set()
+            self.greeted.set()
+            self.logged_in.set()
+
+    def handle_response(self, response: str, received_at: float) -> None:
+        if self.in_window(received_at):
+            self.report.responses += 1
+        code, _, msg = response.partition(':')
+        if code == '104':
+            self.map_response(msg, received_at)
+        elif code in ('200', '400', '500'):
+            if not self.greeted.is_set():
+                # the greeting asking to log in
+                self.greeted.set()
+                return
+            if self.pending and self.pending[0][0] == 'login':
+                if code != '200':
+                    # the user is already logged in elsewhere or the username was rejected, and the server closes the connection.
+                    # This is only counted as a failed login
+                    self.quitting = True
+                    self.logged_in.set()
+                self.answer(received_at)
+                return
+            if code == '400':
+                self.report.errors['user_error'] += 1
+            elif code == '500':
+                self.report.errors['server_error'] += 1
+            if not self.pending or self.pending[0][0] in ('map', 'cheatmap'):
+                return
+            self.answer(received_at)
+        elif code == '101':
+            self.player_update(msg, received_at)
+
+    def map_response(self, msg: str, received_at: float) -> None:
+        if not self.map_height:
+            # the map size sent at login, e.g. (20, 60)
+            self.map_height = int(msg.strip('()').split(',')[0])
+            return
+        self.map_rows.append(msg)
+        if len(self.map_rows) < self.map_height:
+            return
+        rows, self.map_rows = self.map_rows, []
+        if self.grid is None:
+            self.grid = WorldGrid.from_rows(row.encode('utf-8') for row in rows)
+            self.check_logged_in()
+        elif self.pending and self.pending[0][0] in ('map', 'cheatmap'):
+            if self.pending[0][0] == 'cheatmap':
+                self.pattern.on_cheatmap(self.grid, rows)
+            self.answer(received_at)
+
+    def player_update(self, msg: str, received_at: float) -> None:
+        # e.g. 'bot1, 12, 4, 30', with ', joined the game' or ', left the game' when the player logs in or out
+        parts: list[str] = msg.split(', ')
+        if len(parts) < 4:
+            return
+        try:
+            position: tuple[int, int] = (int(parts[1]), int(parts[2]))
+        except ValueError:
+            return
+        username: str = parts[0]
+        if username == self.username:
+            if self.position is None:
+                self.position = position
+                self.check_logged_in()
+            return
+        if len(parts) > 4 or not self.in_window(received_at):
+            return
+        # matched to the latest move to that position, as the update doesn't say which move it was for
+        sent_at: float | None = self.move_times.get(username, {}).get(position)
+        if sent_at is not None and sent_at <= received_at:
+            self.report.fanout.append(received_at - sent_at)
+
+    def answer(self, received_at: float) -> None:
+        command, sent_at = self.pending.popleft()
+        if command == 'login' or self.in_window(sent_at):
+            self.report.record_round_trip(command, received_at - sent_at)
+        self.answered.set()
+
+    def check_logged_in(self) -> None:
+        if self.grid is not None and self.position is not None:
+            self.logged_in.set()
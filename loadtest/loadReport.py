@@ -0,0 +1,82 @@
+import math
+from typing import Any
+
+PERCENTILES: tuple[tuple[str, float], ...] = (('p50', 0.5), ('p99', 0.99), ('p999', 0.999))
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    '''Returns the nearest-rank percentile of a sorted list.'''
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    '''Returns the count and the percentiles and maximum of the samples, in milliseconds.'''
+    ordered: list[float] = sorted(samples)
+    summary: dict[str, float] = {'count': len(ordered)}
+    for name, fraction in PERCENTILES:
+        summary[f'{name}_ms'] = percentile(ordered, fraction) * 1000
+    summary['max_ms'] = ordered[-1] * 1000 if ordered else 0
+    return summary
+
+
+class LoadReport(object):
+    '''Everything the bots of a load test measured. Times are in seconds.
+
+    Every bot runs on the same event loop, so they record into one report without locking.
+    '''
+    ERRORS: tuple[str, ...] = ('user_error', 'server_error', 'connect_failed', 'login_failed', 'disconnected', 'unanswered')
+
+    def __init__(self) -> None:
+        self.round_trips: dict[str, list[float]] = {} # from sending a command to receiving its response (key: command)
+        self.fanout: list[float] = [] # from a bot sending a move to another bot receiving the player update
+        self.errors: dict[str, int] = {error: 0 for error in LoadReport.ERRORS}
+        self.commands_sent: int = 0
+        self.responses: int = 0 # lines received
+        self.bytes_received: int = 0
+        self.logged_in: int = 0
+
+        # only what happens between these times is measured, on the time.perf_counter() clock
+        self.start_at: float = 0
+        self.stop_at: float = 0
+
+    def record_round_trip(self, command: str, seconds: float) -> None:
+        self.round_trips.setdefault(command, []).append(seconds)
+
+    def summary(self, bots: int, seconds: float, rate: float) -> dict[str, Any]:
+        return {
+            'bots': bots,
+            'logged_in': self.logged_in,
+            'seconds': seconds,
+            'round_trip': {command: summarize(samples) for command, samples in sorted(self.round_trips.items())},
+            'fanout': summarize(self.fanout),
+            'throughput': {
+                # falling short of the target means the server or the load generator itself couldn't keep up
+                'target_commands_per_second': self.logged_in * rate,
+                'commands_per_second': self.commands_sent / seconds if seconds else 0,
+                'responses_per_second': self.responses / seconds if seconds else 0,
+                'bytes_per_second': self.bytes_received / seconds if seconds else 0
+            },
+            'errors': dict(self.errors)
+        }
+
+    @staticmethod
+    def format_table(summary: dict[str, Any]) -> str:
+        lines: list[str] = [
+            f'{summary["logged_in"]} of {summary["bots"]} bots logged in, measured for {summary["seconds"]:.1f} seconds',
+            '',
+            f'{"latency":>20} {"count":>10} {"p50 (ms)":>10} {"p99 (ms)":>10} {"p999 (ms)":>10} {"max (ms)":>10}'
+        ]
+        rows: list[tuple[str, dict[str, float]]] = [(f'{command} round trip', stats) for command, stats in summary['round_trip'].items()]
+        rows.append(('move fan-out', summary['fanout']))
+        for name, stats in rows:
+            lines.append(f'{name:>20} {stats["count"]:>10,} {stats["p50_ms"]:>10.2f} {stats["p99_ms"]:>10.2f} {stats["p999_ms"]:>10.2f} {stats["max_ms"]:>10.2f}')
+
+        throughput: dict[str, float] = summary['throughput']
+        lines.append('')
+        target: str = f' (of {throughput["target_commands_per_second"]:,.0f} targeted)' if throughput['target_commands_per_second'] else ''
+        lines.append(f'throughput: {throughput["commands_per_second"]:,.0f} commands/s{target}, {throughput["responses_per_second"]:,.0f} responses/s, '
+                     f'{throughput["bytes_per_second"] / 1024:,.1f} KiB/s received')
+        lines.append('errors: ' + ', '.join(f'{error} {count}' for error, count in summary['errors'].items()))
+        return '\n'.join(lines)
@@ -0,0 +1,134 @@
+import random
+from abc import ABC, abstractmethod
+from collections import deque
+
+from common.models.game.direction import Direction
+from server.models.worldGrid import WorldGrid
+from server.serverClientGameLogic import DIRECTION_OFFSETS
+
+RIGHT_TURNS: dict[Direction, Direction] = {
+    Direction.NORTH: Direction.EAST,
+    Direction.EAST: Direction.SOUTH,
+    Direction.SOUTH: Direction.WEST,
+    Direction.WEST: Direction.NORTH
+}
+LEFT_TURNS: dict[Direction, Direction] = {turn: direction for direction, turn in RIGHT_TURNS.items()}
+REVERSE: dict[Direction, Direction] = {direction: RIGHT_TURNS[turn] for direction, turn in RIGHT_TURNS.items()}
+
+
+def step(position: tuple[int, int], direction: Direction) -> tuple[int, int]:
+    dx, dy = DIRECTION_OFFSETS[direction]
+    return position[0] + dx, position[1] + dy
+
+
+class MovementPattern(ABC):
+    '''Chooses the next command of a bot, from the map and the position the bot will be at once its earlier moves are handled.
+
+    A command is either the direction of a move or the text of another command. Patterns only move to passable cells, so every move should succeed.
+    '''
+    def __init__(self, rng: random.Random) -> None:
+        self.rng: random.Random = rng
+
+    @abstractmethod
+    def next_command(self, grid: WorldGrid, position: tuple[int, int]) -> Direction | str:
+        '''Returns the bot's next command for the position it will be at.'''
+
+    def on_cheatmap(self, grid: WorldGrid, rows: list[str]) -> None:
+        '''Called with the rows of every cheatmap the bot receives.'''
+        pass
+
+    def open_directions(self, grid: WorldGrid, position: tuple[int, int]) -> list[Direction]:
+        return [direction for direction in Direction if grid.is_passable(*step(position, direction))]
+
+    def random_move(self, grid: WorldGrid, position: tuple[int, int]) -> Direction:
+        directions: list[Direction] = self.open_directions(grid, position)
+        # a player walled in on every side gets its move rejected, which is counted as an error
+        return self.rng.choice(directions) if directions else Direction.NORTH
+
+
+class RandomWalkPattern(MovementPattern):
+    '''Moves to a random open neighbouring cell every time.'''
+    def next_command(self, grid: WorldGrid, position: tuple[int, int]) -> Direction | str:
+        return self.random_move(grid, position)
+
+
+class WallHugPattern(MovementPattern):
+    '''Walks straight until it reaches a wall, then follows walls with the right-hand rule.'''
+    def __init__(self, rng: random.Random) -> None:
+        super().__init__(rng)
+        self.heading: Direction = rng.choice(list(Direction))
+        self.following: bool = False
+
+    def next_command(self, grid: WorldGrid, position: tuple[int, int]) -> Direction | str:
+        if not self.following:
+            if grid.is_passable(*step(position, self.heading)):
+                return self.heading
+            self.following = True
+        for direction in (RIGHT_TURNS[self.heading], self.heading, LEFT_TURNS[self.heading], REVERSE[self.heading]):
+            if grid.is_passable(*step(position, direction)):
+                self.heading = direction
+                return direction
+        return self.heading
+
+
+class TreasureSeekPattern(MovementPattern):
+    '''Finds the treasures with cheatmap and walks the shortest path to the nearest one.
+
+    A new cheatmap is requested whenever the bot reaches its target or finds no path, and the bot walks randomly until it arrives.
+    Collected treasures stay on the map, so the bot heads for a different treasure than the last one each time.
+    '''
+    def __init__(self, rng: random.Random) -> None:
+        super().__init__(rng)
+        self.treasures: set[tuple[int, int]] = set()
+        self.path: deque[Direction] = deque()
+        self.target: tuple[int, int] | None = None
+        self.awaiting_cheatmap: bool = False
+
+    def next_command(self, grid: WorldGrid, position: tuple[int, int]) -> Direction | str:
+        if not self.path and self.treasures:
+            self.plan(grid, position)
+            # the treasure may be collected by another player on the way, so the next cheatmap is only requested once the bot gets there
+            self.treasures = set()
+        if self.path:
+            return self.path.popleft()
+        if not self.awaiting_cheatmap:
+            self.awaiting_cheatmap = True
+            return 'cheatmap'
+        return self.random_move(grid, position)
+
+    def on_cheatmap(self, grid: WorldGrid, rows: list[str]) -> None:
+        # treasures are drawn as their score, starting at their position
+        self.treasures = {
+            (x, y)
+            for y, row in enumerate(rows)
+            for x, cell in enumerate(row)
+            if cell.isdigit() and (x == 0 or not row[x - 1].isdigit()) and grid.is_passable(x, y)
+        }
+        self.awaiting_cheatmap = False
+
+    def plan(self, grid: WorldGrid, position: tuple[int, int]) -> None:
+        '''Finds the shortest path to the nearest treasure with a breadth-first search.'''
+        came_from: dict[tuple[int, int], tuple[tuple[int, int], Direction] | None] = {position: None}
+        frontier: deque[tuple[int, int]] = deque([position])
+        while frontier:
+            cell: tuple[int, int] = frontier.popleft()
+            if cell in self.treasures and cell != position and cell != self.target:
+                self.target = cell
+                path: deque[Direction] = deque()
+                while (link := came_from[cell]) is not None:
+                    cell, direction = link
+                    path.appendleft(direction)
+                self.path = path
+                return
+            for direction in Direction:
+                neighbour: tuple[int, int] = step(cell, direction)
+                if neighbour not in came_from and grid.is_passable(*neighbour):
+                    came_from[neighbour] = (cell, direction)
+                    frontier.append(neighbour)
+
+
+MOVEMENT_PATTERNS: dict[str, type[MovementPattern]] = {
+    'random': RandomWalkPattern,
+    'wall': WallHugPattern,
+    'treasure': TreasureSeekPattern
+}
@@ -9,9 +9,10 @@ from client.services.clientCoreService import ClientCoreService
 from client.services.clientMapService import ClientMapService
 from client.services.clientServerWriterService import ClientServerWriterService
 from client.services.clientWriterService import ClientWriterService
+from common.models.protocol import ProtocolEnum
 from common.services.serviceManager import ServiceManager
-from constants import (CLIENT_NAME, DEFAULT_ROOT_PATH, DEFAULT_SERVER_HOST,
-                       DEFAULT_SERVER_PORT)
+from constants import (CLIENT_NAME, DEFAULT_FRAME_RATE, DEFAULT_ROOT_PATH,
+                       DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT)
 
 logging.basicConfig()
 
@@ -29,17 +30,23 @@ if __name__ == '__main__':
                         help='server host', default=DEFAULT_SERVER_HOST, required=False)
     parser.add_argument('--root_path', metavar='r',
                         help='root directory to client resources', default=DEFAULT_ROOT_PATH, required=False)
+    parser.add_argument('--protocol', metavar='P', type=str, help='protocol requested at login',
+                        choices=[str(p) for p in ProtocolEnum], default=str(ProtocolEnum.TEXT), required=False)
+    parser.add_argument('--frame_rate', metavar='f', type=float, help='most screen redraws per second (0 redraws as soon as no events are waiting)',
+                        default=DEFAULT_FRAME_RATE, required=False)
 
     args = parser.parse_args()
+    if args.frame_rate < 0:
+        parser.error('--frame_rate can\'t be negative')
     port = args.port
     host = args.host
     root_path = args.root_path
 
     service_manager = ServiceManager()
     service_manager.register(ClientCoreService)
-    service_manager.register(ClientWriterService)
+    service_manager.register(ClientWriterService, frame_rate=args.frame_rate)
     service_manager.register(ClientMapService)
-    service_manager.register(ClientServerWriterService)
+    service_manager.register(ClientServerWriterService, protocol=ProtocolEnum[args.protocol.upper()])
     
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         try:
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from typing import Any
+
+from constants import DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT, LOAD_TEST_NAME
+from loadtest.loadBot import LoadBot
+from loadtest.loadReport import LoadReport
+from loadtest.movementPatterns import MOVEMENT_PATTERNS
+
+logging.basicConfig()
+
+
+async def run_load_test(host: str, port: int, bots: int, pattern: str, rate: float, duration: float, ramp: float, username_prefix: str, seed: int | None) -> dict[str, Any]:
+    '''Connects the bots over the ramp, lets them play for the duration once every bot had the chance to log in, and returns the summary of what they measured.'''
+    report = LoadReport()
+    move_times: dict[str, dict[tuple[int, int], float]] = {}
+    rng = random.Random(seed)
+    load_bots: list[LoadBot] = [
+        LoadBot(f'{username_prefix}{idx}', MOVEMENT_PATTERNS[pattern](random.Random(rng.random())), rate, report, move_times)
+        for idx in range(bots)
+    ]
+
+    started_at: float = time.perf_counter()
+    # logins are spread over the ramp so the server's accept backlog isn't flooded, and are done before measuring starts
+    report.start_at = started_at + ramp + 1
+    report.stop_at = report.start_at + duration
+    await asyncio.gather(*(
+        load_bot.run(host, port, started_at + ramp * idx / bots)
+        for idx, load_bot in enumerate(load_bots)
+    ))
+    return report.summary(bots, duration, rate)
+
+
+if __name__ == '__main__':
+    logger = logging.getLogger(LOAD_TEST_NAME)
+    logger.setLevel(logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description='A headless load generator that plays Octothorpe with many bots and reports latency, throughput and errors')
+    parser.add_argument('--port', metavar='p', type=int, help='server port',
+                        choices=range(1024, 65535), default=DEFAULT_SERVER_PORT, required=False)
+    parser.add_argument('--host', metavar='h', type=str,
+                        help='server host', default=DEFAULT_SERVER_HOST, required=False)
+    parser.add_argument('--bots', metavar='n', type=int, help='number of bots, each on its own connection and logged in as its own user',
+                        default=10, required=False)
+    parser.add_argument('--pattern', metavar='m', help='how bots move: random walks, following walls, or walking to the nearest treasure found with cheatmap',
+                        choices=list(MOVEMENT_PATTERNS), default='random', required=False)
+    parser.add_argument('--rate', metavar='r', type=float, help='commands each bot sends per second (0 sends the next command once the last one is answered)',
+                        default=5, required=False)
+    parser.add_argument('--duration', metavar='d', type=float, help='seconds to measure for, once every bot has logged in',
+                        default=30, required=False)
+    parser.add_argument('--ramp', metavar='u', type=float, help='seconds to spread the bot connections and logins over',
+                        default=1, required=False)
+    parser.add_argument('--username_prefix', metavar='b', type=str, help='bots log in as this prefix followed by their number',
+                        default='bot', required=False)
+    parser.add_argument('--seed', metavar='s', type=int, help='seed for the bots\' movement, for repeatable runs',
+                        default=None, required=False)
+    parser.add_argument('--json', metavar='j', type=str, help='also write the report as JSON to this file (- writes it to stdout instead of the table)',
+                        default=None, required=False)
+    parser.add_argument('--max_p99', metavar='x', type=float, help='exit with status 1 if the p99 move round trip is over this many milliseconds (0 sets no limit)',
+                        default=0, required=False)
+    parser.add_argument('--max_errors', metavar='e', type=int, help='exit with status 1 if there are more errors than this (-1 sets no limit)',
+                        default=-1, required=False)
+
+    args = parser.parse_args()
+    if args.bots <= 0:
+        parser.error('--bots must be at least 1')
+    if args.rate < 0 or args.duration <= 0 or args.ramp < 0:
+        parser.error('--rate and --ramp can\'t be negative, and --duration must be positive')
+
+    summary: dict[str, Any] = asyncio.run(run_load_test(
+        args.host, args.port, args.bots, args.pattern, args.rate, args.duration, args.ramp, args.username_prefix, args.seed
+    ))
+
+    if args.json == '-':
+        print(json.dumps(summary, indent=2))
+    else:
+        print(LoadReport.format_table(summary))
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+
+    failures: list[str] = []
+    move_p99: float = summary['round_trip'].get('move', {}).get('p99_ms', 0)
+    if args.max_p99 and move_p99 > args.max_p99:
+        failures.append(f'p99 move round trip of {move_p99:.2f} ms is over {args.max_p99:g} ms')
+    errors: int = sum(summary['errors'].values())
+    if args.max_errors >= 0 and errors > args.max_errors:
+        failures.append(f'{errors} errors is over {args.max_errors}')
+    if not summary['logged_in']:
+        failures.append('no bot logged in')
+    for failure in failures:
+        logger.error(failure)
+    sys.exit(1 if failures else 0)
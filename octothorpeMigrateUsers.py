@@ -0,0 +1,39 @@
+import argparse
+import logging
+import os
+import sys
+
+from common.models.user import OctothorpeUser
+from constants import DEFAULT_ROOT_PATH, SERVER_NAME
+from server.models.userStore import JsonUserStore, SqliteUserStore
+from server.utils.fileUtils import FileUtils
+
+logging.basicConfig()
+
+if __name__ == '__main__':
+    logger = logging.getLogger(SERVER_NAME)
+    logger.setLevel(logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description='Imports the users of a users.json file into the SQLite user store used by octothorpeServer.py --user_store sqlite')
+    parser.add_argument('--root_path', metavar='r',
+                        help='root directory to game resources', default=DEFAULT_ROOT_PATH, required=False)
+
+    args = parser.parse_args()
+    root_path = args.root_path
+
+    json_filepath: str = FileUtils.get_userstore_filepath(root_path)
+    db_filepath: str = FileUtils.get_userdb_filepath(root_path)
+    if not os.path.exists(json_filepath):
+        logger.error(f'No user data to import at {json_filepath}')
+        sys.exit(1)
+
+    users: list[OctothorpeUser] = [
+        OctothorpeUser(user_id, username, None, score)
+        for user_id, username, score in JsonUserStore(json_filepath).load_users()
+    ]
+    # users already in the database are overwritten by the imported ones, so the import can safely be run again
+    sqlite_user_store = SqliteUserStore(db_filepath)
+    sqlite_user_store.save_users(users)
+    sqlite_user_store.close()
+    logger.info(f'Imported {len(users)} users from {json_filepath} into {db_filepath}')
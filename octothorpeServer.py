@@ -1,16 +1,27 @@
 import argparse
+import asyncio
 import logging
 import signal
 import socket
 import sys
 
 from common.services.serviceManager import ServiceManager
-from constants import DEFAULT_ROOT_PATH, DEFAULT_SERVER_PORT, SERVER_NAME
+from constants import (DEFAULT_ROOT_PATH, DEFAULT_SERVER_PORT,
+                       PROFILE_SECONDS, SERVER_NAME, SLOW_CLIENT_TIMEOUT)
+from server.asyncServerBase import OctothorpeAsyncServer
+from server.multiprocessServerBase import OctothorpeMultiprocessServer
 from server.serverBase import OctothorpeServer
+from server.serverMetricsExporter import ServerMetricsExporter
+from server.serverProfiler import ServerProfiler
 from server.services.serverClientManager import ServerClientManager
 from server.services.serverClientWriterManager import ServerClientWriterManager
+from server.services.serverCommandService import ServerCommandService
 from server.services.serverCoreService import ServerCoreService
 from server.services.serverGameLogicService import ServerGameLogicService
+from server.services.serverInterestManager import ServerInterestManager
+from server.services.serverMetricsService import ServerMetricsService
+from server.services.serverOutputService import (FLUSH_POLICIES,
+                                                 ServerOutputService)
 from server.services.serverUserManager import ServerUserManager
 from server.services.serverWriterService import ServerWriterService
 
@@ -28,18 +39,99 @@ if __name__ == '__main__':
                         choices=range(1024, 65535), default=DEFAULT_SERVER_PORT, required=False)
     parser.add_argument('--root_path', metavar='r',
                         help='root directory to game resources', default=DEFAULT_ROOT_PATH, required=False)
+    parser.add_argument('--engine', metavar='e', help='client I/O engine: one thread per reader/writer or a single asyncio event loop',
+                        choices=['thread', 'asyncio'], default='thread', required=False)
+    parser.add_argument('--tick_rate', metavar='t', type=int, help='send player moves in one batch per client this many times per second (0 sends every move immediately)',
+                        default=0, required=False)
+    parser.add_argument('--aoi_radius', metavar='a', type=int, help='only send player moves to players within this many cells (0 sends every move to every player)',
+                        default=0, required=False)
+    parser.add_argument('--proximity_field', metavar='f', help='precompute the treasures near every map cell, trading memory for faster moves',
+                        choices=['on', 'off'], default='on', required=False)
+    parser.add_argument('--user_store', metavar='s', help='user storage backend: the users.json file or the users.db SQLite database (see octothorpeMigrateUsers.py)',
+                        choices=['json', 'sqlite'], default='json', required=False)
+    parser.add_argument('--user_cache_size', metavar='c', type=int, help='load users on login instead of at startup, keeping up to this many logged-out users cached (0 loads every user at startup)',
+                        default=0, required=False)
+    parser.add_argument('--workers', metavar='w', type=int, help='accept, read and write clients in this many I/O worker processes sharing the port, keeping the game logic in the main process (asyncio engine on Linux only, 0 runs everything in one process)',
+                        default=0, required=False)
+    parser.add_argument('--command_pool', metavar='n', type=int, help='run client commands on a pool of this many threads, keeping each client\'s commands in order (thread engine only, 0 runs them on each client\'s reader thread)',
+                        default=0, required=False)
+    parser.add_argument('--writer_queue_limit', metavar='q', type=int, help='let each client fall at most this many events behind, replacing stale player updates and then dropping informational ones (thread engine only, 0 never drops an event)',
+                        default=0, required=False)
+    parser.add_argument('--writer_buffer_limit', metavar='b', type=int, help='let each client\'s connection hold at most this many unsent bytes, then drop player updates and informational events (asyncio engine only, 0 never drops an event)',
+                        default=0, required=False)
+    parser.add_argument('--slow_client_timeout', metavar='l', type=int, help='disconnect clients that stay at the writer queue or buffer limit for this many seconds',
+                        default=SLOW_CLIENT_TIMEOUT, required=False)
+    parser.add_argument('--flush_policy', metavar='o', help='send each client\'s buffered responses after every event, or only once there are no events left for it (fewer, larger writes)',
+                        choices=FLUSH_POLICIES, default='event', required=False)
+    parser.add_argument('--metrics_port', metavar='m', type=int, help='serve metrics in the Prometheus text format at http://localhost:<port>/metrics (0 serves no metrics)',
+                        default=0, required=False)
+    parser.add_argument('--profile_seconds', metavar='d', type=float, help='on SIGUSR1, dump every thread\'s stack and profile the server for this many seconds, or until the next SIGUSR1 (0 ignores SIGUSR1)',
+                        default=PROFILE_SECONDS, required=False)
 
     args = parser.parse_args()
     port = args.port
     root_path = args.root_path
+    engine = args.engine
+    aoi_radius = args.aoi_radius
+    tick_rate = args.tick_rate
+    proximity_field = args.proximity_field == 'on'
+    user_store = args.user_store
+    user_cache_size = args.user_cache_size
+    workers = args.workers
+    command_pool = args.command_pool
+    writer_queue_limit = args.writer_queue_limit
+    writer_buffer_limit = args.writer_buffer_limit
+    slow_client_timeout = args.slow_client_timeout
+    flush_policy = args.flush_policy
+    metrics_port = args.metrics_port
+    profile_seconds = args.profile_seconds
+    if command_pool and engine != 'thread':
+        parser.error('--command_pool requires --engine thread')
+    if writer_queue_limit and engine != 'thread':
+        parser.error('--writer_queue_limit requires --engine thread')
+    if writer_buffer_limit and engine != 'asyncio':
+        parser.error('--writer_buffer_limit requires --engine asyncio')
+    if workers and engine != 'asyncio':
+        parser.error('--workers requires --engine asyncio')
+    if workers and not hasattr(socket, 'SO_REUSEPORT'):
+        parser.error('--workers requires SO_REUSEPORT, which this platform does not support')
 
     service_manager = ServiceManager()
     service_manager.register(ServerCoreService, root_path=root_path)
     service_manager.register(ServerClientManager)
-    service_manager.register(ServerWriterService)
-    service_manager.register(ServerGameLogicService, service_manager=service_manager)
-    service_manager.register(ServerUserManager, service_manager=service_manager)
-    service_manager.register(ServerClientWriterManager, service_manager=service_manager)
+    service_manager.register(ServerMetricsService, service_manager=service_manager)
+    service_manager.register(ServerWriterService, tick_rate=tick_rate)
+    service_manager.register(ServerInterestManager, radius=aoi_radius)
+    service_manager.register(ServerGameLogicService, service_manager=service_manager, proximity_field=proximity_field)
+    service_manager.register(ServerUserManager, service_manager=service_manager, user_store=user_store, user_cache_size=user_cache_size)
+    service_manager.register(ServerClientWriterManager, service_manager=service_manager, queue_limit=writer_queue_limit, slow_timeout=slow_client_timeout, buffer_limit=writer_buffer_limit)
+    service_manager.register(ServerCommandService, pool_size=command_pool)
+    service_manager.register(ServerOutputService, flush_policy=flush_policy)
+
+    if metrics_port:
+        metrics_exporter = ServerMetricsExporter(service_manager, host, metrics_port)
+        if not metrics_exporter.start():
+            sys.exit()
+
+    if profile_seconds and hasattr(signal, 'SIGUSR1'):
+        # SIGUSR1 isn't available in Windows environments
+        server_profiler = ServerProfiler(service_manager, profile_seconds)
+        signal.signal(signal.SIGUSR1, server_profiler.sh_profile)
+
+    if engine == 'asyncio':
+        if workers:
+            octothorpe_async_server = OctothorpeMultiprocessServer(service_manager, workers)
+        else:
+            octothorpe_async_server = OctothorpeAsyncServer(service_manager)
+
+        signal.signal(signal.SIGINT, octothorpe_async_server.sh_shutdown)
+        signal.signal(signal.SIGTERM, octothorpe_async_server.sh_shutdown)
+        if sys.platform == 'win32' and hasattr(signal, 'SIGBREAK'):
+            # SIGBREAK is only available in Windows environments
+            signal.signal(signal.SIGBREAK, octothorpe_async_server.sh_shutdown)
+
+        asyncio.run(octothorpe_async_server.serve(host, port))
+        sys.exit()
 
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         try:
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import sys
+import traceback
+from types import FrameType
+from typing import Any, cast
+
+import server.models.serverWriterEvent as swe
+from common.services.serviceManager import ServiceManager
+from constants import (SERVER_NAME, SLOW_CLIENT_CHECK_INTERVAL,
+                       USER_AUTOSAVE_INTERVAL)
+from server.asyncServerClientReader import OctothorpeAsyncServerClientReader
+from server.models.asyncServerClientConnection import \
+    AsyncServerClientConnection
+from server.serverEventPump import ServerEventPump
+from server.services.serverClientManager import ServerClientManager
+from server.services.serverClientWriterManager import ServerClientWriterManager
+from server.services.serverCoreService import ServerCoreService
+from server.services.serverOutputService import ServerOutputService
+from server.services.serverUserManager import ServerUserManager
+from server.services.serverWriterService import ServerWriterService
+
+logger = logging.getLogger(SERVER_NAME)
+logger.setLevel(logging.INFO)
+
+
+class OctothorpeAsyncServer(object):
+    '''The Async Server is the asyncio counterpart of the Server. Reading, command dispatch and writing for every client run as coroutines on a single event loop.
+
+    The Async Server is created once on the main thread and runs the event loop on that same thread.
+    '''
+    def __init__(self, service_manager: ServiceManager):
+        self.service_manager: ServiceManager = service_manager
+        self.server_core_service: ServerCoreService = service_manager.get_service(ServerCoreService)
+        self.user_manager: ServerUserManager = service_manager.get_service(ServerUserManager)
+        self.client_manager: ServerClientManager = self.service_manager.get_service(ServerClientManager)
+        self.server_client_writer_manager: ServerClientWriterManager = self.service_manager.get_service(ServerClientWriterManager)
+        self.server_writer_service: ServerWriterService = self.service_manager.get_service(ServerWriterService)
+        self.output_service: ServerOutputService = self.service_manager.get_service(ServerOutputService)
+
+        self.event_pump: ServerEventPump = ServerEventPump(self.service_manager)
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.server: asyncio.Server | None = None
+
+    async def serve(self, host: str, port: int) -> None:
+        self.loop = asyncio.get_running_loop()
+        try:
+            self.server = await asyncio.start_server(self.initialize_client, host, port)
+        except OSError:
+            logger.error(f'Bind failed on host {host} for port {port}')
+            sys.exit()
+
+        logger.info(f'Started {SERVER_NAME} on port {port}')
+
+        timers: list[asyncio.Task[None]] = self.start_timers()
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        except asyncio.CancelledError:
+            # the server was closed by sh_shutdown
+            pass
+        for timer in timers:
+            timer.cancel()
+
+    def start_timers(self) -> list[asyncio.Task[None]]:
+        timers: list[asyncio.Task[None]] = [asyncio.create_task(self.start_save_timer())]
+        if self.server_writer_service.tick_rate:
+            timers.append(asyncio.create_task(self.start_tick_timer()))
+        if self.server_client_writer_manager.buffer_limit:
+            timers.append(asyncio.create_task(self.start_slow_client_timer()))
+        return timers
+
+    async def start_save_timer(self) -> None:
+        while True:
+            try:
+                self.user_manager.user_data_save()
+            except Exception:
+                # the users stay dirty, so the next autosave retries them
+                logger.error(f'Failed to save user data: ' + traceback.format_exc())
+            await asyncio.sleep(USER_AUTOSAVE_INTERVAL)
+
+    async def start_tick_timer(self) -> None:
+        loop = asyncio.get_running_loop()
+        interval: float = 1 / self.server_writer_service.tick_rate
+        next_tick: float = loop.time()
+        while True:
+            # ticks are scheduled from a fixed start time so the rate doesn't drift by the time spent handling each tick
+            next_tick += interval
+            await asyncio.sleep(max(0, next_tick - loop.time()))
+            self.server_writer_service.dispatch_event(swe.ServerWriterEventTick())
+            self.pump_events()
+
+    async def start_slow_client_timer(self) -> None:
+        while True:
+            await asyncio.sleep(SLOW_CLIENT_CHECK_INTERVAL)
+            self.server_client_writer_manager.check_slow_clients()
+            # with I/O workers, the aborts only reach the workers once the outboxes are flushed
+            self.pump_events()
+
+    def pump_events(self) -> None:
+        self.event_pump.pump()
+
+    def sh_shutdown(self, signal: int, frame: FrameType | None) -> Any:
+        self.user_manager.user_data_save()
+        self.output_service.log_stats()
+        logger.info('Socket connection closed. Shutting down server...')
+        if self.loop and self.server:
+            # signal handlers can interrupt the event loop at any point, so the server is closed from the loop itself.
+            # The remaining client coroutines are cancelled and logged out once serve() returns
+            self.loop.call_soon_threadsafe(self.server.close)
+        else:
+            sys.exit()
+
+    async def initialize_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        addr: str = writer.get_extra_info('peername')
+        logger.info(f'Incoming client at addr: {addr}')
+
+        # the connection only duck-types the socket methods used to respond to the client
+        conn = cast(Any, AsyncServerClientConnection(writer))
+        client_info = self.client_manager.initialize_client(conn, addr)
+        client_main = OctothorpeAsyncServerClientReader(self.service_manager, client_info, self.event_pump)
+        await client_main.client_handler_async(reader, writer)
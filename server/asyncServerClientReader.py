@@ -0,0 +1,85 @@
+import logging
+import traceback
+from asyncio import StreamReader, StreamWriter
+
+import server.models.serverClientWriterEvent as scwe
+from common.services.serviceManager import ServiceManager
+from common.utils.lineFramer import LineTooLongError
+from constants import SERVER_NAME
+from server.models.serverClient import ServerClient
+from server.serverClientReader import OctothorpeServerClientReader
+from server.serverEventPump import ServerEventPump
+
+logger = logging.getLogger(SERVER_NAME)
+logger.setLevel(logging.INFO)
+
+
+class OctothorpeAsyncServerClientReader(OctothorpeServerClientReader):
+    '''The Async Server Client is the asyncio counterpart of the Server Client. It listens for all input from the client as a coroutine.
+
+    Requests are processed exactly like the threaded Server Client, but any events they create are handled by the Server Event Pump as soon as the request is done instead of by writer threads.
+    '''
+    def __init__(self, service_manager: ServiceManager, client_info: ServerClient, event_pump: ServerEventPump):
+        super().__init__(service_manager, client_info)
+
+        self.event_pump: ServerEventPump = event_pump
+        self.event_pump.register_client(self.client_info)
+
+    async def client_handler_async(self, reader: StreamReader, writer: StreamWriter) -> None:
+        try:
+            self.greet()
+
+            while True:
+                if not await self.cmd_handler_async(reader, writer):
+                    logger.error(f'Client reader for address \'{self.client_info.addr}\' has stopped')
+                    break
+
+        except (ConnectionAbortedError, ConnectionResetError):
+            logger.error(f'Client unexpectedly disconnected at address {self.client_info.addr}')
+        except Exception:
+            logger.error(f'Internal Exception: ' + traceback.format_exc())
+            self.client_writer_service.dispatch_event(
+                scwe.ServerClientWriterEventServerError('We experienced a critical internal error. Please contact chrisgifford99@gmail.com for support.')
+            )
+        finally:
+            self.logout_handler()
+
+    def greet(self) -> None:
+        self.client_writer_service.dispatch_event(
+            scwe.ServerClientWriterEventSuccess('Please first login using command \'login [username]\'')
+        )
+        self.event_pump.pump()
+
+    def handle_requests(self, incoming_requests: list[str]) -> bool:
+        '''Processes one or more complete requests and sends every response they create. Returns False once the client should be disconnected.'''
+        data_process_result: bool = self.process_requests(incoming_requests)
+        self.event_pump.pump()
+        return data_process_result
+
+    def logout_handler(self) -> None:
+        self.client_writer_service.dispatch_event(scwe.ServerClientWriterEventLogout())
+        # the logout broadcast needs the user to still be logged in, so it must be sent before the user manager logs them out
+        self.event_pump.pump()
+        self.user_manager.logout_user(self.client_info.client_id)
+        self.event_pump.unregister_client(self.client_info.client_id)
+
+    async def cmd_handler_async(self, reader: StreamReader, writer: StreamWriter) -> bool:
+        # read until at least one complete request has arrived
+        while True:
+            chunk: bytes = await reader.read(1024)
+            if not chunk:
+                return False
+
+            self.echo_backspaces(self.line_framer.feed(chunk))
+            try:
+                incoming_requests: list[str] = self.line_framer.lines()
+            except LineTooLongError as ex:
+                self.client_writer_service.dispatch_event(scwe.ServerClientWriterEventUserError(str(ex)))
+                return False
+            if incoming_requests:
+                break
+
+        data_process_result: bool = self.handle_requests(incoming_requests)
+        # let the transport flush before reading this client's next request
+        await writer.drain()
+        return data_process_result
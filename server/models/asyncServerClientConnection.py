@@ -0,0 +1,26 @@
+from asyncio import StreamWriter
+
+
+class AsyncServerClientConnection():
+    '''Adapts an asyncio StreamWriter to the subset of the socket interface used by the Server Client Writer, so the same response code can be used with either engine.
+
+    Writes are buffered by the event loop's transport and never block the calling coroutine, so the bytes still in that buffer are reported as the connection's backlog.
+    '''
+    def __init__(self, writer: StreamWriter) -> None:
+        self.writer: StreamWriter = writer
+
+    def sendall(self, data: bytes) -> None:
+        if self.writer.is_closing():
+            raise ConnectionAbortedError('Connection is closed')
+        self.writer.write(data)
+
+    def close(self) -> None:
+        self.writer.close()
+
+    def shutdown(self, how: int) -> None:
+        # a slow client may never read what's left in the buffer, so the connection is aborted rather than closed after a flush.
+        # The reader then sees the end of the stream and logs the client out as usual
+        self.writer.transport.abort()
+
+    def backlog(self) -> int:
+        return self.writer.transport.get_write_buffer_size()
@@ -1,9 +1,12 @@
 import uuid
 from socket import socket
 
+from common.models.protocol import ProtocolEnum
+
 
 class ServerClient():
     def __init__(self, conn: socket, addr: str) -> None:
         self.client_id = str(uuid.uuid4())
         self.conn: socket = conn
-        self.addr: str = addr
\ No newline at end of file
+        self.addr: str = addr
+        self.protocol: ProtocolEnum = ProtocolEnum.TEXT # only changed by the client's writer, which is the only one encoding responses for it
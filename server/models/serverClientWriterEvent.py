@@ -3,6 +3,8 @@ from enum import Enum, auto
 from common.models.comprehensiveSearchEnum import ComprehensiveSearchEnum
 from common.models.game.direction import Direction
 from common.models.game.treasure import Treasure
+from common.models.protocol import ProtocolEnum
+from server.models.serverFrame import ServerFrame
 
 
 class ServerClientWriterEventEnum(Enum, metaclass=ComprehensiveSearchEnum):
@@ -11,16 +13,21 @@ class ServerClientWriterEventEnum(Enum, metaclass=ComprehensiveSearchEnum):
     MOVE = auto()
     MAP = auto()
     CHEATMAP = auto()
+    VIEW = auto()
     TREASURE_FOUND = auto()
     TREASURE_NEARBY = auto()
     INFO = auto()
     TREASURE_INFO = auto()
+    BROADCAST = auto()
+    PROTOCOL = auto()
     SUCCESS = auto()
     USER_ERROR = auto()
     SERVER_ERROR = auto()
 
 
 class ServerClientWriterEventBase():
+    droppable: bool = False # informational events may be dropped once the client's writer queue is full
+
     def __init__(self, key: ServerClientWriterEventEnum) -> None:
         self.key = key
 
@@ -51,6 +58,12 @@ class ServerClientWriterEventCheatmap(ServerClientWriterEventBase):
         super().__init__(ServerClientWriterEventEnum.CHEATMAP)
 
 
+class ServerClientWriterEventView(ServerClientWriterEventBase):
+    def __init__(self, full_view: bool):
+        super().__init__(ServerClientWriterEventEnum.VIEW)
+        self.full_view = full_view
+
+
 class ServerClientWriterEventTreasureFound(ServerClientWriterEventBase):
     def __init__(self, treasure: Treasure):
         super().__init__(ServerClientWriterEventEnum.TREASURE_FOUND)
@@ -58,23 +71,46 @@ class ServerClientWriterEventTreasureFound(ServerClientWriterEventBase):
 
 
 class ServerClientWriterEventTreasureNearby(ServerClientWriterEventBase):
+    droppable: bool = True
+
     def __init__(self, treasure: Treasure):
         super().__init__(ServerClientWriterEventEnum.TREASURE_NEARBY)
         self.treasure = treasure
 
 
 class ServerClientWriterEventInfo(ServerClientWriterEventBase):
+    droppable: bool = True
+
     def __init__(self, msg: str):
         super().__init__(ServerClientWriterEventEnum.INFO)
         self.msg = msg
 
 
 class ServerClientWriterEventTreasureInfo(ServerClientWriterEventBase):
+    droppable: bool = True
+
     def __init__(self, msg: str):
         super().__init__(ServerClientWriterEventEnum.TREASURE_INFO)
         self.msg = msg
 
 
+class ServerClientWriterEventBroadcast(ServerClientWriterEventBase):
+    '''Carries a response that is encoded at most once per protocol. One instance is shared by every recipient of a server-wide event.
+
+    Only a player's plain position update can be dropped, as the next update repairs it. Joins, logouts, treasure updates, players leaving the view and batches are always queued.
+    '''
+    def __init__(self, frame: ServerFrame):
+        super().__init__(ServerClientWriterEventEnum.BROADCAST)
+        self.frame = frame
+        self.droppable: bool = frame.position_of is not None
+
+
+class ServerClientWriterEventProtocol(ServerClientWriterEventBase):
+    def __init__(self, protocol: ProtocolEnum):
+        super().__init__(ServerClientWriterEventEnum.PROTOCOL)
+        self.protocol = protocol
+
+
 class ServerClientWriterEventSuccess(ServerClientWriterEventBase):
     def __init__(self, msg: str):
         super().__init__(ServerClientWriterEventEnum.SUCCESS)
@@ -0,0 +1,109 @@
+import threading
+import time
+from typing import Any
+
+from common.utils.eventQueue import EventQueue
+from server.models.serverClientWriterEvent import (
+    ServerClientWriterEventBase, ServerClientWriterEventBroadcast)
+
+
+class ServerClientWriterQueue(EventQueue[ServerClientWriterEventBase]):
+    '''An Event Queue for a client writer that holds a bounded backlog, for clients that read slower than the server writes to them.
+
+    A player's position update replaces the update for the same player still waiting in the queue, so the client only gets the latest one. Any other frame about that player is queued after it, in order.
+    Once the limit is reached, informational events (players' position updates and treasure hints) are dropped. Control events, such as the responses to the client's own requests, players joining, leaving
+    or going out of view and treasure updates, are always queued.
+    check_slow() finds a queue that stayed at its limit for longer than the timeout, whether or not events are still arriving.
+    '''
+    def __init__(self, limit: int, slow_timeout: float) -> None:
+        super().__init__()
+        self.limit: int = limit
+        self.slow_timeout: float = slow_timeout # in seconds
+
+        self.lock: threading.Lock = threading.Lock()
+        self.depth: int = 0 # events waiting in the queue
+        self.pending_updates: dict[int, list[Any]] = {} # queued slots of position updates that can still be replaced (key: player id)
+        self.full_since: float | None = None # when the queue last reached its limit, on the time.perf_counter() clock
+        self.slow: bool = False
+
+        self.peak_depth: int = 0
+        self.coalesced: int = 0
+        self.dropped: int = 0
+
+    def qsize(self) -> int:
+        return self.depth
+
+    def put(self, event: ServerClientWriterEventBase) -> None:
+        with self.lock:
+            self.enqueue(event)
+
+    def enqueue(self, event: ServerClientWriterEventBase) -> None:
+        '''Queues, replaces or drops the event. Must be called with the lock held.'''
+        position_of: int | None = None
+        players: tuple[tuple[int, str], ...] = ()
+        if isinstance(event, ServerClientWriterEventBroadcast):
+            position_of = event.frame.position_of
+            players = event.frame.players
+
+        if position_of is not None:
+            pending_slot: list[Any] | None = self.pending_updates.get(position_of)
+            if pending_slot is not None:
+                # the client hasn't been sent the stale update yet, so the latest one takes its place
+                pending_slot[1] = event
+                self.coalesced += 1
+                return
+        for player_id, _ in players:
+            # a later update must not jump ahead of this frame
+            self.pending_updates.pop(player_id, None)
+
+        if self.depth >= self.limit and event.droppable:
+            self.dropped += 1
+            return
+
+        # a slot is a mutable [enqueued_at, event, position_of], so a waiting update can be replaced in place
+        slot: list[Any] = [time.perf_counter(), event, position_of]
+        if position_of is not None:
+            self.pending_updates[position_of] = slot
+        self.depth += 1
+        if self.depth > self.peak_depth:
+            self.peak_depth = self.depth
+        if self.depth >= self.limit and self.full_since is None:
+            self.full_since = slot[0]
+        self._queue.put(slot) # pyright: ignore[reportArgumentType]
+
+    def check_slow(self) -> bool:
+        '''Returns True the first time the queue is found to have stayed at its limit for longer than the timeout.'''
+        with self.lock:
+            if self.slow or self.full_since is None or time.perf_counter() - self.full_since < self.slow_timeout:
+                return False
+            self.slow = True
+            return True
+
+    def get(self, block: bool = True, timeout: float | None = None) -> ServerClientWriterEventBase | None:
+        item = self._queue.get(block, timeout)
+        if item is None:
+            # keep the sentinel in place so every consumer of a closed queue wakes up
+            self._queue.put(None)
+            return None
+
+        slot: list[Any] = item # pyright: ignore[reportAssignmentType]
+        with self.lock:
+            enqueued_at, event, position_of = slot
+            if position_of is not None and self.pending_updates.get(position_of) is slot:
+                del self.pending_updates[position_of]
+            self.depth -= 1
+            if self.depth < self.limit:
+                self.full_since = None
+        self.last_enqueued_at = enqueued_at
+        self.stats.record(time.perf_counter() - enqueued_at)
+        return event
+
+    def queue_stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                'depth': self.depth,
+                'peak_depth': self.peak_depth,
+                'coalesced': self.coalesced,
+                'dropped': self.dropped,
+                'slow': int(self.slow)
+            }
@@ -0,0 +1,52 @@
+from typing import Any, Callable, Iterable
+
+# a command handler, called with the object that runs it (the Server Client or its Game Logic) and the request's lowercase tokens. Returns False once the client should be disconnected
+CommandHandler = Callable[[Any, list[str]], bool]
+
+
+class ServerCommand(object):
+    '''A command a client can send, with the arguments it accepts.
+
+    A request whose argument count isn't in num_args, or whose argument at some position isn't one of that position's choices, is answered with the usage message instead of reaching the handler.
+    '''
+    def __init__(self, name: str, handler: CommandHandler, usage: str = '', num_args: Iterable[int] | None = None,
+                 choices: dict[int, Iterable[str]] | None = None, requires_login: bool = False, hidden: bool = False, disconnect_on_usage: bool = False,
+                 logged_in_error: str | None = None) -> None:
+        self.name: str = name
+        self.handler: CommandHandler = handler
+        self.usage: str = usage
+        self.num_args: frozenset[int] | None = frozenset(num_args) if num_args is not None else None # None accepts any number of arguments
+        self.choices: dict[int, frozenset[str]] = {position: frozenset(values) for position, values in (choices or {}).items()} # (key: argument position, from 1)
+        self.requires_login: bool = requires_login # run by the client's Game Logic, which only exists once the client is logged in
+        self.hidden: bool = hidden # left out of the allowed operations shown to the client
+        self.disconnect_on_usage: bool = disconnect_on_usage # whether a request with invalid arguments ends the session, like any other failed login
+        self.logged_in_error: str | None = logged_in_error # sent instead of checking the arguments and running the command once the client is logged in
+
+    def accepts(self, command_agg: list[str]) -> bool:
+        if self.num_args is not None and len(command_agg) - 1 not in self.num_args:
+            return False
+        for position, values in self.choices.items():
+            if position < len(command_agg) and command_agg[position] not in values:
+                return False
+        return True
+
+
+class ServerCommandRegistry(object):
+    '''Every command a client can send, keyed by name, with the error messages that list them built once.'''
+    def __init__(self, commands: Iterable[ServerCommand]) -> None:
+        self.commands: dict[str, ServerCommand] = {command.name: command for command in commands}
+
+        # the operations a client may use only depend on whether it's logged in (key: logged in)
+        self.allowed_operations: dict[bool, str] = {}
+        for logged_in in [False, True]:
+            allowed: list[str] = [
+                command.name for command in self.commands.values()
+                if not command.hidden and (logged_in or not command.requires_login)
+            ]
+            self.allowed_operations[logged_in] = f'Allowed operations: [{",".join(allowed)}]'
+
+    def get(self, name: str) -> ServerCommand | None:
+        return self.commands.get(name)
+
+    def invalid_operation(self, operation: str, logged_in: bool) -> str:
+        return f'Invalid operation \'{operation}\'. {self.allowed_operations[logged_in]}'
@@ -0,0 +1,36 @@
+from typing import Callable
+
+from common.models.protocol import ProtocolEnum
+
+
+class ServerFrame(object):
+    '''A response to the client in every wire protocol. Each encoding is only built once, the first time a client using that protocol needs it, so one frame can be shared by every recipient of a broadcast.
+
+    A frame made by batch() holds several frames that are sent together in a single write.
+    '''
+    def __init__(self, text: Callable[[], str] | None = None, binary: Callable[[], bytes] | None = None, players: tuple[tuple[int, str], ...] = (), frames: tuple['ServerFrame', ...] = (),
+                 position_of: int | None = None) -> None:
+        self.text: Callable[[], str] | None = text # builds the full text response, without the trailing '\r\n'
+        self.binary: Callable[[], bytes] | None = binary # builds the full binary record
+        self.players: tuple[tuple[int, str], ...] = players # (player id, username) of every player the frame refers to
+        self.frames: tuple[ServerFrame, ...] = frames
+        self.position_of: int | None = position_of # the player id, if the frame is only that player's latest position and score, which a later one replaces
+        self.encoded: dict[ProtocolEnum, bytes] = {}
+
+    @staticmethod
+    def batch(frames: list['ServerFrame']) -> 'ServerFrame':
+        players: tuple[tuple[int, str], ...] = tuple(player for frame in frames for player in frame.players)
+        return ServerFrame(players=players, frames=tuple(frames))
+
+    def encode(self, protocol: ProtocolEnum) -> bytes:
+        encoded: bytes | None = self.encoded.get(protocol)
+        if encoded is None:
+            if self.frames:
+                encoded = b''.join(frame.encode(protocol) for frame in self.frames)
+            elif protocol == ProtocolEnum.BINARY:
+                encoded = self.binary() if self.binary else b''
+            else:
+                encoded = f'{self.text()}\r\n'.encode('utf-8') if self.text else b''
+            # concurrent writers may both encode a frame the first time, which is harmless as both get the same bytes
+            self.encoded[protocol] = encoded
+        return encoded
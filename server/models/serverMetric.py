@@ -0,0 +1,92 @@
+import bisect
+import threading
+
+# in seconds, from a tenth of a millisecond to 10 seconds
+LATENCY_BUCKETS: tuple[float, ...] = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+INF_BUCKET: str = 'le="+Inf"'
+
+
+def label_text(label: str | None, value: str, extra: str = '') -> str:
+    '''Returns the label set of a sample in the Prometheus text format, e.g. {event="MOVE"}.'''
+    labels: list[str] = []
+    if label:
+        escaped: str = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        labels.append(f'{label}="{escaped}"')
+    if extra:
+        labels.append(extra)
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+
+class MetricCounter(object):
+    '''A counter that only goes up, with one series per value of its label (or a single series without a label).
+
+    Increments take a lock, as a read-modify-write of a dict value can be interrupted between threads.
+    '''
+    def __init__(self, name: str, description: str, label: str | None = None) -> None:
+        self.name: str = name
+        self.description: str = description
+        self.label: str | None = label
+
+        self.lock: threading.Lock = threading.Lock()
+        self.series: dict[str, int] = {} # (key: label value)
+
+    def inc(self, value: str = '', amount: int = 1) -> None:
+        with self.lock:
+            self.series[value] = self.series.get(value, 0) + amount
+
+    def render(self, lines: list[str]) -> None:
+        lines.append(f'# HELP {self.name} {self.description}')
+        lines.append(f'# TYPE {self.name} counter')
+        with self.lock:
+            series: list[tuple[str, int]] = sorted(self.series.items())
+        for value, total in series:
+            lines.append(f'{self.name}{label_text(self.label, value)} {total}')
+
+
+class MetricHistogram(object):
+    '''A histogram of observed values, with one series per value of its label (or a single series without a label).
+
+    An observation is a binary search of the bucket bounds and two increments, so it can be recorded on every event.
+    Counts are kept per bucket and only added up into the cumulative Prometheus buckets when rendered.
+    '''
+    def __init__(self, name: str, description: str, label: str | None = None, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.name: str = name
+        self.description: str = description
+        self.label: str | None = label
+        self.buckets: tuple[float, ...] = buckets
+
+        self.lock: threading.Lock = threading.Lock()
+        self.series: dict[str, tuple[list[int], list[float]]] = {} # (key: label value, val: (count per bucket and one over the last bound, [sum]))
+
+    def observe(self, value: float, label_value: str = '') -> None:
+        idx: int = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series: tuple[list[int], list[float]] | None = self.series.get(label_value)
+            if series is None:
+                series = self.series[label_value] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][idx] += 1
+            series[1][0] += value
+
+    def render(self, lines: list[str]) -> None:
+        lines.append(f'# HELP {self.name} {self.description}')
+        lines.append(f'# TYPE {self.name} histogram')
+        with self.lock:
+            series: list[tuple[str, list[int], float]] = sorted((value, list(counts), total[0]) for value, (counts, total) in self.series.items())
+        for value, counts, total in series:
+            cumulative: int = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le: str = f'le="{bound:g}"'
+                lines.append(f'{self.name}_bucket{label_text(self.label, value, le)} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{label_text(self.label, value, INF_BUCKET)} {cumulative}')
+            lines.append(f'{self.name}_sum{label_text(self.label, value)} {total}')
+            lines.append(f'{self.name}_count{label_text(self.label, value)} {cumulative}')
+
+
+def render_samples(lines: list[str], name: str, metric_type: str, description: str, label: str | None, samples: list[tuple[str, float]]) -> None:
+    '''Renders a metric whose values are read when rendered, such as a gauge, as (label value, value) samples.'''
+    lines.append(f'# HELP {name} {description}')
+    lines.append(f'# TYPE {name} {metric_type}')
+    for value, sample in samples:
+        lines.append(f'{name}{label_text(label, value)} {sample}')
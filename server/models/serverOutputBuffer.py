@@ -0,0 +1,81 @@
+import socket
+from typing import Any, Callable
+
+from constants import MAX_SENDMSG_BUFFERS
+
+# called after every flush with the number of events, syscalls and bytes sent since the previous one
+FlushRecorder = Callable[[int, int, int], None]
+
+
+class ServerOutputBuffer(object):
+    '''Collects every response written for one client and sends them to its connection in as few calls as possible.
+
+    A real socket is written with sendmsg, which hands the kernel all the buffered responses in one call without joining them first, and resumes after a partial write.
+    The connections of the asyncio engine and the I/O workers aren't sockets, so they get a single sendall of the joined responses.
+    Only the client's writer may use its buffer.
+    '''
+    def __init__(self, conn: Any, flush_bytes: int, flush_after_event: bool, recorder: FlushRecorder) -> None:
+        self.conn: Any = conn
+        self.flush_bytes: int = flush_bytes # a buffer holding this many bytes is flushed right away
+        self.flush_after_event: bool = flush_after_event # otherwise the writer flushes once it has no events left
+        self.recorder: FlushRecorder = recorder
+        self.use_sendmsg: bool = isinstance(conn, socket.socket) and hasattr(conn, 'sendmsg') # sendmsg isn't available on Windows
+
+        self.chunks: list[bytes] = []
+        self.size: int = 0 # bytes in chunks
+        self.events: int = 0 # events handled since the last flush
+        self.failed: bool = False # set once a write fails. The connection is broken, so later responses are dropped instead of failing one by one
+
+    def write(self, data: bytes) -> None:
+        if not data or self.failed:
+            return
+        self.chunks.append(data)
+        self.size += len(data)
+        if self.size >= self.flush_bytes:
+            self.flush()
+
+    def end_event(self) -> None:
+        '''Marks the end of an event's responses, flushing them if the buffer flushes after every event.'''
+        self.events += 1
+        if self.flush_after_event:
+            self.flush()
+
+    def flush(self) -> None:
+        '''Sends every buffered response. Raises OSError if the connection fails, dropping the responses and every later one.'''
+        if not self.chunks and not self.events:
+            return
+        chunks, size, events = self.chunks, self.size, self.events
+        self.chunks, self.size, self.events = [], 0, 0
+        syscalls: int = 0
+        try:
+            if not chunks:
+                # the events had no responses
+                return
+            if self.use_sendmsg:
+                syscalls = self.sendmsg(chunks)
+            else:
+                self.conn.sendall(chunks[0] if len(chunks) == 1 else b''.join(chunks))
+                syscalls = 1
+        except OSError:
+            self.failed = True
+            raise
+        finally:
+            self.recorder(events, syscalls, size if syscalls else 0)
+
+    def sendmsg(self, chunks: list[bytes]) -> int:
+        '''Sends the chunks in order and returns the number of sendmsg calls it took.'''
+        pending: list[bytes | memoryview] = list(chunks)
+        syscalls: int = 0
+        while pending:
+            batch: list[bytes | memoryview] = pending[:MAX_SENDMSG_BUFFERS]
+            sent: int = self.conn.sendmsg(batch)
+            syscalls += 1
+            # drop the chunks that were sent whole, then the part of the next chunk that was sent
+            idx: int = 0
+            while idx < len(batch) and sent >= len(batch[idx]):
+                sent -= len(batch[idx])
+                idx += 1
+            pending = pending[idx:]
+            if sent:
+                pending[0] = memoryview(pending[0])[sent:]
+        return syscalls
@@ -10,6 +10,8 @@ class ServerWriterEventEnum(Enum, metaclass=ComprehensiveSearchEnum):
     LOGOUT = auto()
     MOVE = auto()
     TREASURE_FOUND = auto()
+    VIEW_CHANGE = auto()
+    TICK = auto()
 
 
 class ServerWriterEventBase():
@@ -18,25 +20,41 @@ class ServerWriterEventBase():
 
 
 class ServerWriterEventLogin(ServerWriterEventBase):
-    def __init__(self, user: OctothorpeUser | None):
+    def __init__(self, user: OctothorpeUser | None, client_id: str | None = None):
         super().__init__(ServerWriterEventEnum.LOGIN)
         self.user = user
+        self.client_id = client_id
 
 
 class ServerWriterEventLogout(ServerWriterEventBase):
-    def __init__(self, user: OctothorpeUser | None):
+    def __init__(self, user: OctothorpeUser | None, client_id: str | None = None):
         super().__init__(ServerWriterEventEnum.LOGOUT)
         self.user = user
+        self.client_id = client_id
 
 
 class ServerWriterEventMove(ServerWriterEventBase):
-    def __init__(self, user: OctothorpeUser | None):
+    def __init__(self, user: OctothorpeUser | None, client_id: str | None = None):
         super().__init__(ServerWriterEventEnum.MOVE)
         self.user = user
+        self.client_id = client_id
 
 
 class ServerWriterEventTreasureFound(ServerWriterEventBase):
     def __init__(self, user: OctothorpeUser | None, treasure: Treasure):
         super().__init__(ServerWriterEventEnum.TREASURE_FOUND)
         self.user = user
-        self.treasure = treasure
\ No newline at end of file
+        self.treasure = treasure
+
+
+class ServerWriterEventViewChange(ServerWriterEventBase):
+    def __init__(self, user: OctothorpeUser | None, client_id: str, full_view: bool):
+        super().__init__(ServerWriterEventEnum.VIEW_CHANGE)
+        self.user = user
+        self.client_id = client_id
+        self.full_view = full_view
+
+
+class ServerWriterEventTick(ServerWriterEventBase):
+    def __init__(self):
+        super().__init__(ServerWriterEventEnum.TICK)
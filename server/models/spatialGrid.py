@@ -0,0 +1,113 @@
+import math
+from typing import Generic, Hashable, Iterator, TypeVar
+
+_K = TypeVar("_K", bound=Hashable)
+
+
+class SpatialGrid(Generic[_K]):
+    '''A uniform grid of square buckets that indexes keys by their (x, y) position.
+
+    A query only visits the buckets overlapping the query box, so its cost depends on how many keys are near the position rather than on how many keys are indexed.
+    '''
+    def __init__(self, cell_size: int) -> None:
+        if cell_size <= 0:
+            raise ValueError(f'cell_size must be positive, got {cell_size}')
+        self.cell_size: int = cell_size
+        self.cells: dict[tuple[int, int], set[_K]] = {}
+        self.positions: dict[_K, tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.positions
+
+    def _cell(self, position: tuple[int, int]) -> tuple[int, int]:
+        return (position[0] // self.cell_size, position[1] // self.cell_size)
+
+    def update(self, key: _K, position: tuple[int, int]) -> None:
+        '''Inserts the key at the given position, or moves it there if it is already indexed.'''
+        old_position: tuple[int, int] | None = self.positions.get(key)
+        self.positions[key] = position
+        new_cell: tuple[int, int] = self._cell(position)
+        if old_position is not None:
+            old_cell: tuple[int, int] = self._cell(old_position)
+            if old_cell == new_cell:
+                return
+            self._discard(old_cell, key)
+        self.cells.setdefault(new_cell, set()).add(key)
+
+    def remove(self, key: _K) -> None:
+        position: tuple[int, int] | None = self.positions.pop(key, None)
+        if position is not None:
+            self._discard(self._cell(position), key)
+
+    def _discard(self, cell: tuple[int, int], key: _K) -> None:
+        bucket: set[_K] | None = self.cells.get(cell)
+        if bucket is None:
+            return
+        bucket.discard(key)
+        if not bucket:
+            del self.cells[cell]
+
+    def query(self, position: tuple[int, int], radius: int) -> Iterator[tuple[_K, tuple[int, int]]]:
+        '''Yields every key, with its position, whose x and y are both within radius of the given position.'''
+        x, y = position
+        min_cx, min_cy = self._cell((x - radius, y - radius))
+        max_cx, max_cy = self._cell((x + radius, y + radius))
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket: set[_K] | None = self.cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for key in bucket:
+                    key_x, key_y = self.positions[key]
+                    if abs(key_x - x) <= radius and abs(key_y - y) <= radius:
+                        yield key, (key_x, key_y)
+
+    def nearest(self, position: tuple[int, int]) -> tuple[_K, tuple[int, int], float] | None:
+        '''Returns the key closest to the given position by euclidean distance, with its position and distance, or None if the grid is empty.
+
+        Buckets are searched in rings of growing size around the position, stopping once no closer key can be found in the next ring.
+        If the rings grow larger than the number of occupied buckets, every bucket is searched instead.
+        '''
+        if not self.positions:
+            return None
+        x, y = position
+        center_cx, center_cy = self._cell(position)
+        best: tuple[_K, tuple[int, int]] | None = None
+        best_dist_sq: int = 0
+        ring: int = 0
+        while True:
+            # every position in a bucket of this ring is at least (ring - 1) full buckets away
+            min_ring_dist: int = max(ring - 1, 0) * self.cell_size
+            if best is not None and min_ring_dist * min_ring_dist > best_dist_sq:
+                break
+            if (2 * ring + 1) ** 2 > len(self.cells):
+                return self._nearest_scan(position)
+            for cell in self._ring(center_cx, center_cy, ring):
+                for key in self.cells.get(cell, ()):
+                    key_x, key_y = self.positions[key]
+                    dist_sq: int = (key_x - x) ** 2 + (key_y - y) ** 2
+                    if best is None or dist_sq < best_dist_sq:
+                        best, best_dist_sq = (key, (key_x, key_y)), dist_sq
+            ring += 1
+        return best[0], best[1], math.sqrt(best_dist_sq)
+
+    def _nearest_scan(self, position: tuple[int, int]) -> tuple[_K, tuple[int, int], float]:
+        x, y = position
+        key, (key_x, key_y) = min(self.positions.items(), key=lambda item: (item[1][0] - x) ** 2 + (item[1][1] - y) ** 2)
+        return key, (key_x, key_y), math.sqrt((key_x - x) ** 2 + (key_y - y) ** 2)
+
+    @staticmethod
+    def _ring(center_cx: int, center_cy: int, ring: int) -> Iterator[tuple[int, int]]:
+        '''Yields the buckets exactly ring buckets away from the center bucket, by chebyshev distance.'''
+        if ring == 0:
+            yield (center_cx, center_cy)
+            return
+        for cx in range(center_cx - ring, center_cx + ring + 1):
+            yield (cx, center_cy - ring)
+            yield (cx, center_cy + ring)
+        for cy in range(center_cy - ring + 1, center_cy + ring):
+            yield (center_cx - ring, cy)
+            yield (center_cx + ring, cy)
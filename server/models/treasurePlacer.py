@@ -0,0 +1,96 @@
+import math
+import random
+import time
+
+from server.models.worldGrid import WorldGrid
+
+
+class TreasurePlacer(object):
+    '''Places treasures on the open floor of a map, keeping every pair of treasures more than min_distance apart.
+
+    The cells that can still take a treasure are tracked in a bytemap the size of the map, which starts out as the map's free cells. Placing a treasure clears the disc of cells around it,
+    so checking a candidate cell is a single index no matter how many treasures were placed.
+    Random cells are tried first, dart-throwing style. Once the attempt budget runs out, the cells that are still free are swept from a random
+    starting cell, so placement always ends and fills the map as far as the constraints allow.
+    '''
+    ATTEMPTS_PER_TREASURE: int = 30
+    # translates open floor to 1 and every other cell, including the spawnpoint, to 0
+    _FREE_TABLE: bytes = bytes(1 if chr(i) == ' ' else 0 for i in range(256))
+
+    def __init__(self, world: WorldGrid, min_distance: float, rng: random.Random | None = None) -> None:
+        self.world: WorldGrid = world
+        self.min_distance: float = min_distance
+        self.rng: random.Random = rng or random.Random()
+
+        # the bytemap is padded by reach unavailable cells on every side, so clearing a disc never needs bounds checks
+        self.reach: int = math.floor(min_distance)
+        self.padded_width: int = world.width + 2 * self.reach
+        padding_rows: bytes = bytes(self.padded_width * self.reach)
+        padding_columns: bytes = bytes(self.reach)
+        self.available: bytearray = bytearray(padding_rows)
+        for y in range(world.height):
+            free_row: bytearray = bytearray(world.row(y).tobytes().translate(TreasurePlacer._FREE_TABLE))
+            # treasures are never placed on the edge of the map
+            if y == 0 or y == world.height - 1:
+                free_row = bytearray(world.width)
+            free_row[0] = free_row[-1] = 0
+            self.available += padding_columns
+            self.available += free_row
+            self.available += padding_columns
+        self.available += padding_rows
+        self.free_cells: int = self.available.count(1)
+
+        # the start and end offset of every row of the disc of cells within min_distance of a treasure, with the zeros that clear it
+        self.disc: list[tuple[int, int, bytes]] = []
+        for dy in range(-self.reach, self.reach + 1):
+            half_width: int = math.floor(math.sqrt(min_distance * min_distance - dy * dy))
+            self.disc.append((dy * self.padded_width - half_width, dy * self.padded_width + half_width + 1, bytes(2 * half_width + 1)))
+
+    def padded_index(self, x: int, y: int) -> int:
+        return (y + self.reach) * self.padded_width + x + self.reach
+
+    def position(self, padded_idx: int) -> tuple[int, int]:
+        y, x = divmod(padded_idx, self.padded_width)
+        return (x - self.reach, y - self.reach)
+
+    def block(self, padded_idx: int) -> None:
+        '''Marks every cell within min_distance of the cell as unavailable.'''
+        available: bytearray = self.available
+        for start, end, zeros in self.disc:
+            available[padded_idx + start:padded_idx + end] = zeros
+
+    def place(self, count: int, max_attempts: int | None = None, time_budget: float | None = None) -> list[tuple[int, int]]:
+        '''Returns up to count positions for new treasures. Fewer are returned if the map runs out of free cells or the time budget runs out.'''
+        if max_attempts is None:
+            max_attempts = count * self.ATTEMPTS_PER_TREASURE
+        deadline: float = time.perf_counter() + time_budget if time_budget is not None else math.inf
+
+        placed: list[tuple[int, int]] = []
+        available: bytearray = self.available
+        num_cells: int = len(available)
+        disc: list[tuple[int, int, bytes]] = self.disc
+        rand = self.rng.random
+        attempts: int = 0
+        while len(placed) < count and attempts < max_attempts:
+            attempts += 1
+            idx: int = int(rand() * num_cells)
+            if available[idx]:
+                placed.append(self.position(idx))
+                # the same as block, inlined since this is the hot loop
+                for start, end, zeros in disc:
+                    available[idx + start:idx + end] = zeros
+            if not attempts % 1024 and time.perf_counter() > deadline:
+                return placed
+
+        if len(placed) < count:
+            idx = available.find(1, int(rand() * num_cells))
+            if idx == -1:
+                idx = available.find(1)
+            while idx != -1 and len(placed) < count:
+                placed.append(self.position(idx))
+                self.block(idx)
+                if not len(placed) % 1024 and time.perf_counter() > deadline:
+                    break
+                next_idx: int = available.find(1, idx)
+                idx = next_idx if next_idx != -1 else available.find(1)
+        return placed
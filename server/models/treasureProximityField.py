@@ -0,0 +1,69 @@
+import bisect
+import math
+import sys
+from typing import Iterator
+
+from common.models.game.treasure import Treasure
+from server.models.worldGrid import WorldGrid
+
+
+class TreasureProximityField(object):
+    '''Maps every passable cell of the map to the treasures within a radius of it, with their distances, ordered by treasure id.
+
+    The field is filled in when treasures are added and updated in place when they are removed, so looking up the treasures near a cell is a single
+    dict lookup on the cell's index. Only the cells that have a treasure nearby are stored.
+    '''
+    def __init__(self, world: WorldGrid, radius: float) -> None:
+        self.world: WorldGrid = world
+        self.radius: float = radius
+        self.cells: dict[int, list[tuple[Treasure, float]]] = {}
+
+        # every offset within the radius, with its distance rounded the same way as ServerGameLogicService.distance_to_treasure
+        reach: int = math.ceil(radius)
+        self.offsets: list[tuple[int, int, float]] = []
+        for dy in range(-reach, reach + 1):
+            for dx in range(-reach, reach + 1):
+                dist: float = round(math.sqrt(dx * dx + dy * dy), 2)
+                if dist < radius:
+                    self.offsets.append((dx, dy, dist))
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def _covered_cells(self, treasure: Treasure) -> Iterator[tuple[int, float]]:
+        tx, ty = treasure.position
+        world: WorldGrid = self.world
+        for dx, dy, dist in self.offsets:
+            x, y = tx + dx, ty + dy
+            if world.is_passable(x, y):
+                yield y * world.width + x, dist
+
+    def add(self, treasure: Treasure) -> None:
+        for idx, dist in self._covered_cells(treasure):
+            entries: list[tuple[Treasure, float]] | None = self.cells.get(idx)
+            if entries is None:
+                self.cells[idx] = [(treasure, dist)]
+            else:
+                bisect.insort(entries, (treasure, dist), key=lambda entry: entry[0].id)
+
+    def remove(self, treasure: Treasure) -> None:
+        for idx, _ in self._covered_cells(treasure):
+            entries: list[tuple[Treasure, float]] | None = self.cells.get(idx)
+            if entries is None:
+                continue
+            entries[:] = [entry for entry in entries if entry[0] is not treasure]
+            if not entries:
+                del self.cells[idx]
+
+    def lookup(self, position: tuple[int, int]) -> list[tuple[Treasure, float]]:
+        x, y = position
+        if not self.world.in_bounds(x, y):
+            return []
+        return self.cells.get(y * self.world.width + x, [])
+
+    def memory_usage(self) -> int:
+        '''Returns the approximate number of bytes used by the field, not counting the treasures themselves.'''
+        total: int = sys.getsizeof(self.cells)
+        for entries in self.cells.values():
+            total += sys.getsizeof(entries) + sum(sys.getsizeof(entry) for entry in entries)
+        return total
@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Iterable
+
+from common.models.user import OctothorpeUser
+
+# a stored user, as (user_id, username, score)
+StoredUser = tuple[str, str, int]
+
+
+class UserStoreBase(ABC):
+    '''Persists the users known to the server. Only the username and score of a user are stored.'''
+    @abstractmethod
+    def load_users(self) -> list[StoredUser]:
+        '''Returns every stored user.'''
+
+    @abstractmethod
+    def load_user_by_username(self, username: str) -> StoredUser | None:
+        '''Returns the stored user with the username, or None. If more than one user has it, the last one stored is returned.'''
+
+    @abstractmethod
+    def save_users(self, users: Iterable[OctothorpeUser]) -> None:
+        '''Inserts or updates the given users. Users that aren't given are left as they are.'''
+
+    def close(self) -> None:
+        pass
+
+
+class JsonUserStore(UserStoreBase):
+    '''Stores every user in a single JSON file, which is rewritten as a whole on each save.
+
+    Looking a user up by username reads the whole file the first time, so loading users lazily only pays off with the SQLite store.
+    '''
+    def __init__(self, filepath: str) -> None:
+        self.filepath: str = filepath
+        self.lock: threading.RLock = threading.RLock()
+        self.records: dict[str, dict[str, Any]] = {} # the file's contents (key: user_id)
+        self.loaded: bool = False
+        self.user_ids_by_username: dict[str, str] | None = None # built on the first lookup by username
+
+    def load_users(self) -> list[StoredUser]:
+        with self.lock:
+            self.loaded = True
+            if not os.path.exists(self.filepath):
+                return []
+            with open(self.filepath, 'r', encoding='utf-8') as user_f:
+                serializable_users: dict[str, Any] = json.load(user_f)
+            self.records = serializable_users
+            return [
+                (user_id, str(serializable_user['username']), int(serializable_user['score']))
+                for user_id, serializable_user in serializable_users.items()
+            ]
+
+    def load_user_by_username(self, username: str) -> StoredUser | None:
+        with self.lock:
+            if self.user_ids_by_username is None:
+                if not self.loaded:
+                    self.load_users()
+                self.user_ids_by_username = {str(record['username']): user_id for user_id, record in self.records.items()}
+            user_id: str | None = self.user_ids_by_username.get(username)
+            if user_id is None:
+                return None
+            record: dict[str, Any] = self.records[user_id]
+            return (user_id, str(record['username']), int(record['score']))
+
+    def save_users(self, users: Iterable[OctothorpeUser]) -> None:
+        with self.lock:
+            if not self.loaded:
+                # the file is rewritten as a whole, so the users that weren't loaded yet must be kept
+                self.load_users()
+            for user in users:
+                self.records[user.user_id] = {
+                    'username': user.username,
+                    'score': user.score
+                }
+                if self.user_ids_by_username is not None:
+                    self.user_ids_by_username[user.username] = user.user_id
+            with open(self.filepath, 'w', encoding='utf-8') as user_f:
+                json.dump(self.records, user_f)
+
+
+class SqliteUserStore(UserStoreBase):
+    '''Stores users in a SQLite database in WAL mode. Each save upserts only the given users, in a single transaction.'''
+    def __init__(self, filepath: str) -> None:
+        self.filepath: str = filepath
+        self.lock: threading.RLock = threading.RLock()
+        # the connection is shared by the autosave timer and the client threads, which take turns through the lock
+        self.conn: sqlite3.Connection = sqlite3.connect(filepath, check_same_thread=False)
+        with self.lock:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            # with WAL, NORMAL only risks losing the last transactions on power loss, never corrupting the database
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            with self.conn:
+                self.conn.execute('CREATE TABLE IF NOT EXISTS users (user_id TEXT PRIMARY KEY, username TEXT NOT NULL, score INTEGER NOT NULL)')
+                self.conn.execute('CREATE INDEX IF NOT EXISTS users_username ON users (username)')
+
+    def load_users(self) -> list[StoredUser]:
+        with self.lock:
+            return self.conn.execute('SELECT user_id, username, score FROM users').fetchall()
+
+    def load_user_by_username(self, username: str) -> StoredUser | None:
+        with self.lock:
+            return self.conn.execute(
+                'SELECT user_id, username, score FROM users WHERE username = ? ORDER BY rowid DESC LIMIT 1', (username,)
+            ).fetchone()
+
+    def save_users(self, users: Iterable[OctothorpeUser]) -> None:
+        rows: list[StoredUser] = [(user.user_id, user.username, user.score) for user in users]
+        if not rows:
+            return
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'INSERT INTO users (user_id, username, score) VALUES (?, ?, ?) '
+                'ON CONFLICT (user_id) DO UPDATE SET username = excluded.username, score = excluded.score',
+                rows
+            )
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,34 @@
+# a batch of writes for the clients of one I/O worker, as (conn_id, data) pairs in order. A data of None closes the connection and an empty data aborts it, dropping what it hasn't sent yet
+WorkerOutbox = list[tuple[int, bytes | None]]
+
+
+class WorkerServerClientConnection():
+    '''Stands in for the socket of a client connected to an I/O worker process, duck-typing the subset of the socket interface used by the Server Client Writer.
+
+    Writes are appended to the outbox of the client's worker, which the Multiprocess Server sends to the worker in one batch once the events of the current request are handled.
+    The worker reports the bytes it holds unsent for the client whenever they cross the buffer limit, and the last report is the connection's backlog.
+    '''
+    def __init__(self, outbox: WorkerOutbox, conn_id: int) -> None:
+        self.outbox: WorkerOutbox = outbox
+        self.conn_id: int = conn_id
+        self.closed: bool = False
+        self.backlog_bytes: int = 0 # set by the Multiprocess Server from the worker's reports
+
+    def sendall(self, data: bytes) -> None:
+        if self.closed:
+            raise ConnectionAbortedError('Connection is closed')
+        if data:
+            self.outbox.append((self.conn_id, bytes(data)))
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.outbox.append((self.conn_id, None))
+
+    def shutdown(self, how: int) -> None:
+        # the worker aborts the connection and reports the client as gone, like a client that disconnected
+        if not self.closed:
+            self.outbox.append((self.conn_id, b''))
+
+    def backlog(self) -> int:
+        return self.backlog_bytes
@@ -0,0 +1,100 @@
+from typing import Iterable, Iterator
+
+
+class WorldGrid(object):
+    '''The game map, stored as one contiguous bytearray with one byte per cell in row-major order.
+
+    A passability map with one byte per cell is built once when the grid is created, so checking whether a player can stand on a cell is a single index.
+    Rows are exposed as memoryviews, so sending or drawing the map never copies the whole grid.
+    '''
+    # translates every cell to 1 if a player can stand on it (open floor or the spawnpoint), else 0
+    _PASSABLE_TABLE: bytes = bytes(1 if chr(i) in ' S' else 0 for i in range(256))
+    # fills out rows shorter than the widest row; a wall rather than '#', which the client draws as a treasure
+    _PADDING_CELL: bytes = b'-'
+
+    def __init__(self, width: int, height: int, cells: bytearray, passable: bytearray | None = None) -> None:
+        if width <= 0 or height <= 0:
+            raise ValueError(f'Map dimensions must be positive, got {width}x{height}')
+        if len(cells) != width * height:
+            raise ValueError(f'Expected {width * height} cells for a {width}x{height} map, got {len(cells)}')
+        self.width: int = width
+        self.height: int = height
+        self.cells: bytearray = cells
+        self.passable: bytearray = passable if passable is not None else bytearray(cells.translate(WorldGrid._PASSABLE_TABLE))
+
+    @staticmethod
+    def from_rows(rows: Iterable[bytes]) -> 'WorldGrid':
+        '''Builds a grid from rows of single-byte (ascii) cells. Rows shorter than the widest row are padded with impassable cells.'''
+        row_list: list[bytes] = [row.rstrip(b'\r\n') for row in rows]
+        if not row_list:
+            raise ValueError('Map has no rows')
+        width: int = max(len(row) for row in row_list)
+        cells: bytearray = bytearray()
+        for row_idx, row in enumerate(row_list):
+            if not row.isascii():
+                raise ValueError(f'Map row {row_idx} contains non-ascii characters')
+            cells += row
+            cells += WorldGrid._PADDING_CELL * (width - len(row))
+        return WorldGrid(width, len(row_list), cells)
+
+    @staticmethod
+    def from_file(filename: str) -> 'WorldGrid':
+        with open(filename, 'rb') as map_f:
+            return WorldGrid.from_rows(map_f)
+
+    def __len__(self) -> int:
+        return self.height
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def index(self, x: int, y: int) -> int:
+        if not self.in_bounds(x, y):
+            raise IndexError(f'Position {(x, y)} is outside of the {self.width}x{self.height} map')
+        return y * self.width + x
+
+    def position(self, idx: int) -> tuple[int, int]:
+        y, x = divmod(idx, self.width)
+        return (x, y)
+
+    def cell(self, x: int, y: int) -> str:
+        return chr(self.cells[self.index(x, y)])
+
+    def is_passable(self, x: int, y: int) -> bool:
+        '''Returns whether a player can stand on the cell. Positions outside of the map are never passable.'''
+        return self.in_bounds(x, y) and bool(self.passable[y * self.width + x])
+
+    def find_last(self, cell: str) -> tuple[int, int] | None:
+        idx: int = self.cells.rfind(cell.encode('ascii'))
+        return self.position(idx) if idx >= 0 else None
+
+    def row(self, y: int) -> memoryview:
+        '''Returns a read-only view of the row without copying it.'''
+        if not 0 <= y < self.height:
+            raise IndexError(f'Row {y} is outside of the {self.width}x{self.height} map')
+        start: int = y * self.width
+        return memoryview(self.cells)[start:start + self.width].toreadonly()
+
+    def row_text(self, y: int) -> str:
+        return str(self.row(y), 'ascii')
+
+    def render_rows(self, overlays: Iterable[tuple[int, int, str]] = ()) -> Iterator[tuple[int, str]]:
+        '''Yields the index and text of every row, with each (x, y, text) overlay drawn over the map.
+
+        Only the rows that have an overlay are copied. Overlay text running past the edge of the map is cut off.
+        '''
+        row_overlays: dict[int, list[tuple[int, str]]] = {}
+        for x, y, text in overlays:
+            if 0 <= y < self.height:
+                row_overlays.setdefault(y, []).append((x, text))
+
+        for y in range(self.height):
+            if y not in row_overlays:
+                yield y, self.row_text(y)
+                continue
+            row: bytearray = bytearray(self.row(y))
+            for x, text in row_overlays[y]:
+                encoded: bytes = text.encode('ascii')[:max(self.width - x, 0)]
+                if x >= 0:
+                    row[x:x + len(encoded)] = encoded
+            yield y, row.decode('ascii')
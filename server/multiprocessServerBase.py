@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import multiprocessing
+import sys
+import threading
+import traceback
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import Queue
+from types import FrameType
+from typing import Any, cast
+
+import server.models.serverClientWriterEvent as scwe
+from common.services.serviceManager import ServiceManager
+from constants import (IO_WORKER_CHECK_INTERVAL, IO_WORKER_STOP_TIMEOUT,
+                       SERVER_NAME)
+from server.asyncServerBase import OctothorpeAsyncServer
+from server.asyncServerClientReader import OctothorpeAsyncServerClientReader
+from server.models.workerServerClientConnection import (
+    WorkerOutbox, WorkerServerClientConnection)
+from server.serverIOWorker import ServerIOWorker, WorkerInbox
+
+logger = logging.getLogger(SERVER_NAME)
+logger.setLevel(logging.INFO)
+
+
+class OctothorpeMultiprocessServer(OctothorpeAsyncServer):
+    '''The Multiprocess Server splits the asyncio engine across processes. I/O Worker processes accept clients on the shared server port, read their requests and write their responses,
+    while this process runs the game logic for every client on its own event loop and is the only owner of the game state.
+
+    Workers send batches of client requests over a single multiprocessing queue, and the responses created while handling a batch go back to each worker as one batch on its own queue.
+    The Multiprocess Server is created once on the main thread and runs the event loop on that same thread.
+    '''
+    def __init__(self, service_manager: ServiceManager, num_workers: int):
+        super().__init__(service_manager)
+        self.num_workers: int = num_workers
+
+        # workers are spawned rather than forked, so they don't inherit the game state or the locks held by this process' threads
+        self.context = multiprocessing.get_context('spawn')
+        self.inbound: Queue = self.context.Queue()
+        self.outbounds: list[Queue] = [self.context.Queue() for _ in range(num_workers)]
+        self.outboxes: list[WorkerOutbox] = [[] for _ in range(num_workers)]
+        self.workers: list[BaseProcess] = []
+        self.client_readers: dict[tuple[int, int], OctothorpeAsyncServerClientReader] = {} # (key: (worker_id, conn_id))
+        self.stopping: asyncio.Event | None = None
+
+    async def serve(self, host: str, port: int) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+
+        for worker_id in range(self.num_workers):
+            worker = ServerIOWorker(worker_id, host, port, self.inbound, self.outbounds[worker_id], self.server_client_writer_manager.buffer_limit)
+            process: BaseProcess = self.context.Process(target=worker.run, name=f'io-worker-{worker_id}', daemon=True)
+            process.start()
+            self.workers.append(process)
+        receiver_thread = threading.Thread(target=self.receive_handler, daemon=True)
+        receiver_thread.start()
+
+        logger.info(f'Started {SERVER_NAME} on port {port} with {self.num_workers} I/O workers')
+
+        timers: list[asyncio.Task[None]] = self.start_timers()
+        await self.stopping.wait()
+        for timer in timers:
+            timer.cancel()
+
+        for key in list(self.client_readers):
+            self.close_client(key)
+        self.flush_outboxes()
+        self.stop_workers()
+
+    def start_timers(self) -> list[asyncio.Task[None]]:
+        timers: list[asyncio.Task[None]] = super().start_timers()
+        timers.append(asyncio.create_task(self.start_worker_monitor()))
+        return timers
+
+    async def start_worker_monitor(self) -> None:
+        while True:
+            await asyncio.sleep(IO_WORKER_CHECK_INTERVAL)
+            for process in self.workers:
+                if not process.is_alive():
+                    logger.error(f'I/O worker \'{process.name}\' exited with code {process.exitcode}. Shutting down server...')
+                    if self.stopping:
+                        self.stopping.set()
+                    return
+
+    def stop_workers(self) -> None:
+        for outbound in self.outbounds:
+            outbound.put(None)
+        for process in self.workers:
+            process.join(IO_WORKER_STOP_TIMEOUT)
+            if process.is_alive():
+                logger.warning(f'I/O worker \'{process.name}\' did not stop within {IO_WORKER_STOP_TIMEOUT}s')
+                process.terminate()
+        for outbound in self.outbounds:
+            # a worker that was terminated will never read what's left in its queue
+            outbound.cancel_join_thread()
+
+    def sh_shutdown(self, signal: int, frame: FrameType | None) -> Any:
+        self.user_manager.user_data_save()
+        self.output_service.log_stats()
+        logger.info('Socket connection closed. Shutting down server...')
+        if self.loop and self.stopping:
+            # signal handlers can interrupt the event loop at any point, so the server is stopped from the loop itself.
+            # The remaining clients are logged out and the workers are stopped once serve() wakes up
+            self.loop.call_soon_threadsafe(self.stopping.set)
+        else:
+            sys.exit()
+
+    def receive_handler(self) -> None:
+        while True:
+            inbox: WorkerInbox = self.inbound.get()
+            if self.loop is None or self.loop.is_closed():
+                return
+            self.loop.call_soon_threadsafe(self.handle_inbox, inbox)
+
+    def handle_inbox(self, inbox: WorkerInbox) -> None:
+        for worker_id, conn_id, kind, payload in inbox:
+            if kind == 'data':
+                self.handle_client_requests((worker_id, conn_id), payload)
+            elif kind == 'open':
+                self.initialize_worker_client(worker_id, conn_id, payload)
+            elif kind == 'close':
+                self.close_client((worker_id, conn_id), payload)
+            elif kind == 'backlog':
+                self.update_backlog((worker_id, conn_id), payload)
+        self.flush_outboxes()
+
+    def pump_events(self) -> None:
+        super().pump_events()
+        self.flush_outboxes()
+
+    def flush_outboxes(self) -> None:
+        for worker_id, outbox in enumerate(self.outboxes):
+            if outbox:
+                # the connections keep appending to the same list, so it's copied rather than replaced
+                self.outbounds[worker_id].put(outbox.copy())
+                outbox.clear()
+
+    def initialize_worker_client(self, worker_id: int, conn_id: int, addr: Any) -> None:
+        logger.info(f'Incoming client at addr: {addr} on I/O worker {worker_id}')
+
+        # the connection only duck-types the socket methods used to respond to the client
+        conn = cast(Any, WorkerServerClientConnection(self.outboxes[worker_id], conn_id))
+        client_info = self.client_manager.initialize_client(conn, addr)
+        client_reader = OctothorpeAsyncServerClientReader(self.service_manager, client_info, self.event_pump)
+        self.client_readers[(worker_id, conn_id)] = client_reader
+        client_reader.greet()
+
+    def handle_client_requests(self, key: tuple[int, int], incoming_requests: list[str]) -> None:
+        client_reader: OctothorpeAsyncServerClientReader | None = self.client_readers.get(key)
+        if not client_reader:
+            # requests that arrive after the client was logged out are dropped
+            return
+        try:
+            if client_reader.handle_requests(incoming_requests):
+                return
+            logger.error(f'Client reader for address \'{client_reader.client_info.addr}\' has stopped')
+        except Exception:
+            logger.error(f'Internal Exception: ' + traceback.format_exc())
+            client_reader.client_writer_service.dispatch_event(
+                scwe.ServerClientWriterEventServerError('We experienced a critical internal error. Please contact chrisgifford99@gmail.com for support.')
+            )
+        self.close_client(key)
+
+    def update_backlog(self, key: tuple[int, int], backlog: int) -> None:
+        client_reader: OctothorpeAsyncServerClientReader | None = self.client_readers.get(key)
+        if client_reader:
+            client_reader.client_info.conn.backlog_bytes = backlog # pyright: ignore[reportAttributeAccessIssue]
+
+    def close_client(self, key: tuple[int, int], error: str | None = None) -> None:
+        client_reader: OctothorpeAsyncServerClientReader | None = self.client_readers.pop(key, None)
+        if client_reader:
+            if error:
+                client_reader.client_writer_service.dispatch_event(scwe.ServerClientWriterEventUserError(error))
+            client_reader.logout_handler()
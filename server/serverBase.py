@@ -2,17 +2,26 @@ import logging
 import socket
 import sys
 import threading
-from socket import socket
+import traceback
+from socket import IPPROTO_TCP, TCP_NODELAY, socket
 from types import FrameType
 from typing import Any
 
 from common.services.serviceManager import ServiceManager
-from constants import SERVER_NAME, USER_AUTOSAVE_INTERVAL
+from constants import (COMMAND_STATS_INTERVAL, SERVER_NAME,
+                       SLOW_CLIENT_CHECK_INTERVAL, USER_AUTOSAVE_INTERVAL)
 from server.serverClientReader import OctothorpeServerClientReader
+from server.serverClientWriter import OctothorpeServerClientWriter
+from server.serverCommandWorker import ServerCommandWorker
+from server.serverTicker import ServerTicker
 from server.serverWriter import ServerWriter
 from server.services.serverClientManager import ServerClientManager
+from server.services.serverClientWriterManager import ServerClientWriterManager
+from server.services.serverCommandService import ServerCommandService
 from server.services.serverCoreService import ServerCoreService
+from server.services.serverOutputService import ServerOutputService
 from server.services.serverUserManager import ServerUserManager
+from server.services.serverWriterService import ServerWriterService
 
 logger = logging.getLogger(SERVER_NAME)
 logger.setLevel(logging.INFO)
@@ -27,6 +36,10 @@ class OctothorpeServer(object):
         self.server_core_service: ServerCoreService = service_manager.get_service(ServerCoreService)
         self.user_manager: ServerUserManager = service_manager.get_service(ServerUserManager)
         self.client_manager: ServerClientManager = self.service_manager.get_service(ServerClientManager)
+        self.server_writer_service: ServerWriterService = self.service_manager.get_service(ServerWriterService)
+        self.server_client_writer_manager: ServerClientWriterManager = self.service_manager.get_service(ServerClientWriterManager)
+        self.server_command_service: ServerCommandService = self.service_manager.get_service(ServerCommandService)
+        self.output_service: ServerOutputService = self.service_manager.get_service(ServerOutputService)
 
         self.sock = sock
 
@@ -36,20 +49,68 @@ class OctothorpeServer(object):
         new_serverwriter_thread = threading.Thread(target=self.server_writer.server_writer_handler, daemon=True)
         new_serverwriter_thread.start()
 
+        self.server_ticker: ServerTicker | None = None
+        if self.server_writer_service.tick_rate:
+            self.server_ticker = ServerTicker(self.service_manager)
+            new_serverticker_thread = threading.Thread(target=self.server_ticker.ticker_handler, daemon=True)
+            new_serverticker_thread.start()
+
+        for _ in range(self.server_command_service.pool_size):
+            command_worker = ServerCommandWorker(self.service_manager)
+            new_command_worker_thread = threading.Thread(target=command_worker.command_worker_handler, daemon=True)
+            new_command_worker_thread.start()
+        if self.server_command_service.pool_size:
+            self.start_command_stats_timer()
+        if self.server_client_writer_manager.queue_limit:
+            self.start_slow_client_timer()
+
     def start_save_timer(self) -> None:
-        self.user_manager.user_data_save()
-        threading.Timer(USER_AUTOSAVE_INTERVAL, self.start_save_timer).start()
+        try:
+            self.user_manager.user_data_save()
+        except Exception:
+            # the users stay dirty, so the next autosave retries them
+            logger.error(f'Failed to save user data: ' + traceback.format_exc())
+        save_timer = threading.Timer(USER_AUTOSAVE_INTERVAL, self.start_save_timer)
+        save_timer.daemon = True
+        save_timer.start()
+
+    def start_slow_client_timer(self) -> None:
+        self.server_client_writer_manager.check_slow_clients()
+        slow_client_timer = threading.Timer(SLOW_CLIENT_CHECK_INTERVAL, self.start_slow_client_timer)
+        slow_client_timer.daemon = True
+        slow_client_timer.start()
+
+    def start_command_stats_timer(self) -> None:
+        stats: dict[str, int] = self.server_command_service.stats()
+        logger.info(f'Command pool: {stats["queued"]} queued, {stats["running"]} running on {stats["pool_size"]} threads, '
+                    f'{stats["completed"]} completed, {stats["peak_queued"]} queued at peak')
+        stats_timer = threading.Timer(COMMAND_STATS_INTERVAL, self.start_command_stats_timer)
+        stats_timer.daemon = True
+        stats_timer.start()
 
     def sh_shutdown(self, signal: int, frame: FrameType | None) -> Any:
         self.user_manager.user_data_save()
+        # wake up and stop the ticker, the command pool and every writer thread
+        if self.server_ticker:
+            self.server_ticker.shutdown()
+        self.server_command_service.shutdown()
+        self.server_writer_service.shutdown()
+        self.server_client_writer_manager.shutdown_all()
+        self.output_service.log_stats()
         self.sock.close()
         logger.info('Socket connection closed. Shutting down server...')
         sys.exit()
 
     def initialize_client(self, conn: socket, addr: str) -> None:
         logger.info(f'Incoming client at addr: {addr}')
+        # responses are already batched by the client's output buffer, so don't let Nagle's algorithm hold them back waiting for an ACK
+        conn.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
 
         client_info = self.client_manager.initialize_client(conn, addr)
         client_main = OctothorpeServerClientReader(self.service_manager, client_info)
+        client_writer = OctothorpeServerClientWriter(self.service_manager, client_info)
+
+        new_client_writer_thread = threading.Thread(target=client_writer.client_writer_handler)
+        new_client_writer_thread.start()
         new_client_thread = threading.Thread(target=client_main.client_handler)
         new_client_thread.start()
\ No newline at end of file
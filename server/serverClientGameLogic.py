@@ -3,16 +3,24 @@ from common.models.game.direction import Direction
 from common.models.game.treasure import Treasure
 from common.services.serviceManager import ServiceManager
 from server.models.serverClient import ServerClient
+from server.models.serverCommand import ServerCommand
 from server.services.serverClientWriterManager import ServerClientWriterManager
 from server.services.serverClientWriterService import ServerClientWriterService
 from server.services.serverGameLogicService import ServerGameLogicService
 from server.services.serverUserManager import ServerUserManager
 
+DIRECTION_OFFSETS: dict[Direction, tuple[int, int]] = {
+    Direction.NORTH: (0, -1),
+    Direction.EAST: (1, 0),
+    Direction.SOUTH: (0, 1),
+    Direction.WEST: (-1, 0)
+}
+
 
 class OctothorpeServerClientGameLogic():
     '''The Server Client Game Logic class is responsible for performing game logic functions for a client.
     
-    This object gets player commands executed by the Server Client. Then, those commands will place events into the Server Client Writer queue.
+    This object gets player commands executed by the Server Client, which validates them against GAME_LOGIC_COMMANDS first. Then, those commands will place events into the Server Client Writer queue.
     One instance of this object is created for each Server Client and does not need its own thread.
     '''
     def __init__(self, service_manager: ServiceManager, client_info: ServerClient):
@@ -24,31 +32,21 @@ class OctothorpeServerClientGameLogic():
         self.client_info = client_info
         self.server_client_writer_service: ServerClientWriterService = self.server_client_writer_manager.get_writer_service(self.client_info.client_id)
 
-        self.valid_cmds: list[str] = ['move', 'map', 'cheatmap']
+    def show_map(self, command_agg: list[str]) -> bool:
+        self.server_client_writer_service.dispatch_event(scwe.ServerClientWriterEventMap())
+        return True
 
-    def execute_cmd(self, command_agg: list[str]) -> bool:
-        operation: str = command_agg[0]
-        if operation == 'move':
-            return self.move(command_agg)
-        elif operation == 'map':
-            self.server_client_writer_service.dispatch_event(scwe.ServerClientWriterEventMap())
-            return True
-        elif operation == 'cheatmap':
-            self.server_client_writer_service.dispatch_event(scwe.ServerClientWriterEventCheatmap())
-            return True
-        
+    def show_cheatmap(self, command_agg: list[str]) -> bool:
+        self.server_client_writer_service.dispatch_event(scwe.ServerClientWriterEventCheatmap())
+        return True
+
+    def view(self, command_agg: list[str]) -> bool:
         self.server_client_writer_service.dispatch_event(
-            scwe.ServerClientWriterEventServerError(f'Internal error while processing your request: Operation \'{operation}\' given, but only {self.valid_cmds} are processed here')
+            scwe.ServerClientWriterEventView(command_agg[1] == 'all')
         )
-        return False
-    
+        return True
+
     def move(self, command_agg: list[str]) -> bool:
-        if len(command_agg) != 2:
-            self.server_client_writer_service.dispatch_event(
-                scwe.ServerClientWriterEventUserError(f'Invalid move command. Use format: \'move [direction]\'')
-            )
-            return True
-        
         raw_direction = command_agg[1]
         try:
             direction: Direction = Direction[raw_direction]
@@ -62,17 +60,10 @@ class OctothorpeServerClientGameLogic():
         if not user_info or not user_info.position:
             raise ValueError('User info was found to be incomplete or missing when performing a move update')
 
-        new_pos: tuple[int, int] = user_info.position or (-1, -1)
-        if direction == Direction.NORTH:
-            new_pos = (new_pos[0], new_pos[1] - 1)
-        elif direction == Direction.SOUTH:
-            new_pos = (new_pos[0], new_pos[1] + 1)
-        elif direction == Direction.WEST:
-            new_pos = (new_pos[0] - 1, new_pos[1])
-        elif direction == Direction.EAST:
-            new_pos = (new_pos[0] + 1, new_pos[1])
-            
-        if self.server_game_logic.map[new_pos[1]][new_pos[0]] in [' ', 'S']:
+        dx, dy = DIRECTION_OFFSETS[direction]
+        new_pos: tuple[int, int] = (user_info.position[0] + dx, user_info.position[1] + dy)
+
+        if self.server_game_logic.map.is_passable(*new_pos):
             user_info.position = new_pos
             nearby_treasures: list[tuple[Treasure, float]] = self.server_game_logic.nearby_treasures(user_info.position)
             for treasure, dist in nearby_treasures:
@@ -81,6 +72,7 @@ class OctothorpeServerClientGameLogic():
                         scwe.ServerClientWriterEventTreasureFound(treasure)
                     )
                     user_info.score += treasure.score
+                    self.user_manager.mark_dirty(user_info)
                 else:
                     self.server_client_writer_service.dispatch_event(
                         scwe.ServerClientWriterEventTreasureNearby(treasure)
@@ -94,4 +86,16 @@ class OctothorpeServerClientGameLogic():
                 scwe.ServerClientWriterEventUserError(f'move {direction} unsuccessful')
             )
 
-        return True
\ No newline at end of file
+        return True
+
+
+# the commands run by a client's Game Logic, once the client is logged in
+GAME_LOGIC_COMMANDS: list[ServerCommand] = [
+    ServerCommand('move', OctothorpeServerClientGameLogic.move, usage='Invalid move command. Use format: \'move [direction]\'',
+                  num_args=[1], requires_login=True),
+    ServerCommand('map', OctothorpeServerClientGameLogic.show_map, requires_login=True),
+    ServerCommand('view', OctothorpeServerClientGameLogic.view, usage='Invalid view command. Use format: \'view [all|near]\'',
+                  num_args=[1], choices={1: ['all', 'near']}, requires_login=True),
+    # 'cheatmap' is hidden from the user since it's a secret cheat command
+    ServerCommand('cheatmap', OctothorpeServerClientGameLogic.show_cheatmap, requires_login=True, hidden=True)
+]
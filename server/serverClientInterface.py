@@ -1,7 +1,11 @@
 import logging
 
+from common.models.protocol import ProtocolEnum
+from common.utils.binaryProtocolUtils import BinaryProtocolUtils
 from constants import SERVER_NAME
 from server.models.serverClient import ServerClient
+from server.models.serverFrame import ServerFrame
+from server.utils.protocolUtils import ProtocolUtils
 
 logger = logging.getLogger(SERVER_NAME)
 logger.setLevel(logging.INFO)
@@ -12,28 +16,49 @@ class OctothorpeServerClientInterface(object):
     '''
     def __init__(self, client_info: ServerClient):
         self.client_info: ServerClient = client_info
-        self.code_msgs: dict[int, str] = {101: 'PlayerUpdate', 102:'TreasureProximity', 103: 'TreasureUpdate', 104: 'Map', 200: 'Success', 400: 'UserError', 500: 'ServerError'}
+        self.code_msgs: dict[int, str] = ProtocolUtils.CODE_MSGS
+        self.known_player_ids: set[int] = set() # players whose username has been sent to a binary protocol client
 
     def send_msg(self, code: int, msg: str) -> bool:
         try:
-            response: bytes = self.resp(code, msg)
-            msg_send_result: bool = bool(self.client_info.conn.send(response))
+            frame: ServerFrame = ProtocolUtils.message(code, msg)
         except Exception as ex:
             logger.error(f'Received error sending message to client: {ex}')
             return False
 
-        if not msg_send_result and len(msg) > 0:
-            logger.error(f'Sending message to client failed, but no error message was found')
+        return self.send_frame(frame)
+
+    def send_frame(self, frame: ServerFrame) -> bool:
+        '''Sends a response in the client's protocol. Broadcast frames are shared by every client, so each protocol's encoding is only built once.'''
+        try:
+            response: bytes = frame.encode(self.client_info.protocol)
+            if self.client_info.protocol == ProtocolEnum.BINARY:
+                response = self.introduce_players(frame) + response
+        except Exception as ex:
+            logger.error(f'Received error sending message to client: {ex}')
             return False
-        else:
-            return True
 
-    def resp(self, code: int, msg: str = '') -> bytes:
-        if not code or code not in self.code_msgs:
-            logger.error('Invalid code given: ' + str(code) if code else 'None')
-            code = 500
+        return self.send_bytes(response)
+
+    def introduce_players(self, frame: ServerFrame) -> bytes:
+        '''Returns the binary records naming every player in the frame the client doesn't know yet.'''
+        intros: list[bytes] = []
+        for player_id, username in frame.players:
+            if player_id in self.known_player_ids:
+                continue
+            self.known_player_ids.add(player_id)
+            intros.append(BinaryProtocolUtils.player_name(player_id, username))
+        return b''.join(intros)
 
-        code_msg: str = msg if msg else self.code_msgs.get(code, self.code_msgs.get(500, ''))
+    def send_bytes(self, response: bytes) -> bool:
+        try:
+            # unlike send, sendall keeps writing until the whole response is sent
+            self.client_info.conn.sendall(response)
+        except Exception as ex:
+            logger.error(f'Received error sending message to client: {ex}')
+            return False
+
+        return True
 
-        response: str = f'{code}:{code_msg}\r\n'
-        return response.encode('utf-8')
\ No newline at end of file
+    def resp(self, code: int, msg: str = '') -> bytes:
+        return ProtocolUtils.message(code, msg).encode(self.client_info.protocol)
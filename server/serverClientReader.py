@@ -1,20 +1,27 @@
+import functools
 import logging
+import socket
 import sys
-import threading
 import traceback
 
 import server.models.serverClientWriterEvent as scwe
+from common.models.protocol import ProtocolEnum
 from common.models.user import OctothorpeUser
 from common.services.serviceManager import ServiceManager
-from constants import SERVER_NAME
+from common.utils.lineFramer import LineFramer, LineTooLongError
+from constants import (CLIENT_WRITER_DRAIN_TIMEOUT, MAX_REQUEST_LENGTH,
+                       SERVER_NAME)
 from server.models.serverClient import ServerClient
+from server.models.serverCommand import ServerCommand, ServerCommandRegistry
 from server.models.serverExceptions import (ServerInternalException,
                                             UserRequestException)
-from server.serverClientGameLogic import OctothorpeServerClientGameLogic
-from server.serverClientWriter import OctothorpeServerClientWriter
+from server.serverClientGameLogic import (GAME_LOGIC_COMMANDS,
+                                          OctothorpeServerClientGameLogic)
 from server.services.serverClientWriterManager import ServerClientWriterManager
 from server.services.serverClientWriterService import ServerClientWriterService
+from server.services.serverCommandService import ServerCommandService
 from server.services.serverGameLogicService import ServerGameLogicService
+from server.services.serverMetricsService import ServerMetricsService
 from server.services.serverUserManager import ServerUserManager
 
 logger = logging.getLogger(SERVER_NAME)
@@ -23,25 +30,24 @@ logger.setLevel(logging.INFO)
 class OctothorpeServerClientReader():
     '''The Server Client is responsible for connecting to and interacting with the client.
     It is the core object that listens for all input from the client.
+
+    The Server Client's writer is registered here, but its thread is started by the Server alongside this object's own thread.
     '''
     def __init__(self, service_manager: ServiceManager, client_info: ServerClient):
         self.service_manager: ServiceManager = service_manager
         self.user_manager: ServerUserManager = self.service_manager.get_service(ServerUserManager)
         self.server_game_logic: ServerGameLogicService = self.service_manager.get_service(ServerGameLogicService)
         self.server_client_writer_manager: ServerClientWriterManager = self.service_manager.get_service(ServerClientWriterManager)
+        self.server_command_service: ServerCommandService = self.service_manager.get_service(ServerCommandService)
+        self.metrics_service: ServerMetricsService = self.service_manager.get_service(ServerMetricsService)
 
         self.client_info: ServerClient = client_info      
         self.client_game_logic: OctothorpeServerClientGameLogic | None = None
-
-        self.valid_cmds: list[str] = ['quit', 'login']
+        self.stop_requested: bool = False # set by the command pool once a request ends the session
+        self.line_framer: LineFramer = LineFramer(MAX_REQUEST_LENGTH, backspace=True)
 
         self.client_writer_service: ServerClientWriterService = self.server_client_writer_manager.register_client(self.client_info.client_id)
 
-        client_writer = OctothorpeServerClientWriter(self.service_manager, self.client_info)
-
-        new_client_writer_thread = threading.Thread(target=client_writer.client_writer_handler)
-        new_client_writer_thread.start()
-
     def client_handler(self) -> None:
         try:
             self.client_writer_service.dispatch_event(
@@ -53,7 +59,7 @@ class OctothorpeServerClientReader():
                     logger.error(f'Client reader for address \'{self.client_info.addr}\' has stopped')
                     break
 
-        except ConnectionAbortedError:
+        except (ConnectionAbortedError, ConnectionResetError):
             logger.error(f'Client unexpectedly disconnected at address {self.client_info.addr}')
         except Exception:
             logger.error(f'Internal Exception: ' + traceback.format_exc())
@@ -65,12 +71,8 @@ class OctothorpeServerClientReader():
             sys.exit()
 
     def login_handler(self, command_agg: list[str]) -> OctothorpeUser | None:
-        if len(command_agg) != 2:
-            self.client_writer_service.dispatch_event(
-                scwe.ServerClientWriterEventUserError(f'Invalid login command. Use format: \'login [username]\'')
-            )
-            return None
         username: str = command_agg[1]
+        protocol: ProtocolEnum = ProtocolEnum[command_agg[2].upper()] if len(command_agg) == 3 else ProtocolEnum.TEXT
         try:
             user, new_user = self.user_manager.login_user(self.client_info.client_id, username)
         except UserRequestException as ex:
@@ -92,92 +94,126 @@ class OctothorpeServerClientReader():
             self.client_writer_service.dispatch_event(
                 scwe.ServerClientWriterEventSuccess(f'Welcome back {username}!')
             )
+        if protocol != ProtocolEnum.TEXT:
+            self.client_writer_service.dispatch_event(scwe.ServerClientWriterEventProtocol(protocol))
 
         self.client_game_logic = OctothorpeServerClientGameLogic(self.service_manager, self.client_info)
         return user
 
     def logout_handler(self) -> None:
+        # let the requests already queued on the command pool finish first, so their responses are sent before the logout
+        self.server_command_service.unregister_client(self.client_info.client_id)
         self.client_writer_service.dispatch_event(scwe.ServerClientWriterEventLogout())
+        # the client writer stops once it has handled every event queued before the shutdown.
+        # Wait for it, so queued responses such as a rejected login are sent and the logout broadcast still finds the user, before the connection is closed
+        self.client_writer_service.shutdown()
+        if not self.client_writer_service.stopped.wait(CLIENT_WRITER_DRAIN_TIMEOUT):
+            logger.warning(f'Client writer for address \'{self.client_info.addr}\' did not stop within {CLIENT_WRITER_DRAIN_TIMEOUT}s')
         self.user_manager.logout_user(self.client_info.client_id)
+        self.server_client_writer_manager.unregister_client(self.client_info.client_id)
 
-    def execute_cmd(self, command_agg: list[str]) -> bool:
-        operation: str = command_agg[0]
+    def login(self, command_agg: list[str]) -> bool:
+        login_success: bool = bool(self.login_handler(command_agg))
+        if login_success:
+            self.client_writer_service.dispatch_event(scwe.ServerClientWriterEventLogin())
+        return login_success
 
-        user_info = self.user_manager.get_user_by_client_id(self.client_info.client_id)
-        if operation == 'login':
-            if user_info:
-                self.client_writer_service.dispatch_event(
-                    scwe.ServerClientWriterEventUserError(f'You\'re already logged in!')
-                )
-                return True
-
-            user_info = self.login_handler(command_agg)
-            login_success: bool = bool(user_info)
-            if login_success:
-                self.client_writer_service.dispatch_event(scwe.ServerClientWriterEventLogin())
-            return login_success
-        elif operation == 'quit':
-            self.client_writer_service.dispatch_event(
-                scwe.ServerClientWriterEventSuccess('Goodbye. Thanks for playing!')
-            )
-            return False
-        
+    def quit(self, command_agg: list[str]) -> bool:
         self.client_writer_service.dispatch_event(
-            scwe.ServerClientWriterEventServerError(f'Internal error while processing your request: Operation \'{operation}\' given, but only {self.valid_cmds} are processed here')
+            scwe.ServerClientWriterEventSuccess('Goodbye. Thanks for playing!')
         )
         return False
 
     def cmd_handler(self) -> bool:
-        incoming_data: str = ''
-        # build incoming packet from first char input to some '\r\n'
+        incoming_requests: list[str] | None = self.read_requests()
+        if incoming_requests is None:
+            return False
+
+        if not self.server_command_service.pool_size:
+            return self.process_requests(incoming_requests)
+
+        # the requests run on the command pool after this client's earlier requests, while this thread goes back to reading
+        if not self.server_command_service.submit(self.client_info.client_id, functools.partial(self.run_requests, incoming_requests)):
+            return False
+        return not self.stop_requested
+
+    def read_requests(self) -> list[str] | None:
+        '''Reads until at least one complete request has arrived and returns every complete request. Returns None once the client should be disconnected.'''
         while True:
             chunk: bytes = self.client_info.conn.recv(1024)
             if not chunk:
-                return False
-
-            incoming_data += chunk.decode('utf-8')
-
-            # handle backspace in telnet
-            while '\b' in incoming_data:
-                self.client_info.conn.send(b' \b') # The single space ' ' replaces char at cursor and '\b' moves cursor to the left within telnet
-                bs_idx: int = incoming_data.index('\b')
-                incoming_data = incoming_data[:bs_idx - 1] + incoming_data[bs_idx + 1:]
+                return None
+            self.echo_backspaces(self.line_framer.feed(chunk))
+            try:
+                incoming_requests: list[str] = self.line_framer.lines()
+            except LineTooLongError as ex:
+                self.client_writer_service.dispatch_event(scwe.ServerClientWriterEventUserError(str(ex)))
+                return None
+            if incoming_requests:
+                return incoming_requests
+
+    def run_requests(self, incoming_requests: list[str]) -> None:
+        '''Processes requests on the command pool. Once a request ends the session, the reader thread is woken up so it stops reading and logs the client out.'''
+        if self.stop_requested:
+            # the session already ended, so requests the client sent after it are dropped
+            return
+        try:
+            if self.process_requests(incoming_requests):
+                return
+        except Exception:
+            logger.error(f'Internal Exception: ' + traceback.format_exc())
+            self.client_writer_service.dispatch_event(
+                scwe.ServerClientWriterEventServerError('We experienced a critical internal error. Please contact chrisgifford99@gmail.com for support.')
+            )
+        self.stop_requested = True
+        try:
+            # a reader blocked in recv sees the end of the stream
+            self.client_info.conn.shutdown(socket.SHUT_RD)
+        except OSError:
+            pass
 
-            if '\r\n' in incoming_data:
-                break
+    def echo_backspaces(self, backspaces: int) -> None:
+        # handle backspace in telnet
+        if backspaces:
+            self.client_info.conn.sendall(b' \b' * backspaces) # The single space ' ' replaces char at cursor and '\b' moves cursor to the left within telnet
 
-        if not incoming_data:
-            return False
-        
+    def process_requests(self, incoming_requests: list[str]) -> bool:
         # sometimes, the client will send requests faster than the server can process each request independently. That is, the client will send more than one request before the socket buffer can be ingested and cleared and the server ends up receiving multiple requests at once.
-        # therefore, we need to separate those requests to be processed separately
-        incoming_requests: list[str] = list(filter(None, incoming_data.split('\r\n'))) # filter out None (aka falsey) values
+        # therefore, each complete request is processed separately
         data_process_result: bool = True
-        for req in incoming_requests:
-            command_agg: list[str] = [elem.strip().lower() for elem in req.split(' ')]
+        for req in filter(None, incoming_requests): # filter out empty requests
+            command_agg: list[str] = [elem.strip() for elem in req.lower().split(' ')]
             operation: str = command_agg[0]
-            
-            allowed_operations: list[str] = list(self.valid_cmds) # ensure a new list is created and we aren't referencing
-            if self.client_game_logic:
-                # exclude 'cheatmap' from being shown to the user since it's a secret cheat command
-                allowed_operations += [cmd for cmd in self.client_game_logic.valid_cmds if cmd != 'cheatmap']
-            
-            if operation in self.valid_cmds:
-                # execute basic Server Client commands
-                server_client_execute_res: bool = self.execute_cmd(command_agg)
-                data_process_result &= (server_client_execute_res or False)
-                continue
-            elif self.client_game_logic and operation in self.client_game_logic.valid_cmds:
-                # execute Game Logic commands
-                game_logic_execute_res: bool = self.client_game_logic.execute_cmd(command_agg)
-                data_process_result &= (game_logic_execute_res or False)
-                continue
-            else:
+
+            command: ServerCommand | None = SERVER_COMMANDS.get(operation)
+            self.metrics_service.commands.inc(command.name if command else 'invalid')
+            if not command or (command.requires_login and not self.client_game_logic):
                 self.client_writer_service.dispatch_event(
-                    scwe.ServerClientWriterEventUserError(f'Invalid operation \'{operation}\'. Allowed operations: [{",".join(allowed_operations)}]')
+                    scwe.ServerClientWriterEventUserError(SERVER_COMMANDS.invalid_operation(operation, bool(self.client_game_logic)))
                 )
-                
-                data_process_result &= True
                 continue
-        
-        return data_process_result
\ No newline at end of file
+            if command.logged_in_error and self.client_game_logic:
+                self.client_writer_service.dispatch_event(scwe.ServerClientWriterEventUserError(command.logged_in_error))
+                continue
+            if not command.accepts(command_agg):
+                self.client_writer_service.dispatch_event(scwe.ServerClientWriterEventUserError(command.usage))
+                data_process_result &= not command.disconnect_on_usage
+                continue
+
+            # Game Logic commands run on the client's Game Logic, and basic Server Client commands on this object
+            handler_owner: object = self.client_game_logic if command.requires_login else self
+            data_process_result &= bool(command.handler(handler_owner, command_agg))
+
+        return data_process_result
+
+
+# every command a client can send, looked up by name for each request
+SERVER_COMMANDS: ServerCommandRegistry = ServerCommandRegistry([
+    ServerCommand('quit', OctothorpeServerClientReader.quit),
+    # the protocol is optional so telnet users can keep using 'login [username]'
+    ServerCommand('login', OctothorpeServerClientReader.login,
+                  usage='Invalid login command. Use format: \'login [username]\' or \'login [username] [text|binary]\'',
+                  num_args=[1, 2], choices={2: [str(p) for p in ProtocolEnum]}, disconnect_on_usage=True,
+                  logged_in_error='You\'re already logged in!'),
+    *GAME_LOGIC_COMMANDS
+])
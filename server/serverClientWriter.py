@@ -1,19 +1,27 @@
-import copy
 import logging
 import time
+from typing import Iterable
 
 import server.models.serverClientWriterEvent as scwe
 import server.models.serverWriterEvent as swe
+from common.models.protocol import PlayerStatusEnum, ProtocolEnum
+from common.models.user import OctothorpeUser
 from common.services.serviceManager import ServiceManager
-from constants import POLLING_INTERVAL, SERVER_NAME
+from common.utils.binaryProtocolUtils import BinaryProtocolUtils
+from constants import SERVER_NAME
 from server.models.serverClient import ServerClient
+from server.models.serverOutputBuffer import ServerOutputBuffer
 from server.serverClientInterface import OctothorpeServerClientInterface
 from server.services.serverClientManager import ServerClientManager
 from server.services.serverClientWriterManager import ServerClientWriterManager
 from server.services.serverClientWriterService import ServerClientWriterService
 from server.services.serverGameLogicService import ServerGameLogicService
+from server.services.serverInterestManager import ServerInterestManager
+from server.services.serverMetricsService import ServerMetricsService
+from server.services.serverOutputService import ServerOutputService
 from server.services.serverUserManager import ServerUserManager
 from server.services.serverWriterService import ServerWriterService
+from server.utils.protocolUtils import ProtocolUtils
 
 logger = logging.getLogger(SERVER_NAME)
 logger.setLevel(logging.INFO)
@@ -23,6 +31,7 @@ class OctothorpeServerClientWriter(OctothorpeServerClientInterface):
     '''The Server Client Writer is responsible for handling all client-specific events that get placed into its queue. This is also responsible for communicating server-wide events to the Server Writer
     
     This object should be created for each client and must be created on its own thread.
+    Responses are held in the client's output buffer and sent together, after each event or once no events are left depending on the flush policy.
     '''
     def __init__(self, service_manager: ServiceManager, client_info: ServerClient):
         super().__init__(client_info)
@@ -33,69 +42,137 @@ class OctothorpeServerClientWriter(OctothorpeServerClientInterface):
         self.server_writer_service: ServerWriterService = self.service_manager.get_service(ServerWriterService)
         self.server_client_writer_manager: ServerClientWriterManager = self.service_manager.get_service(ServerClientWriterManager)
         self.client_manager: ServerClientManager = self.service_manager.get_service(ServerClientManager)
+        self.interest_manager: ServerInterestManager = self.service_manager.get_service(ServerInterestManager)
+        self.output_service: ServerOutputService = self.service_manager.get_service(ServerOutputService)
+        self.metrics_service: ServerMetricsService = self.service_manager.get_service(ServerMetricsService)
 
         self.server_client_writer_service: ServerClientWriterService = self.server_client_writer_manager.get_writer_service(self.client_info.client_id)
+        self.output_buffer: ServerOutputBuffer = ServerOutputBuffer(
+            self.client_info.conn, self.output_service.flush_bytes, self.output_service.flush_policy == 'event', self.record_output
+        )
 
     def client_writer_handler(self) -> None:
-        while True:
-            if self.server_client_writer_service.queue.qsize() != 0:
-                event = self.server_client_writer_service.queue.get()
-                self.execute_cmd(event)
-            else:
-                # this allows the server to poll the client only every 100ms, but allow the queue of events to be processed instantaneously
-                time.sleep(POLLING_INTERVAL)
+        # blocks until the next event arrives and returns once the Server Client Writer Service is shut down
+        queue = self.server_client_writer_service.queue
+        try:
+            for event in queue:
+                self.handle_event(event)
+                if not queue.qsize():
+                    # the writer caught up, so the responses held by the idle flush policy are sent before it blocks again
+                    self.flush()
+        finally:
+            self.flush()
+            self.server_client_writer_service.stopped.set()
+
+        stats = self.server_client_writer_service.queue.stats
+        logger.debug(f'Client writer for address \'{self.client_info.addr}\' has stopped after {stats.count} events, avg queue wait {stats.avg_wait * 1000:.3f}ms, max {stats.max_wait * 1000:.3f}ms')
+        queue_stats: dict[str, int] = self.server_client_writer_service.queue_stats()
+        if queue_stats['dropped'] or queue_stats['coalesced']:
+            logger.info(f'Client writer for address \'{self.client_info.addr}\' fell behind by up to {queue_stats["peak_depth"]} events, '
+                        f'replaced {queue_stats["coalesced"]} stale player updates and dropped {queue_stats["dropped"]} events')
+
+    def handle_event(self, event: scwe.ServerClientWriterEventBase) -> None:
+        '''Handles an event taken from the writer's queue. With a buffer limit, droppable events are dropped while the client's connection holds too many unsent bytes.'''
+        service = self.server_client_writer_service
+        if event.droppable and service.buffer_limit and service.drop_event(self.client_info.conn.backlog()): # pyright: ignore[reportAttributeAccessIssue]
+            return
+        self.execute_cmd(event)
+        try:
+            self.output_buffer.end_event()
+        except Exception as ex:
+            logger.error(f'Received error sending message to client: {ex}')
+        self.metrics_service.client_writer_event_seconds.observe(
+            time.perf_counter() - self.server_client_writer_service.queue.last_enqueued_at, event.key.name
+        )
+
+    def record_output(self, events: int, syscalls: int, bytes_sent: int) -> None:
+        self.output_service.record(events, syscalls, bytes_sent)
+        self.server_client_writer_service.record_output(events, syscalls, bytes_sent)
+
+    def flush(self) -> None:
+        try:
+            self.output_buffer.flush()
+        except Exception as ex:
+            logger.error(f'Received error sending message to client: {ex}')
 
-    def write_map(self, user_map: list[str]) -> None:
-        for map_line in user_map:
-            self.send_msg(104, map_line.replace('\n', ''))
+    def send_bytes(self, response: bytes) -> bool:
+        try:
+            self.output_buffer.write(response)
+        except Exception as ex:
+            logger.error(f'Received error sending message to client: {ex}')
+            return False
+
+        return True
+
+    def write_map(self, overlays: Iterable[tuple[int, int, str]] = ()) -> None:
+        for row_idx, map_line in self.server_game_logic.map.render_rows(overlays):
+            self.send_frame(ProtocolUtils.map_row(row_idx, map_line))
+
+    def send_player_update(self, user: OctothorpeUser) -> None:
+        if not user.position:
+            return
+        self.send_frame(ProtocolUtils.player_update(self.user_manager.get_player_id(user), user.username, user.position, user.score, PlayerStatusEnum.UPDATE))
 
     def execute_cmd(self, event: scwe.ServerClientWriterEventBase) -> bool:
         user_info = self.user_manager.get_user_by_client_id(self.client_info.client_id)
         if isinstance(event, scwe.ServerClientWriterEventLogin):
-            user_map = self.server_game_logic.map
-            self.send_msg(104, str((len(user_map), len(user_map[0]))))
-            self.write_map(user_map)
-            # notify current user of all existing users, their scores and positions
-            for client in self.client_manager.active_clients:
-                user = self.user_manager.get_user_by_client_id(client.client_id)
-                if not user or not user.position:
-                    continue
-                self.send_msg(101, f'{user.username}, {user.position[0]}, {user.position[1]}, {user.score}')
+            self.send_frame(ProtocolUtils.map_size(self.server_game_logic.map.height, self.server_game_logic.map.width))
+            self.write_map()
+            if self.interest_manager.enabled:
+                # only notify current user of themselves. The Server Writer sends the players in their view
+                if user_info:
+                    self.send_player_update(user_info)
+            else:
+                # notify current user of all existing users, their scores and positions
+                for client in self.client_manager.active_clients:
+                    user = self.user_manager.get_user_by_client_id(client.client_id)
+                    if not user:
+                        continue
+                    self.send_player_update(user)
             # notify all other users of new user login
-            self.server_writer_service.dispatch_event(swe.ServerWriterEventLogin(user_info))
+            self.server_writer_service.dispatch_event(swe.ServerWriterEventLogin(user_info, self.client_info.client_id))
         elif isinstance(event, scwe.ServerClientWriterEventLogout):
-            self.server_writer_service.dispatch_event(swe.ServerWriterEventLogout(user_info))
+            self.server_writer_service.dispatch_event(swe.ServerWriterEventLogout(user_info, self.client_info.client_id))
         elif isinstance(event, scwe.ServerClientWriterEventMove):
             self.send_msg(200, 'move ' + str(event.direction))
 
-            self.server_writer_service.dispatch_event(swe.ServerWriterEventMove(user_info))
+            self.server_writer_service.dispatch_event(swe.ServerWriterEventMove(user_info, self.client_info.client_id))
+        elif isinstance(event, scwe.ServerClientWriterEventView):
+            self.send_msg(200, 'view ' + ('all' if event.full_view else 'near'))
+
+            self.server_writer_service.dispatch_event(swe.ServerWriterEventViewChange(user_info, self.client_info.client_id, event.full_view))
         elif isinstance(event, scwe.ServerClientWriterEventMap):
-            user_map = copy.deepcopy(self.server_game_logic.map)
             if not user_info or not user_info.position:
                 raise ValueError('User info was found to be incomplete or missing when sending map updates to client')
             x, y = user_info.position or (-1, -1)
-            user_map[y] = user_map[y][:x] + user_info.username[0].upper() + user_map[y][x+1:]
-            self.write_map(user_map)
+            self.write_map([(x, y, user_info.username[0].upper())])
         elif isinstance(event, scwe.ServerClientWriterEventCheatmap):
-            user_map = copy.deepcopy(self.server_game_logic.map)
-            
-            for treasure in self.server_game_logic.treasures:
+            overlays: list[tuple[int, int, str]] = []
+            for treasure in self.server_game_logic.treasures.values():
                 x, y = treasure.position
-                score = str(treasure.score)
-                user_map[y] = user_map[y][:x] + score + user_map[y][x+(len(score)):]
+                overlays.append((x, y, str(treasure.score)))
             if not user_info or not user_info:
                 raise ValueError('User info was found to be incomplete or missing when sending map updates to client')
             x, y = user_info.position or (-1, -1)
-            user_map[y] = user_map[y][:x] + user_info.username[0].upper() + user_map[y][x+1:]
-            self.write_map(user_map)
+            overlays.append((x, y, user_info.username[0].upper()))
+            self.write_map(overlays)
+            # cheaters keep getting every player's position
+            self.server_writer_service.dispatch_event(swe.ServerWriterEventViewChange(user_info, self.client_info.client_id, True))
         elif isinstance(event, scwe.ServerClientWriterEventTreasureFound):
             self.server_writer_service.dispatch_event(swe.ServerWriterEventTreasureFound(user_info, event.treasure))
         elif isinstance(event, scwe.ServerClientWriterEventTreasureNearby):
-            self.send_msg(102, f'{event.treasure.id}, {event.treasure.position[0]}, {event.treasure.position[1]}')
+            self.send_frame(ProtocolUtils.treasure_proximity(event.treasure))
         elif isinstance(event, scwe.ServerClientWriterEventInfo):
             self.send_msg(101, event.msg)
         elif isinstance(event, scwe.ServerClientWriterEventTreasureInfo):
             self.send_msg(103, event.msg)
+        elif isinstance(event, scwe.ServerClientWriterEventBroadcast):
+            self.send_frame(event.frame)
+        elif isinstance(event, scwe.ServerClientWriterEventProtocol):
+            if event.protocol == ProtocolEnum.BINARY:
+                # this is the last text response. Every response after it uses the binary protocol
+                self.send_msg(200, BinaryProtocolUtils.SWITCH_MSG)
+            self.client_info.protocol = event.protocol
         elif isinstance(event, scwe.ServerClientWriterEventSuccess):
             self.send_msg(200, event.msg)
         elif isinstance(event, scwe.ServerClientWriterEventUserError):
@@ -0,0 +1,34 @@
+import logging
+import traceback
+
+from common.services.serviceManager import ServiceManager
+from constants import SERVER_NAME
+from server.services.serverCommandService import ServerCommandService
+
+logger = logging.getLogger(SERVER_NAME)
+logger.setLevel(logging.INFO)
+
+
+class ServerCommandWorker(object):
+    '''A Server Command Worker runs the commands queued in the Server Command Service, one at a time, until the service is shut down.
+
+    The Server creates one Server Command Worker for each thread of the command pool and each must be initialized on its own thread.
+    '''
+    def __init__(self, service_manager: ServiceManager):
+        self.service_manager: ServiceManager = service_manager
+        self.server_command_service: ServerCommandService = self.service_manager.get_service(ServerCommandService)
+
+    def command_worker_handler(self) -> None:
+        while True:
+            next_command = self.server_command_service.next_command()
+            if next_command is None:
+                return
+
+            client_id, command = next_command
+            try:
+                command()
+            except Exception:
+                # commands report their own errors to the client, so this only keeps the worker alive
+                logger.error(f'Internal Exception: ' + traceback.format_exc())
+            finally:
+                self.server_command_service.finish_command(client_id)
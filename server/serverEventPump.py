@@ -0,0 +1,62 @@
+from queue import Empty
+from typing import Any, Callable
+
+from common.services.serviceManager import ServiceManager
+from common.utils.eventQueue import EventQueue
+from server.models.serverClient import ServerClient
+from server.serverClientWriter import OctothorpeServerClientWriter
+from server.serverWriter import ServerWriter
+from server.services.serverClientWriterManager import ServerClientWriterManager
+from server.services.serverWriterService import ServerWriterService
+
+
+class ServerEventPump(object):
+    '''The Server Event Pump drains the Server Writer queue and every Server Client Writer queue on the calling thread until no events are left.
+
+    This replaces the Server Writer thread and the per-client Server Client Writer threads for engines that run all clients on a single thread (e.g. the asyncio engine).
+    Only one instance of this object is created for the server and it must only be used from the thread that dispatches client commands.
+    '''
+    def __init__(self, service_manager: ServiceManager):
+        self.service_manager: ServiceManager = service_manager
+        self.server_writer_service: ServerWriterService = self.service_manager.get_service(ServerWriterService)
+        self.server_client_writer_manager: ServerClientWriterManager = self.service_manager.get_service(ServerClientWriterManager)
+
+        self.server_writer: ServerWriter = ServerWriter(self.service_manager)
+        self.client_writers: dict[str, OctothorpeServerClientWriter] = {}
+
+    def register_client(self, client_info: ServerClient) -> OctothorpeServerClientWriter:
+        client_writer = OctothorpeServerClientWriter(self.service_manager, client_info)
+        self.client_writers[client_info.client_id] = client_writer
+        return client_writer
+
+    def unregister_client(self, client_id: str) -> None:
+        self.client_writers.pop(client_id, None)
+        self.server_client_writer_manager.unregister_client(client_id)
+
+    def pump(self) -> int:
+        processed: int = 0
+        while True:
+            # events handled by a client writer may create server-wide events and vice versa, so keep draining until every queue is empty
+            drained: int = 0
+            for client_writer in list(self.client_writers.values()):
+                drained += self._drain(client_writer.server_client_writer_service.queue, client_writer.handle_event)
+            drained += self._drain(self.server_writer_service.queue, self.server_writer.handle_event)
+            if not drained:
+                # with the idle flush policy, each client's responses are only sent once every event is handled
+                for client_writer in list(self.client_writers.values()):
+                    client_writer.flush()
+                return processed
+            processed += drained
+
+    def _drain(self, queue: EventQueue[Any], handler: Callable[[Any], Any]) -> int:
+        drained: int = 0
+        while True:
+            try:
+                event = queue.get_nowait()
+            except Empty:
+                return drained
+            if event is None:
+                # the queue has been shut down
+                return drained
+            handler(event)
+            drained += 1
@@ -0,0 +1,194 @@
+import asyncio
+import itertools
+import logging
+import signal
+import socket
+import threading
+from asyncio import StreamReader, StreamWriter
+from multiprocessing.queues import Queue
+from typing import Any
+
+from common.utils.lineFramer import LineFramer, LineTooLongError
+from constants import (IO_WORKER_CHECK_INTERVAL, MAX_REQUEST_LENGTH,
+                       SERVER_NAME)
+from server.models.workerServerClientConnection import WorkerOutbox
+
+logger = logging.getLogger(SERVER_NAME)
+logger.setLevel(logging.INFO)
+
+# a batch of messages from an I/O worker to the game logic process, as (worker_id, conn_id, kind, payload) tuples in order. The kinds are:
+# 'open' with the client's address, 'data' with a list of complete requests, 'close' with None or an error to send the client before closing the connection
+# and 'backlog' with the bytes the connection holds unsent, whenever they cross the buffer limit
+WorkerInbox = list[tuple[int, int, str, Any]]
+
+
+class ServerIOWorker(object):
+    '''An I/O Worker accepts clients on the server port in its own process, alongside every other worker bound to the same port with SO_REUSEPORT.
+
+    It reads each client's input, splits it into requests and forwards complete requests to the game logic process, then writes back the responses it receives.
+    Messages in either direction are sent in batches: everything posted during one pass of the event loop goes out as a single queue item, and every write for the same client in a batch is joined into one.
+    With a buffer limit, the worker tells the game logic process when a client's unsent bytes reach the limit and when they fall back under it, so droppable events can be dropped for clients that stopped reading.
+    The worker is created by the Multiprocess Server and runs in a spawned process, so it must only hold objects that can be pickled until run is called.
+    '''
+    def __init__(self, worker_id: int, host: str, port: int, inbound: Queue, outbound: Queue, buffer_limit: int = 0) -> None:
+        self.worker_id: int = worker_id
+        self.host: str = host
+        self.port: int = port
+        self.inbound: Queue = inbound # shared by every worker, read by the game logic process
+        self.outbound: Queue = outbound # read by this worker only
+        self.buffer_limit: int = buffer_limit # 0 never reports a backlog
+
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.stopping: asyncio.Event | None = None
+        self.conn_ids: itertools.count[int] = itertools.count()
+        self.writers: dict[int, StreamWriter] = {} # connections the game logic process hasn't closed (key: conn_id)
+        self.inbox: WorkerInbox = []
+        self.over_limit: set[int] = set() # connections last reported at or over the buffer limit
+
+    def run(self) -> None:
+        logging.basicConfig()
+        # the game logic process shuts the workers down, so a Ctrl+C sent to the whole process group must not stop them first
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        asyncio.run(self.serve())
+
+    async def serve(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # every worker binds its own socket to the port and the kernel spreads new connections between them
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        # like asyncio.start_server, allow binding while connections from an earlier run are in TIME_WAIT
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((self.host, self.port))
+        except OSError:
+            logger.error(f'I/O worker {self.worker_id}: Bind failed on host {self.host} for port {self.port}')
+            sock.close()
+            return
+
+        server = await asyncio.start_server(self.handle_client, sock=sock)
+        receiver_thread = threading.Thread(target=self.receive_handler, daemon=True)
+        receiver_thread.start()
+        backlog_monitor: asyncio.Task[None] | None = asyncio.create_task(self.start_backlog_monitor()) if self.buffer_limit else None
+
+        await self.stopping.wait()
+        if backlog_monitor:
+            backlog_monitor.cancel()
+        server.close()
+        for writer in self.writers.values():
+            writer.close()
+        self.writers.clear()
+        # the game logic process may already be gone, so don't wait on it to read what's left in the queue
+        self.inbound.cancel_join_thread()
+
+    def receive_handler(self) -> None:
+        while True:
+            outbox: WorkerOutbox | None = self.outbound.get()
+            if self.loop is None or self.loop.is_closed():
+                return
+            self.loop.call_soon_threadsafe(self.write_outbox, outbox)
+            if outbox is None:
+                # the game logic process is shutting down
+                return
+
+    def post(self, conn_id: int, kind: str, payload: Any) -> None:
+        self.inbox.append((self.worker_id, conn_id, kind, payload))
+        if len(self.inbox) == 1 and self.loop:
+            self.loop.call_soon(self.flush_inbox)
+
+    async def start_backlog_monitor(self) -> None:
+        while True:
+            # buffers only drain while no responses are written, so connections over the limit are checked again on an interval
+            await asyncio.sleep(IO_WORKER_CHECK_INTERVAL)
+            for conn_id in list(self.over_limit):
+                self.check_backlog(conn_id)
+
+    def check_backlog(self, conn_id: int) -> None:
+        writer: StreamWriter | None = self.writers.get(conn_id)
+        if not writer:
+            self.over_limit.discard(conn_id)
+            return
+        backlog: int = writer.transport.get_write_buffer_size()
+        if (backlog >= self.buffer_limit) == (conn_id in self.over_limit):
+            return
+        if backlog >= self.buffer_limit:
+            self.over_limit.add(conn_id)
+        else:
+            self.over_limit.discard(conn_id)
+        self.post(conn_id, 'backlog', backlog)
+
+    def flush_inbox(self) -> None:
+        inbox, self.inbox = self.inbox, []
+        self.inbound.put(inbox)
+
+    def write_outbox(self, outbox: WorkerOutbox | None) -> None:
+        if outbox is None:
+            if self.stopping:
+                self.stopping.set()
+            return
+
+        pending: dict[int, list[bytes]] = {}
+        for conn_id, data in outbox:
+            if data:
+                pending.setdefault(conn_id, []).append(data)
+                continue
+            if data is not None:
+                # the game logic process gave up on a slow client. The connection is left for the client's reader, which reports the client as gone
+                pending.pop(conn_id, None)
+                aborted: StreamWriter | None = self.writers.get(conn_id)
+                if aborted:
+                    aborted.transport.abort()
+                continue
+            # the game logic process closed the connection, after every response queued before it
+            chunks: list[bytes] = pending.pop(conn_id, [])
+            writer: StreamWriter | None = self.writers.pop(conn_id, None)
+            if writer:
+                if chunks:
+                    writer.write(b''.join(chunks))
+                writer.close()
+
+        for conn_id, chunks in pending.items():
+            writer = self.writers.get(conn_id)
+            # responses for clients that already disconnected are dropped
+            if writer and not writer.is_closing():
+                writer.write(b''.join(chunks))
+                if self.buffer_limit:
+                    self.check_backlog(conn_id)
+
+    async def handle_client(self, reader: StreamReader, writer: StreamWriter) -> None:
+        conn_id: int = next(self.conn_ids)
+        self.writers[conn_id] = writer
+        self.post(conn_id, 'open', writer.get_extra_info('peername'))
+
+        line_framer = LineFramer(MAX_REQUEST_LENGTH, backspace=True)
+        error: str | None = None
+        try:
+            while True:
+                chunk: bytes = await reader.read(1024)
+                if not chunk:
+                    break
+
+                backspaces: int = line_framer.feed(chunk)
+                if backspaces:
+                    # handle backspace in telnet
+                    writer.write(b' \b' * backspaces) # The single space ' ' replaces char at cursor and '\b' moves cursor to the left within telnet
+                try:
+                    incoming_requests: list[str] = line_framer.lines()
+                except LineTooLongError as ex:
+                    error = str(ex)
+                    break
+                if incoming_requests:
+                    self.post(conn_id, 'data', incoming_requests)
+
+        except (ConnectionAbortedError, ConnectionResetError):
+            logger.error(f'Client unexpectedly disconnected at address {writer.get_extra_info("peername")}')
+        finally:
+            self.over_limit.discard(conn_id)
+            if error is not None:
+                # the game logic process sends the error to the client, then closes the connection
+                self.post(conn_id, 'close', error)
+            elif self.writers.pop(conn_id, None):
+                # a connection the game logic process closed was already removed, and it already knows the client is gone
+                self.post(conn_id, 'close', None)
+                writer.close()
@@ -0,0 +1,63 @@
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from common.services.serviceManager import ServiceManager
+from constants import SERVER_NAME
+from server.services.serverMetricsService import ServerMetricsService
+
+logger = logging.getLogger(SERVER_NAME)
+logger.setLevel(logging.INFO)
+
+
+class ServerMetricsRequestHandler(BaseHTTPRequestHandler):
+    '''Answers GET /metrics with the server's metrics in the Prometheus text format.'''
+    server: 'ServerMetricsHttpServer'
+
+    def do_GET(self) -> None:
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body: bytes = self.server.metrics_service.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # scrapes would otherwise be printed to stderr every few seconds
+        logger.debug(f'Metrics request from {self.address_string()}: {format % args}')
+
+
+class ServerMetricsHttpServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], metrics_service: ServerMetricsService) -> None:
+        self.metrics_service: ServerMetricsService = metrics_service
+        super().__init__(address, ServerMetricsRequestHandler)
+
+
+class ServerMetricsExporter(object):
+    '''The Metrics Exporter serves the Server Metrics Service at /metrics on a local HTTP port, for Prometheus to scrape.
+
+    It runs on its own daemon thread, so it works alongside every engine. Only one instance of this object is created for the server.
+    '''
+    def __init__(self, service_manager: ServiceManager, host: str, port: int) -> None:
+        self.metrics_service: ServerMetricsService = service_manager.get_service(ServerMetricsService)
+        self.host: str = host
+        self.port: int = port
+        self.http_server: ServerMetricsHttpServer | None = None
+
+    def start(self) -> bool:
+        try:
+            self.http_server = ServerMetricsHttpServer((self.host, self.port), self.metrics_service)
+        except OSError:
+            logger.error(f'Metrics bind failed on host {self.host} for port {self.port}')
+            return False
+
+        exporter_thread = threading.Thread(target=self.http_server.serve_forever, daemon=True)
+        exporter_thread.start()
+        logger.info(f'Serving metrics at http://{self.host}:{self.port}/metrics')
+        return True
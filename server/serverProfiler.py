@@ -0,0 +1,106 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from types import FrameType
+from typing import Any
+
+from common.services.serviceManager import ServiceManager
+from constants import (PROFILE_TOP_ALLOCATIONS, PROFILE_TOP_FUNCTIONS,
+                       SERVER_NAME)
+from server.services.serverCoreService import ServerCoreService
+from server.utils.fileUtils import FileUtils
+
+logger = logging.getLogger(SERVER_NAME)
+logger.setLevel(logging.INFO)
+
+
+class ServerProfiler(object):
+    '''The Server Profiler captures a profile of the running server when it receives a signal (SIGUSR1).
+
+    A capture dumps the stack of every thread, then runs cProfile and tracemalloc for a set number of seconds, or until the next signal.
+    Since Python 3.12, cProfile records the calls of every thread through sys.monitoring, not just those of the thread that enables it, so one profiler covers every reader, writer and pool thread.
+    The results are written to timestamped files in the profiles directory under the data directory.
+    Nothing is installed until a capture starts, so the server runs without any profiling overhead the rest of the time.
+    '''
+    def __init__(self, service_manager: ServiceManager, seconds: float) -> None:
+        root_path: str = service_manager.get_service(ServerCoreService).root_path
+        self.profile_dir: str = FileUtils.get_profile_dir(root_path)
+        self.seconds: float = seconds
+
+        self.lock: threading.Lock = threading.Lock()
+        self.stop_event: threading.Event | None = None # set while a capture is running
+
+    def sh_profile(self, signal: int, frame: FrameType | None) -> Any:
+        # signal handlers run on the main thread between bytecodes, so the capture runs on its own thread
+        with self.lock:
+            if self.stop_event is not None:
+                logger.info('Stopping the profile capture')
+                self.stop_event.set()
+                return
+            self.stop_event = threading.Event()
+        profiler_thread = threading.Thread(target=self.capture, args=(self.stop_event,), name='profiler', daemon=True)
+        profiler_thread.start()
+
+    def capture(self, stop_event: threading.Event) -> None:
+        prefix: str = os.path.join(self.profile_dir, time.strftime('%Y%m%d-%H%M%S'))
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            self.dump_stacks(f'{prefix}-stacks.txt')
+
+            logger.info(f'Profiling the server for {self.seconds:g} seconds (send the signal again to stop early)')
+            tracing_memory: bool = not tracemalloc.is_tracing()
+            if tracing_memory:
+                tracemalloc.start()
+            start_snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+            profiler: cProfile.Profile = cProfile.Profile()
+            profiler.enable()
+            try:
+                stop_event.wait(self.seconds)
+            finally:
+                profiler.disable()
+                end_snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+                if tracing_memory:
+                    tracemalloc.stop()
+
+            self.write_profile(profiler, prefix)
+            self.write_allocations(start_snapshot, end_snapshot, f'{prefix}-memory.txt')
+            logger.info(f'Wrote the profile capture to {prefix}-*')
+        except Exception as ex:
+            logger.error(f'Profile capture failed: {ex}')
+        finally:
+            with self.lock:
+                self.stop_event = None
+
+    def dump_stacks(self, filepath: str) -> None:
+        '''Writes the current stack of every thread.'''
+        thread_names: dict[int | None, str] = {thread.ident: thread.name for thread in threading.enumerate()}
+        with open(filepath, 'w', encoding='utf-8') as f:
+            for thread_id, frame in sys._current_frames().items():
+                f.write(f'Thread {thread_names.get(thread_id, "unknown")} ({thread_id}):\n')
+                f.writelines(traceback.format_stack(frame))
+                f.write('\n')
+
+    def write_profile(self, profiler: cProfile.Profile, prefix: str) -> None:
+        '''Writes the raw stats, for pstats or snakeviz, and the functions with the most cumulative time as text.'''
+        profiler.dump_stats(f'{prefix}-profile.pstats')
+        text = io.StringIO()
+        stats = pstats.Stats(profiler, stream=text)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP_FUNCTIONS)
+        with open(f'{prefix}-profile.txt', 'w', encoding='utf-8') as f:
+            f.write(text.getvalue())
+
+    def write_allocations(self, start_snapshot: tracemalloc.Snapshot, end_snapshot: tracemalloc.Snapshot, filepath: str) -> None:
+        '''Writes the lines whose allocated memory grew the most during the capture.'''
+        diffs: list[tracemalloc.StatisticDiff] = end_snapshot.compare_to(start_snapshot, 'lineno')
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(f'Allocated memory growth during the capture: {sum(diff.size_diff for diff in diffs) / 1024:.1f} KiB\n\n')
+            f.write(f'Top {PROFILE_TOP_ALLOCATIONS} lines by allocated memory growth:\n')
+            for diff in diffs[:PROFILE_TOP_ALLOCATIONS]:
+                f.write(f'{diff}\n')
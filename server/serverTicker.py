@@ -0,0 +1,29 @@
+import threading
+import time
+
+import server.models.serverWriterEvent as swe
+from common.services.serviceManager import ServiceManager
+from server.services.serverWriterService import ServerWriterService
+
+
+class ServerTicker(object):
+    '''The Server Ticker places a tick event into the Server Writer queue at the Server Writer Service's tick rate. On each tick, the Server Writer sends the moves held since the previous tick.
+
+    The Server Ticker should only be created once on the server, when a tick rate is set, and must be initialized on its own thread.
+    '''
+    def __init__(self, service_manager: ServiceManager):
+        self.service_manager: ServiceManager = service_manager
+        self.server_writer_service: ServerWriterService = self.service_manager.get_service(ServerWriterService)
+
+        self.stop_event: threading.Event = threading.Event()
+
+    def ticker_handler(self) -> None:
+        interval: float = 1 / self.server_writer_service.tick_rate
+        next_tick: float = time.perf_counter() + interval
+        # ticks are scheduled from a fixed start time so the rate doesn't drift by the time spent dispatching each tick
+        while not self.stop_event.wait(max(0, next_tick - time.perf_counter())):
+            self.server_writer_service.dispatch_event(swe.ServerWriterEventTick())
+            next_tick += interval
+
+    def shutdown(self) -> None:
+        self.stop_event.set()
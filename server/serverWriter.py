@@ -3,13 +3,19 @@ import time
 
 import server.models.serverClientWriterEvent as scwe
 import server.models.serverWriterEvent as swe
+from common.models.protocol import PlayerStatusEnum
+from common.models.user import OctothorpeUser
 from common.services.serviceBase import ServiceBase
 from common.services.serviceManager import ServiceManager
-from constants import POLLING_INTERVAL, SERVER_NAME
+from constants import SERVER_NAME
+from server.models.serverFrame import ServerFrame
 from server.services.serverClientManager import ServerClientManager
 from server.services.serverClientWriterManager import ServerClientWriterManager
+from server.services.serverInterestManager import ServerInterestManager
+from server.services.serverMetricsService import ServerMetricsService
 from server.services.serverUserManager import ServerUserManager
 from server.services.serverWriterService import ServerWriterService
+from server.utils.protocolUtils import ProtocolUtils
 
 logger = logging.getLogger(SERVER_NAME)
 logger.setLevel(logging.INFO)
@@ -24,6 +30,10 @@ class ServerWriter(ServiceBase):
     * Any user collects a treasure
     * Any user moves
     * Any user logs in or quits
+
+    Each notification is encoded once per protocol and the same frame is handed to every client.
+    When interest management is enabled, moves are only sent to clients that can see the mover. Clients are sent a player's position when that player comes into view and a position of (-1, -1) when they leave view.
+    When a tick rate is set, moves are held until the next tick. Each player is then sent once at their latest position and each client gets a single frame for the whole tick.
     '''
     def __init__(self, service_manager: ServiceManager):
         self.service_manager: ServiceManager = service_manager
@@ -31,55 +41,189 @@ class ServerWriter(ServiceBase):
         self.server_writer_service: ServerWriterService = self.service_manager.get_service(ServerWriterService)
         self.server_client_writer_manager: ServerClientWriterManager = self.service_manager.get_service(ServerClientWriterManager)
         self.client_manager: ServerClientManager = self.service_manager.get_service(ServerClientManager)
+        self.interest_manager: ServerInterestManager = self.service_manager.get_service(ServerInterestManager)
+        self.metrics_service: ServerMetricsService = self.service_manager.get_service(ServerMetricsService)
+
+        self.pending_moves: dict[str, OctothorpeUser] = {} # moves held until the next tick (key: client_id, val: user)
+        self.batch: dict[str, list[ServerFrame]] | None = None # frames collected per client while a tick is flushed
 
     def server_writer_handler(self) -> None:
-        while True:
-            if self.server_writer_service.queue.qsize() != 0:
-                event = self.server_writer_service.queue.get()
-                self.execute_cmd(event)
-            else:
-                # this allows the server to poll for outgoing messages only every 100ms, but allow the queue of events to be processed instantaneously
-                time.sleep(POLLING_INTERVAL)
+        # blocks until the next event arrives and returns once the Server Writer Service is shut down
+        for event in self.server_writer_service.queue:
+            self.handle_event(event)
+
+    def handle_event(self, event: swe.ServerWriterEventBase) -> None:
+        '''Handles an event taken from the Server Writer queue.'''
+        self.execute_cmd(event)
+        self.metrics_service.server_writer_event_seconds.observe(time.perf_counter() - self.server_writer_service.queue.last_enqueued_at, event.key.name)
 
     def execute_cmd(self, event: swe.ServerWriterEventBase) -> None:
         if isinstance(event, swe.ServerWriterEventLogin):
             user = event.user
             if not user or not user.position:
                 return
-            for client in self.client_manager.active_clients:
-                client_user = self.user_manager.get_user_by_client_id(client.client_id)
-                # ensure a message about the user joining the game is not send to the user themselves
-                if not client_user or client_user == user:
-                    continue
-                server_client_writer_service = self.server_client_writer_manager.get_writer_service(client.client_id)
-                server_client_writer_service.dispatch_event(
-                    scwe.ServerClientWriterEventInfo(f'{user.username}, {user.position[0]}, {user.position[1]}, {user.score}, joined the game')
-                )
+            join_frame: ServerFrame = self.player_frame(user, status=PlayerStatusEnum.JOINED)
+            if self.interest_manager.enabled and event.client_id:
+                self.login_in_view(user, event.client_id, join_frame)
+                return
+            # ensure a message about the user joining the game is not send to the user themselves
+            self.broadcast(join_frame, exclude_user=user)
         elif isinstance(event, swe.ServerWriterEventLogout):
             user = event.user
+            if event.client_id:
+                self.pending_moves.pop(event.client_id, None)
+                self.interest_manager.remove_client(event.client_id)
             if not user:
                 return
-            for client in self.client_manager.active_clients:
-                server_client_writer_service = self.server_client_writer_manager.get_writer_service(client.client_id)
-                server_client_writer_service.dispatch_event(
-                    scwe.ServerClientWriterEventInfo(f'{user.username}, -1, -1, {user.score}, left the game')
-                )
+            self.broadcast(self.player_frame(user, (-1, -1), PlayerStatusEnum.LEFT))
         elif isinstance(event, swe.ServerWriterEventMove):
             user = event.user
             if not user or not user.position:
                 return
-            for client in self.client_manager.active_clients:
-                server_client_writer_service = self.server_client_writer_manager.get_writer_service(client.client_id)
-                server_client_writer_service.dispatch_event(
-                    scwe.ServerClientWriterEventInfo(f'{user.username}, {user.position[0]}, {user.position[1]}, {user.score}')
-                )
+            if self.server_writer_service.tick_rate and event.client_id:
+                # only the latest position of each player is sent on the next tick
+                self.pending_moves[event.client_id] = user
+                return
+            self.send_move(user, event.client_id)
+        elif isinstance(event, swe.ServerWriterEventTick):
+            self.flush_moves()
+        elif isinstance(event, swe.ServerWriterEventViewChange):
+            self.change_view(event.client_id, event.full_view)
         elif isinstance(event, swe.ServerWriterEventTreasureFound):
             user = event.user
             treasure = event.treasure
             if not user:
                 return
-            for client in self.client_manager.active_clients:
+            self.broadcast(ProtocolUtils.treasure_update(self.user_manager.get_player_id(user), user.username, treasure))
+
+    def send_move(self, user: OctothorpeUser, client_id: str | None) -> None:
+        if not user.position:
+            return
+        move_frame: ServerFrame = self.player_frame(user)
+        if self.interest_manager.enabled and client_id:
+            self.move_in_view(user, client_id, move_frame)
+            return
+        self.broadcast(move_frame)
+
+    def flush_moves(self) -> None:
+        if not self.pending_moves:
+            return
+        pending_moves: dict[str, OctothorpeUser] = self.pending_moves
+        self.pending_moves = {}
+
+        if not self.interest_manager.enabled:
+            # every client gets every move, so the whole tick is a single frame
+            tick_frame: ServerFrame | None = self.batch_or_none([self.player_frame(user) for user in pending_moves.values() if user.position])
+            if tick_frame:
+                self.broadcast(tick_frame)
+            return
+
+        self.batch = {}
+        try:
+            for client_id, user in pending_moves.items():
+                self.send_move(user, client_id)
+            batch: dict[str, list[ServerFrame]] = self.batch
+        finally:
+            self.batch = None
+        for client_id, frames in batch.items():
+            self.send_to({client_id}, ServerFrame.batch(frames))
+
+    def player_frame(self, user: OctothorpeUser, position: tuple[int, int] | None = None, status: PlayerStatusEnum = PlayerStatusEnum.UPDATE) -> ServerFrame:
+        '''Builds a player update for the user at the given position, or their current position if none is given.'''
+        return ProtocolUtils.player_update(
+            self.user_manager.get_player_id(user), user.username, position or user.position or (-1, -1), user.score, status
+        )
+
+    def broadcast(self, frame: ServerFrame, exclude_user: OctothorpeUser | None = None) -> None:
+        '''Hands the same frame to every active client. If exclude_user is given, the frame is only sent to other logged-in users.'''
+        event = scwe.ServerClientWriterEventBroadcast(frame)
+        for client in self.client_manager.active_clients:
+            if exclude_user:
+                client_user = self.user_manager.get_user_by_client_id(client.client_id)
+                if not client_user or client_user == exclude_user:
+                    continue
+            try:
                 server_client_writer_service = self.server_client_writer_manager.get_writer_service(client.client_id)
-                server_client_writer_service.dispatch_event(
-                    scwe.ServerClientWriterEventTreasureInfo(f'{user.username}, {treasure.id}, {treasure.score}')
-                )
+            except ValueError:
+                # the client disconnected after the snapshot of active clients was taken
+                continue
+            server_client_writer_service.dispatch_event(event)
+
+    def send_to(self, client_ids: set[str], frame: ServerFrame | None) -> None:
+        '''Hands the same frame to each of the given clients.'''
+        if not frame:
+            return
+        if self.batch is not None:
+            # a tick is being flushed, so the frame is sent with the rest of the client's frames for the tick
+            for client_id in client_ids:
+                self.batch.setdefault(client_id, []).append(frame)
+            return
+        event = scwe.ServerClientWriterEventBroadcast(frame)
+        for client_id in client_ids:
+            try:
+                server_client_writer_service = self.server_client_writer_manager.get_writer_service(client_id)
+            except ValueError:
+                # the client disconnected after it was last seen by the Interest Manager
+                continue
+            server_client_writer_service.dispatch_event(event)
+
+    def player_frames(self, client_ids: set[str], hidden: bool = False) -> list[ServerFrame]:
+        '''Builds one player update per client's user. Hidden players are sent with a position of (-1, -1) so clients remove them from the map.'''
+        frames: list[ServerFrame] = []
+        for client_id in client_ids:
+            user = self.user_manager.get_user_by_client_id(client_id)
+            if not user or not user.position:
+                continue
+            frames.append(self.player_frame(user, (-1, -1) if hidden else None))
+        return frames
+
+    def login_in_view(self, user: OctothorpeUser, client_id: str, join_frame: ServerFrame) -> None:
+        if not user.position:
+            return
+        in_view, _, _ = self.interest_manager.update_position(client_id, user.position)
+
+        # every other user is told about the login, but only users that can see the new user are told where they are
+        hidden_join_frame: ServerFrame = self.player_frame(user, (-1, -1), PlayerStatusEnum.JOINED)
+        seen_by: set[str] = set()
+        unseen_by: set[str] = set()
+        for client in self.client_manager.active_clients:
+            if client.client_id == client_id or not self.user_manager.get_user_by_client_id(client.client_id):
+                continue
+            if client.client_id in in_view or self.interest_manager.is_full_view(client.client_id):
+                seen_by.add(client.client_id)
+            else:
+                unseen_by.add(client.client_id)
+        self.send_to(seen_by, join_frame)
+        self.send_to(unseen_by, hidden_join_frame)
+
+        # notify the new user of the users in their view
+        self.send_to({client_id}, self.batch_or_none(self.player_frames(in_view)))
+
+    def move_in_view(self, user: OctothorpeUser, client_id: str, move_frame: ServerFrame) -> None:
+        if not user.position:
+            return
+        in_view, entered, left = self.interest_manager.update_position(client_id, user.position)
+
+        # the mover, the users that can see them and users with the full view get the new position
+        self.send_to(in_view | self.interest_manager.full_view_clients | {client_id}, move_frame)
+        left_observers: set[str] = left - self.interest_manager.full_view_clients
+        if left_observers:
+            self.send_to(left_observers, self.player_frame(user, (-1, -1)))
+
+        # the mover gets the users that came into or left their own view
+        if not self.interest_manager.is_full_view(client_id):
+            self.send_to({client_id}, self.batch_or_none(self.player_frames(entered) + self.player_frames(left, hidden=True)))
+
+    def change_view(self, client_id: str, full_view: bool) -> None:
+        if not self.interest_manager.enabled or self.interest_manager.is_full_view(client_id) == full_view:
+            return
+        self.interest_manager.set_full_view(client_id, full_view)
+
+        others: set[str] = {client.client_id for client in self.client_manager.active_clients if client.client_id != client_id}
+        if full_view:
+            self.send_to({client_id}, self.batch_or_none(self.player_frames(others)))
+        else:
+            self.send_to({client_id}, self.batch_or_none(self.player_frames(others - self.interest_manager.get_visible(client_id), hidden=True)))
+
+    def batch_or_none(self, frames: list[ServerFrame]) -> ServerFrame | None:
+        return ServerFrame.batch(frames) if frames else None
@@ -1,5 +1,6 @@
 import logging
-from socket import socket
+import threading
+from socket import SHUT_RDWR, socket
 
 from common.services.serviceBase import ServiceBase
 from constants import SERVER_NAME
@@ -9,20 +10,43 @@ logger = logging.getLogger(SERVER_NAME)
 logger.setLevel(logging.INFO)
 
 class ServerClientManager(ServiceBase):
+    '''Keeps the registry of connected clients, keyed by client id.
+
+    Broadcast loops on other threads iterate an immutable snapshot of the active clients, so they never see the registry change underneath them.
+    A connect or disconnect only drops the current snapshot. The next read rebuilds it once, so churn stays O(1) per change.
+    '''
     def __init__(self) -> None:
-        self.active_clients: list[ServerClient] = [] # active, connected clients
+        self.lock: threading.Lock = threading.Lock()
+        self.clients: dict[str, ServerClient] = {} # active, connected clients (key: client_id)
+        self._snapshot: tuple[ServerClient, ...] | None = ()
+
+    @property
+    def active_clients(self) -> tuple[ServerClient, ...]:
+        '''An immutable snapshot of the connected clients, in the order they connected.'''
+        snapshot: tuple[ServerClient, ...] | None = self._snapshot
+        if snapshot is None:
+            with self.lock:
+                if self._snapshot is None:
+                    self._snapshot = tuple(self.clients.values())
+                snapshot = self._snapshot
+        return snapshot
 
     def get_client_by_client_id(self, client_id: str) -> ServerClient | None:
-        return next((c for c in self.active_clients if c.client_id == client_id), None)
+        return self.clients.get(client_id)
 
     def initialize_client(self, conn: socket, addr: str) -> ServerClient:
         new_client = ServerClient(conn, addr)
-        self.active_clients.append(new_client)
+        with self.lock:
+            self.clients[new_client.client_id] = new_client
+            self._snapshot = None
 
         return new_client
 
     def disconnect_client(self, client_id: str) -> None:
-        client = self.get_client_by_client_id(client_id)
+        with self.lock:
+            client = self.clients.pop(client_id, None)
+            if client:
+                self._snapshot = None
         if client:
             try:
                 client.conn.close()
@@ -30,11 +54,19 @@ class ServerClientManager(ServiceBase):
             except OSError as os_error:
                 logger.error(
                     f'Received error while attempting to close client connection for addr: {client.addr}, msg: {str(os_error)}')
-
-            self.active_clients.remove(client)
         else:
             logger.error(f'Active client with client_id \'{client_id}\' attempted uninitialization, but could not be found')
 
+    def shutdown_client(self, client_id: str) -> None:
+        '''Ends a client's connection without unregistering the client. Its reader then sees the end of the stream and logs the client out as usual, and a writer blocked on the socket gets an error.'''
+        client = self.clients.get(client_id)
+        if not client:
+            return
+        try:
+            client.conn.shutdown(SHUT_RDWR)
+        except OSError as os_error:
+            logger.error(f'Received error while attempting to shut down client connection for addr: {client.addr}, msg: {str(os_error)}')
+
     def disconnect_all_clients(self) -> bool:
         try:
             for client in self.active_clients:
@@ -43,4 +75,4 @@ class ServerClientManager(ServiceBase):
             logger.error(f'Failed to close all clients: {ex}')
             return False
 
-        return True
\ No newline at end of file
+        return True
@@ -1,24 +1,61 @@
+import logging
+
 from common.services.serviceBase import ServiceBase
 from common.services.serviceManager import ServiceManager
+from constants import SERVER_NAME, SLOW_CLIENT_TIMEOUT
+from server.services.serverClientManager import ServerClientManager
 from server.services.serverClientWriterService import ServerClientWriterService
 
+logger = logging.getLogger(SERVER_NAME)
+logger.setLevel(logging.INFO)
+
 
 class ServerClientWriterManager(ServiceBase):
-    def __init__(self, service_manager: ServiceManager) -> None:
+    def __init__(self, service_manager: ServiceManager, queue_limit: int = 0, slow_timeout: float = SLOW_CLIENT_TIMEOUT, buffer_limit: int = 0) -> None:
         self.service_manager: ServiceManager = service_manager
+        self.client_manager: ServerClientManager = self.service_manager.get_service(ServerClientManager)
+        self.queue_limit: int = queue_limit # events each client writer may fall behind by. 0 never drops an event
+        self.slow_timeout: float = slow_timeout # in seconds a client writer may stay at the queue or buffer limit before the client is disconnected
+        self.buffer_limit: int = buffer_limit # unsent bytes each client connection may hold before events are dropped, for engines that write without blocking. 0 never drops an event
 
         self.client_writer_services: dict[str, ServerClientWriterService] = {}
 
     def register_client(self, client_id: str) -> ServerClientWriterService:
-        client_writer_service: ServerClientWriterService = ServerClientWriterService()
+        client_writer_service: ServerClientWriterService = ServerClientWriterService(self.queue_limit, self.slow_timeout, self.buffer_limit)
         self.client_writer_services[client_id] = client_writer_service
 
         return client_writer_service
 
+    def unregister_client(self, client_id: str) -> None:
+        self.client_writer_services.pop(client_id, None)
+
+    def shutdown_all(self) -> None:
+        for client_writer_service in list(self.client_writer_services.values()):
+            client_writer_service.shutdown()
+
     def get_writer_service(self, client_id: str) -> ServerClientWriterService:
         if client_id in self.client_writer_services.keys():
             return self.client_writer_services[client_id]
         
         raise ValueError(f'Client Writer Service cannot be found for client id {client_id}')
 
-
+    def queue_stats(self) -> dict[str, dict[str, int]]:
+        '''Returns the writer queue stats of every client (key: client_id).'''
+        return {client_id: client_writer_service.queue_stats() for client_id, client_writer_service in list(self.client_writer_services.items())}
+
+    def check_slow_clients(self) -> None:
+        '''Disconnects every client that has stayed at the writer queue or buffer limit for longer than the timeout. Called on an interval, so clients that stopped getting events are found too.'''
+        for client_id, client_writer_service in list(self.client_writer_services.items()):
+            client = self.client_manager.get_client_by_client_id(client_id)
+            # the connections of engines that write without blocking report how many bytes they hold unsent
+            backlog: int = client.conn.backlog() if self.buffer_limit and client else 0 # pyright: ignore[reportAttributeAccessIssue]
+            if client_writer_service.check_slow(backlog):
+                self.disconnect_slow_client(client_id)
+
+    def disconnect_slow_client(self, client_id: str) -> None:
+        client = self.client_manager.get_client_by_client_id(client_id)
+        if not client:
+            return
+        behind: str = f'{self.queue_limit} events' if self.queue_limit else f'{self.buffer_limit} bytes'
+        logger.warning(f'Client at addr {client.addr} has been {behind} behind for over {self.slow_timeout}s and will be disconnected')
+        self.client_manager.shutdown_client(client_id)
@@ -1,14 +1,71 @@
-from queue import Queue
+import threading
+import time
 
+from common.utils.eventQueue import EventQueue
+from constants import SLOW_CLIENT_TIMEOUT
 from server.models.serverClientWriterEvent import ServerClientWriterEventBase
+from server.models.serverClientWriterQueue import ServerClientWriterQueue
 
 
 class ServerClientWriterService():
     '''This service does not inherit ServiceBase as it functions *like* a service, but should not be registered in the ServiceManager.
     Instances of this class are created by the ServerClientWriterManager.
+
+    With a queue limit, the queue is a Server Client Writer Queue that bounds the client's backlog. Otherwise it holds every event.
+    With a buffer limit, the backlog is the bytes the client's connection holds unsent instead, as engines that write without blocking never let the queue build up.
     '''
-    def __init__(self) -> None:
-        self.queue: Queue[ServerClientWriterEventBase] = Queue()
+    def __init__(self, queue_limit: int = 0, slow_timeout: float = SLOW_CLIENT_TIMEOUT, buffer_limit: int = 0) -> None:
+        self.queue: EventQueue[ServerClientWriterEventBase] = (
+            ServerClientWriterQueue(queue_limit, slow_timeout) if queue_limit else EventQueue()
+        )
+        self.slow_timeout: float = slow_timeout
+        self.buffer_limit: int = buffer_limit
+        self.over_limit_since: float | None = None # on the time.perf_counter() clock
+        self.slow: bool = False
+        self.dropped: int = 0 # events dropped at the buffer limit
+        # set by the client writer once it has handled its last event
+        self.stopped: threading.Event = threading.Event()
+
+        # only updated by the client writer
+        self.events_written: int = 0
+        self.syscalls: int = 0
+        self.bytes_sent: int = 0
 
     def dispatch_event(self, event: ServerClientWriterEventBase) -> None:
-        self.queue.put(event)
\ No newline at end of file
+        self.queue.put(event)
+
+    def drop_event(self, backlog: int) -> bool:
+        '''Returns True if a droppable event should be dropped, as the client's connection holds at least the buffer limit in unsent bytes.'''
+        if backlog < self.buffer_limit:
+            return False
+        self.dropped += 1
+        return True
+
+    def record_output(self, events: int, syscalls: int, bytes_sent: int) -> None:
+        self.events_written += events
+        self.syscalls += syscalls
+        self.bytes_sent += bytes_sent
+
+    def queue_stats(self) -> dict[str, int]:
+        '''Returns the queue's current and peak depth, and how many events were replaced by a later update or dropped.'''
+        if isinstance(self.queue, ServerClientWriterQueue):
+            return self.queue.queue_stats()
+        return {'depth': self.queue.qsize(), 'peak_depth': 0, 'coalesced': 0, 'dropped': self.dropped, 'slow': int(self.slow)}
+
+    def check_slow(self, backlog: int = 0) -> bool:
+        '''Returns True the first time the client is found to have stayed at the queue limit, or the buffer limit with the given backlog, for longer than the timeout.'''
+        if isinstance(self.queue, ServerClientWriterQueue):
+            return self.queue.check_slow()
+        if not self.buffer_limit or backlog < self.buffer_limit:
+            self.over_limit_since = None
+            return False
+        now: float = time.perf_counter()
+        if self.over_limit_since is None:
+            self.over_limit_since = now
+        if self.slow or now - self.over_limit_since < self.slow_timeout:
+            return False
+        self.slow = True
+        return True
+
+    def shutdown(self) -> None:
+        self.queue.close()
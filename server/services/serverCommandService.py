@@ -0,0 +1,99 @@
+import threading
+from collections import deque
+from typing import Callable
+
+from common.services.serviceBase import ServiceBase
+
+# a client's requests, ready to be processed
+Command = Callable[[], None]
+
+
+class ServerCommandService(ServiceBase):
+    '''Queues client commands for the command pool, a fixed number of Server Command Worker threads, so the commands running at once are bounded no matter how many clients connect.
+
+    Each client's commands run one at a time, in the order they were queued. A client with queued commands holds at most one place in the run queue and goes back to the end of it after each command,
+    so clients take turns and one busy client can't hold up the rest. Queueing blocks once a client has queue_limit commands waiting, which stops its reader from reading any further ahead.
+    '''
+    def __init__(self, pool_size: int = 0, queue_limit: int = 32) -> None:
+        self.pool_size: int = pool_size # 0 runs every command on its client's reader thread
+        self.queue_limit: int = queue_limit
+
+        self.lock: threading.Lock = threading.Lock()
+        self.work_available: threading.Condition = threading.Condition(self.lock)
+        self.client_changed: threading.Condition = threading.Condition(self.lock)
+        self.client_queues: dict[str, deque[Command]] = {} # (key: client_id)
+        self.run_queue: deque[str] = deque() # clients with queued commands and none running, in turn order
+        self.running_clients: set[str] = set()
+        self.stopped: bool = False
+
+        self.queued: int = 0
+        self.running: int = 0
+        self.completed: int = 0
+        self.peak_queued: int = 0
+
+    def submit(self, client_id: str, command: Command) -> bool:
+        '''Queues a command behind the client's earlier commands, waiting for room if the client is at its queue limit. Returns False if the pool has been shut down.'''
+        with self.lock:
+            client_queue: deque[Command] = self.client_queues.setdefault(client_id, deque())
+            while len(client_queue) >= self.queue_limit and not self.stopped:
+                self.client_changed.wait()
+            if self.stopped:
+                return False
+
+            client_queue.append(command)
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+            if len(client_queue) == 1 and client_id not in self.running_clients:
+                self.run_queue.append(client_id)
+                self.work_available.notify()
+            return True
+
+    def next_command(self) -> tuple[str, Command] | None:
+        '''Waits for the next command to run, returning None once the pool has been shut down.'''
+        with self.lock:
+            while not self.run_queue and not self.stopped:
+                self.work_available.wait()
+            if self.stopped:
+                return None
+
+            client_id: str = self.run_queue.popleft()
+            command: Command = self.client_queues[client_id].popleft()
+            self.queued -= 1
+            self.running += 1
+            self.running_clients.add(client_id)
+            self.client_changed.notify_all()
+            return client_id, command
+
+    def finish_command(self, client_id: str) -> None:
+        with self.lock:
+            self.running -= 1
+            self.completed += 1
+            self.running_clients.discard(client_id)
+            if self.client_queues.get(client_id):
+                self.run_queue.append(client_id)
+                self.work_available.notify()
+            self.client_changed.notify_all()
+
+    def unregister_client(self, client_id: str) -> None:
+        '''Waits for every command the client queued to finish, then forgets the client.'''
+        with self.lock:
+            while (self.client_queues.get(client_id) or client_id in self.running_clients) and not self.stopped:
+                self.client_changed.wait()
+            self.client_queues.pop(client_id, None)
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                'pool_size': self.pool_size,
+                'queued': self.queued,
+                'running': self.running,
+                'completed': self.completed,
+                'peak_queued': self.peak_queued,
+                'clients': len(self.client_queues)
+            }
+
+    def shutdown(self) -> None:
+        with self.lock:
+            self.stopped = True
+            self.work_available.notify_all()
+            self.client_changed.notify_all()
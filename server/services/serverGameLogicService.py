@@ -1,12 +1,21 @@
+import logging
 import math
 import random
+import time
 
 from common.models.game.treasure import Treasure
 from common.services.serviceBase import ServiceBase
 from common.services.serviceManager import ServiceManager
+from constants import SERVER_NAME
+from server.models.spatialGrid import SpatialGrid
+from server.models.treasurePlacer import TreasurePlacer
+from server.models.treasureProximityField import TreasureProximityField
+from server.models.worldGrid import WorldGrid
 from server.services.serverCoreService import ServerCoreService
 from server.utils.fileUtils import FileUtils
 
+logger = logging.getLogger(SERVER_NAME)
+logger.setLevel(logging.INFO)
 
 class ServerGameLogicService(ServiceBase):
     '''The Server Game Logic class is responsible for managing all server-wide, non-client-specific game logic.
@@ -16,45 +25,68 @@ class ServerGameLogicService(ServiceBase):
     NUM_TREASURES: int = 15
     TREASURE_BOUNDARY: int = 3
     TREASURE_FOW: int = 5
+    TREASURE_PLACEMENT_BUDGET: float = 1.0 # seconds
 
-    def __init__(self, service_manager: ServiceManager):
+    def __init__(self, service_manager: ServiceManager, proximity_field: bool = True):
         self.service_manager: ServiceManager = service_manager
         self.server_core_service: ServerCoreService = self.service_manager.get_service(ServerCoreService)
 
         root_path: str = self.server_core_service.root_path
         self.map_filepath: str = FileUtils.get_map_filepath(root_path)
 
-        self.map: list[str] = self._load_map_from_file(self.map_filepath)
-        self.spawnpoint: tuple[int, int] = (1,1)
-        for line_idx in range(len(self.map)):
-            if 'S' in self.map[line_idx]:
-                sp_pos = self.map[line_idx].index('S')
-                self.spawnpoint = (sp_pos, line_idx)
+        self.map: WorldGrid = WorldGrid.from_file(self.map_filepath)
+        self.spawnpoint: tuple[int, int] = self.map.find_last('S') or (1,1)
 
-        self.treasures: list[Treasure] = self._generate_treasures()
+        self.treasures: dict[int, Treasure] = {}
+        # treasures bucketed by position, so proximity queries only visit the treasures around a position
+        self.treasure_index: SpatialGrid[Treasure] = SpatialGrid(self.TREASURE_FOW)
+        # the treasures near every cell, precomputed so each move is a single lookup
+        self.proximity_field: TreasureProximityField | None = TreasureProximityField(self.map, self.TREASURE_FOW) if proximity_field else None
+        for treasure in self._generate_treasures():
+            self.add_treasure(treasure)
+        if self.proximity_field is not None:
+            logger.info(f'Treasure proximity field covers {len(self.proximity_field)} cells using about {self.proximity_field.memory_usage() / 1024:.1f} KiB')
 
-    def _load_map_from_file(self, filename: str) -> list[str]:
-        with open(filename, 'r', encoding='utf-8') as map_f:
-            return map_f.readlines()
+    def add_treasure(self, treasure: Treasure) -> None:
+        self.treasures[treasure.id] = treasure
+        self.treasure_index.update(treasure, treasure.position)
+        if self.proximity_field is not None:
+            self.proximity_field.add(treasure)
 
-    def _generate_treasures(self) -> list[Treasure]:
+    def remove_treasure(self, treasure: Treasure) -> None:
+        self.treasures.pop(treasure.id, None)
+        self.treasure_index.remove(treasure)
+        if self.proximity_field is not None:
+            self.proximity_field.remove(treasure)
+
+    def _generate_treasures(self, rng: random.Random | None = None) -> list[Treasure]:
+        '''Places the treasures and picks their scores. A seeded rng makes the placement repeatable.'''
         if not self.map: raise ValueError('map must be generated before treasures can be created!')
+        rng = rng or random.Random()
 
-        new_treasures: list[Treasure] = []
-        while len(new_treasures) <= self.NUM_TREASURES:
-            x: int = random.randrange(1, len(self.map[0])-1)
-            y: int = random.randrange(1, len(self.map)-1)
-            distance_to_nearest_treasure: float = self.distance_nearest_treasure((x,y), new_treasures)
-            if self.map[y][x] == ' ' and (distance_to_nearest_treasure > self.TREASURE_BOUNDARY or distance_to_nearest_treasure == -1):
-                new_treasure = Treasure(
-                    len(new_treasures), (x,y), random.randint(1, self.NUM_TREASURES)
-                )
-                new_treasures.append(new_treasure)
-        return new_treasures
+        start: float = time.perf_counter()
+        placer: TreasurePlacer = TreasurePlacer(self.map, self.TREASURE_BOUNDARY, rng)
+        positions: list[tuple[int, int]] = placer.place(self.NUM_TREASURES, time_budget=self.TREASURE_PLACEMENT_BUDGET)
+        if len(positions) < self.NUM_TREASURES:
+            logger.warning(f'Only placed {len(positions)} of {self.NUM_TREASURES} treasures on {placer.free_cells} free map cells')
+        else:
+            logger.info(f'Placed {len(positions)} treasures in {time.perf_counter() - start:.3f}s')
+        return [
+            Treasure(treasure_id, position, rng.randint(1, self.NUM_TREASURES))
+            for treasure_id, position in enumerate(positions)
+        ]
 
     def nearby_treasures(self, position: tuple[int, int], treasures: list[Treasure] | None = None) -> list[tuple[Treasure, float]]:
+        '''Returns every treasure within TREASURE_FOW of the position, with its distance, ordered by treasure id.
+
+        The given treasures are scanned one by one. Without them, the proximity field is used if it is enabled,
+        else only the treasures indexed around the position are checked.
+        '''
+        if treasures == None and self.proximity_field is not None:
+            return list(self.proximity_field.lookup(position))
         if treasures == None:
-            treasures = self.treasures or []
+            treasures = [treasure for treasure, _ in self.treasure_index.query(position, self.TREASURE_FOW)]
+            treasures.sort(key=lambda treasure: treasure.id)
 
         nearby_treasure: list[tuple[Treasure, float]] = []
         for treasure in treasures:
@@ -64,8 +96,10 @@ class ServerGameLogicService(ServiceBase):
         return nearby_treasure
 
     def distance_nearest_treasure(self, position: tuple[int, int], treasures: list[Treasure] | None = None) -> float:
+        '''Returns the distance to the closest treasure, or -1 if there are none.'''
         if treasures == None:
-            treasures = self.treasures or []
+            nearest: tuple[Treasure, tuple[int, int], float] | None = self.treasure_index.nearest(position)
+            return round(nearest[2], 2) if nearest else -1
 
         min_distance: float = -1
         for treasure in treasures:
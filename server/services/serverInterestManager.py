@@ -0,0 +1,54 @@
+from common.services.serviceBase import ServiceBase
+from server.models.spatialGrid import SpatialGrid
+
+
+class ServerInterestManager(ServiceBase):
+    '''The Server Interest Manager tracks which players can see each other so player position updates are only sent to nearby clients.
+
+    Two players see each other when both their x and y distances are within the interest radius, so visibility is always mutual.
+    Clients that opted in to the full view see every player regardless of distance. A radius of 0 disables interest management and every client gets the full broadcast.
+    This service is only used by the Server Writer, so it does not need its own lock.
+    '''
+    def __init__(self, radius: int = 0) -> None:
+        self.radius: int = radius
+        self.grid: SpatialGrid[str] = SpatialGrid(max(radius, 1))
+        self.visible: dict[str, set[str]] = {} # key: client_id, val: client_ids of the players in view
+        self.full_view_clients: set[str] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.radius > 0
+
+    def is_full_view(self, client_id: str) -> bool:
+        return not self.enabled or client_id in self.full_view_clients
+
+    def set_full_view(self, client_id: str, full_view: bool) -> None:
+        if full_view:
+            self.full_view_clients.add(client_id)
+        else:
+            self.full_view_clients.discard(client_id)
+
+    def get_visible(self, client_id: str) -> set[str]:
+        return self.visible.get(client_id, set())
+
+    def update_position(self, client_id: str, position: tuple[int, int]) -> tuple[set[str], set[str], set[str]]:
+        '''Records the player's new position and returns the client_ids of the players that are now in view, that came into view and that left view.'''
+        self.grid.update(client_id, position)
+        in_view: set[str] = {other_id for other_id, _ in self.grid.query(position, self.radius) if other_id != client_id}
+        prev_in_view: set[str] = self.visible.get(client_id, set())
+        entered: set[str] = in_view - prev_in_view
+        left: set[str] = prev_in_view - in_view
+
+        self.visible[client_id] = in_view
+        for other_id in entered:
+            self.visible.setdefault(other_id, set()).add(client_id)
+        for other_id in left:
+            self.visible.get(other_id, set()).discard(client_id)
+
+        return in_view, entered, left
+
+    def remove_client(self, client_id: str) -> None:
+        self.grid.remove(client_id)
+        self.full_view_clients.discard(client_id)
+        for other_id in self.visible.pop(client_id, set()):
+            self.visible.get(other_id, set()).discard(client_id)
@@ -0,0 +1,82 @@
+from common.services.serviceBase import ServiceBase
+from common.services.serviceManager import ServiceManager
+from server.models.serverMetric import (MetricCounter, MetricHistogram,
+                                        render_samples)
+from server.services.serverClientManager import ServerClientManager
+from server.services.serverClientWriterManager import ServerClientWriterManager
+from server.services.serverCommandService import ServerCommandService
+from server.services.serverOutputService import ServerOutputService
+from server.services.serverWriterService import ServerWriterService
+
+
+class ServerMetricsService(ServiceBase):
+    '''Records the server's runtime metrics and renders them in the Prometheus text format.
+
+    Counters and histograms are recorded as things happen, which only costs a short lock per record, so they are always on.
+    Gauges, such as the connected clients and the depth of every queue, are read from the other services when the metrics are rendered, so they cost nothing in between.
+    This service must be registered before the services that record into it.
+    '''
+    def __init__(self, service_manager: ServiceManager) -> None:
+        self.service_manager: ServiceManager = service_manager
+
+        self.commands: MetricCounter = MetricCounter(
+            'octothorpe_commands_total', 'Client requests handled, by command (invalid for unknown commands)', 'command'
+        )
+        self.client_writer_event_seconds: MetricHistogram = MetricHistogram(
+            'octothorpe_client_writer_event_seconds', 'Time from queuing a client writer event to writing its responses, by event', 'event'
+        )
+        self.server_writer_event_seconds: MetricHistogram = MetricHistogram(
+            'octothorpe_server_writer_event_seconds', 'Time from queuing a server writer event to handing its responses to the client writers, by event', 'event'
+        )
+        self.user_data_save_seconds: MetricHistogram = MetricHistogram(
+            'octothorpe_user_data_save_seconds', 'Time taken to save the changed users'
+        )
+
+    def render(self) -> str:
+        client_manager: ServerClientManager = self.service_manager.get_service(ServerClientManager)
+        server_writer_service: ServerWriterService = self.service_manager.get_service(ServerWriterService)
+        server_client_writer_manager: ServerClientWriterManager = self.service_manager.get_service(ServerClientWriterManager)
+        output_service: ServerOutputService = self.service_manager.get_service(ServerOutputService)
+        server_command_service: ServerCommandService = self.service_manager.get_service(ServerCommandService)
+
+        lines: list[str] = []
+        render_samples(lines, 'octothorpe_active_clients', 'gauge', 'Connected clients', None, [('', len(client_manager.active_clients))])
+        render_samples(lines, 'octothorpe_server_writer_queue_depth', 'gauge', 'Events waiting for the Server Writer', None,
+                       [('', server_writer_service.queue.qsize())])
+
+        self.commands.render(lines)
+        self.client_writer_event_seconds.render(lines)
+        self.server_writer_event_seconds.render(lines)
+        self.user_data_save_seconds.render(lines)
+
+        # every connected client's writer queue and output, labelled by client id
+        client_writer_services = list(server_client_writer_manager.client_writer_services.items())
+        queue_stats: list[tuple[str, dict[str, int]]] = [(client_id, service.queue_stats()) for client_id, service in client_writer_services]
+        render_samples(lines, 'octothorpe_client_writer_queue_depth', 'gauge', 'Events waiting for the client writer', 'client',
+                       [(client_id, stats['depth']) for client_id, stats in queue_stats])
+        render_samples(lines, 'octothorpe_client_writer_queue_peak_depth', 'gauge', 'Most events that have waited for the client writer at once (bounded queues only)', 'client',
+                       [(client_id, stats['peak_depth']) for client_id, stats in queue_stats])
+        render_samples(lines, 'octothorpe_client_writer_coalesced_total', 'counter', 'Player updates replaced by a later update before being sent', 'client',
+                       [(client_id, stats['coalesced']) for client_id, stats in queue_stats])
+        render_samples(lines, 'octothorpe_client_writer_dropped_total', 'counter', 'Informational events dropped because the client writer queue or connection buffer was full', 'client',
+                       [(client_id, stats['dropped']) for client_id, stats in queue_stats])
+        render_samples(lines, 'octothorpe_client_events_total', 'counter', 'Events handled by the client writer', 'client',
+                       [(client_id, service.events_written) for client_id, service in client_writer_services])
+        render_samples(lines, 'octothorpe_client_syscalls_total', 'counter', 'Writes to the client connection', 'client',
+                       [(client_id, service.syscalls) for client_id, service in client_writer_services])
+        render_samples(lines, 'octothorpe_client_sent_bytes_total', 'counter', 'Bytes written to the client connection', 'client',
+                       [(client_id, service.bytes_sent) for client_id, service in client_writer_services])
+
+        # totals across every client, including the ones that disconnected
+        output_stats: dict[str, float] = output_service.stats()
+        render_samples(lines, 'octothorpe_output_events_total', 'counter', 'Events handled by all client writers', None, [('', output_stats['events'])])
+        render_samples(lines, 'octothorpe_output_syscalls_total', 'counter', 'Writes to all client connections', None, [('', output_stats['syscalls'])])
+        render_samples(lines, 'octothorpe_output_sent_bytes_total', 'counter', 'Bytes written to all client connections', None, [('', output_stats['bytes_sent'])])
+
+        if server_command_service.pool_size:
+            command_stats: dict[str, int] = server_command_service.stats()
+            render_samples(lines, 'octothorpe_command_pool_queued', 'gauge', 'Commands waiting for the command pool', None, [('', command_stats['queued'])])
+            render_samples(lines, 'octothorpe_command_pool_running', 'gauge', 'Commands running on the command pool', None, [('', command_stats['running'])])
+            render_samples(lines, 'octothorpe_command_pool_completed_total', 'counter', 'Commands run by the command pool', None, [('', command_stats['completed'])])
+
+        return '\n'.join(lines) + '\n'
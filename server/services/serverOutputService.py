@@ -0,0 +1,53 @@
+import logging
+import threading
+
+from common.services.serviceBase import ServiceBase
+from constants import OUTPUT_BUFFER_FLUSH_BYTES, SERVER_NAME
+
+logger = logging.getLogger(SERVER_NAME)
+logger.setLevel(logging.INFO)
+
+# when a client's buffered responses are written: after every event its writer handles, or only once its writer has no events left
+FLUSH_POLICIES: list[str] = ['event', 'idle']
+
+
+class ServerOutputService(ServiceBase):
+    '''Holds the flush policy of every client's output buffer and running totals of what the buffers have written, across all clients.
+
+    Each buffer adds its own counts once per flush, so the lock is taken at most once per write to the client.
+    '''
+    def __init__(self, flush_policy: str = 'event', flush_bytes: int = OUTPUT_BUFFER_FLUSH_BYTES) -> None:
+        if flush_policy not in FLUSH_POLICIES:
+            raise ValueError(f'Unknown flush policy \'{flush_policy}\'')
+        self.flush_policy: str = flush_policy
+        self.flush_bytes: int = flush_bytes # a buffer holding this many bytes is flushed right away, whatever the policy
+
+        self.lock: threading.Lock = threading.Lock()
+        self.events: int = 0 # events handled by the client writers
+        self.flushes: int = 0 # flushes that wrote at least one byte
+        self.syscalls: int = 0 # sendmsg or sendall calls
+        self.bytes_sent: int = 0
+
+    def record(self, events: int, syscalls: int, bytes_sent: int) -> None:
+        with self.lock:
+            self.events += events
+            self.syscalls += syscalls
+            self.bytes_sent += bytes_sent
+            if bytes_sent:
+                self.flushes += 1
+
+    def stats(self) -> dict[str, float]:
+        with self.lock:
+            return {
+                'events': self.events,
+                'flushes': self.flushes,
+                'syscalls': self.syscalls,
+                'bytes_sent': self.bytes_sent,
+                'syscalls_per_event': self.syscalls / self.events if self.events else 0,
+                'bytes_per_syscall': self.bytes_sent / self.syscalls if self.syscalls else 0
+            }
+
+    def log_stats(self) -> None:
+        stats: dict[str, float] = self.stats()
+        logger.info(f'Client output: {stats["events"]:.0f} events written in {stats["syscalls"]:.0f} syscalls ({stats["syscalls_per_event"]:.2f} per event), '
+                    f'{stats["bytes_sent"]:.0f} bytes ({stats["bytes_per_syscall"]:.0f} per syscall)')
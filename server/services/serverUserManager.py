@@ -1,100 +1,220 @@
-import json
+import itertools
 import logging
-import os
+import threading
+import time
 import uuid
-from typing import Any
+from collections import OrderedDict
 
 from common.models.user import OctothorpeUser
 from common.services.serviceBase import ServiceBase
 from common.services.serviceManager import ServiceManager
 from constants import SERVER_NAME
 from server.models.serverExceptions import UserRequestException
+from server.models.userStore import (JsonUserStore, SqliteUserStore,
+                                     StoredUser, UserStoreBase)
 from server.services.serverClientManager import ServerClientManager
 from server.services.serverCoreService import ServerCoreService
 from server.services.serverGameLogicService import ServerGameLogicService
+from server.services.serverMetricsService import ServerMetricsService
 from server.utils.fileUtils import FileUtils
 
 logger = logging.getLogger(SERVER_NAME)
 logger.setLevel(logging.INFO)
 
 class ServerUserManager(ServiceBase):
-    def __init__(self, service_manager: ServiceManager):
+    '''Keeps track of every user and which client each logged-in user is using.
+
+    By default, every stored user is loaded at startup. With a user_cache_size, users are instead loaded from the user store when they log in.
+    Logged-in users stay pinned in memory, and up to user_cache_size users that have logged out are kept in an LRU cache. Changed users are saved
+    when they are evicted from the cache.
+    '''
+    def __init__(self, service_manager: ServiceManager, user_store: str = 'json', user_cache_size: int = 0):
         self.service_manager = service_manager
         self.server_core_service = service_manager.get_service(ServerCoreService)
         self.server_game_logic: ServerGameLogicService = self.service_manager.get_service(ServerGameLogicService)
         self.client_manager: ServerClientManager = self.service_manager.get_service(ServerClientManager)
+        self.metrics_service: ServerMetricsService = self.service_manager.get_service(ServerMetricsService)
 
         root_path: str = self.server_core_service.root_path
-        self.userstore_filepath = FileUtils.get_userstore_filepath(root_path)
-
-        self.users: dict[str, OctothorpeUser] = self.load_users() # persistent users, inactive included.
+        if user_store == 'sqlite':
+            self.userstore_filepath = FileUtils.get_userdb_filepath(root_path)
+            self.user_store: UserStoreBase = SqliteUserStore(self.userstore_filepath)
+        else:
+            self.userstore_filepath = FileUtils.get_userstore_filepath(root_path)
+            self.user_store = JsonUserStore(self.userstore_filepath)
+
+        # guards the user registry and its indexes, so logins and logouts from concurrent client readers are atomic
+        self.lock: threading.RLock = threading.RLock()
+        self.user_cache_size: int = user_cache_size
+        self.lazy: bool = user_cache_size > 0
+        # persistent users, inactive included. When users are loaded lazily, only logged-in users
+        self.users: dict[str, OctothorpeUser] = self.load_users()
+        self.user_cache: OrderedDict[str, OctothorpeUser] = OrderedDict() # logged-out users when loaded lazily, least recently used first
+        self.user_ids_by_username: dict[str, str] = {} # (key: username, val: user_id)
+        for user in self.users.values():
+            if user.username in self.user_ids_by_username:
+                logger.warning(f'Found more than one stored user with username [{user.username}]. Only the last one can log in')
+            self.user_ids_by_username[user.username] = user.user_id
         self.active_users: dict[str, str] = {} # active, logged-in users (key: client_id, val: user_id)
+        self.active_sessions: dict[str, str] = {} # the reverse of active_users (key: user_id, val: client_id)
+        self.dirty_user_ids: set[str] = set() # users changed since they were last saved
+        self.player_ids: dict[str, int] = {} # compact ids used by the binary protocol, assigned at first login and never reused (key: user_id, val: player_id)
+        self.player_id_counter: itertools.count[int] = itertools.count(1)
 
     def load_users(self) -> dict[str, OctothorpeUser]:
         logger.info(f'Using data storage path: {self.userstore_filepath}')
-
-        if not os.path.exists(self.userstore_filepath):
+        if self.lazy:
+            logger.info(f'Loading users on login, caching up to {self.user_cache_size} logged-out users')
             return {}
-        with open(self.userstore_filepath, 'r', encoding='utf-8') as user_f:
-            serializable_users: dict[str, Any] = json.load(user_f)
-            users: dict[str, OctothorpeUser] = {}
-            for user_id in serializable_users:
-                serializable_user: dict[str, str] = serializable_users[user_id]
-                username = str(serializable_user['username'])
-                score = int(serializable_user['score'])
-                octo_user = OctothorpeUser(user_id, username, self.server_game_logic.spawnpoint, score)
-                users[user_id] = octo_user
-            return users
-        
+
+        users: dict[str, OctothorpeUser] = {}
+        for user_id, username, score in self.user_store.load_users():
+            users[user_id] = OctothorpeUser(user_id, username, self.server_game_logic.spawnpoint, score)
+        return users
+
+    def mark_dirty(self, user: OctothorpeUser) -> None:
+        '''Flags the user to be written to the user store on the next save.'''
+        with self.lock:
+            self.dirty_user_ids.add(user.user_id)
+
     def user_data_save(self) -> None:
-        logger.info(f'Saving user data')
-        with open(self.userstore_filepath, 'w', encoding='utf-8') as user_f:
-            serializable_users: dict[str, dict[str, object]] = {}
-            for user_id in self.users:
-                user: OctothorpeUser = self.users[user_id]
-                serializable_user: dict[str, object] = {
-                    'username': user.username,
-                    'score': user.score
-                }
-                serializable_users[user.user_id] = serializable_user
-            user_f.seek(0)
-            json.dump(serializable_users, user_f)
+        with self.lock:
+            users: list[OctothorpeUser] = [user for user_id in self.dirty_user_ids if (user := self.get_loaded_user(user_id))]
+            self.dirty_user_ids.clear()
+        if not users:
+            return
+        logger.info(f'Saving user data for {len(users)} changed users')
+        start: float = time.perf_counter()
+        try:
+            self.user_store.save_users(users)
+        except Exception:
+            # keep the users dirty so the next save retries them
+            with self.lock:
+                self.dirty_user_ids.update(user.user_id for user in users)
+            raise
+        self.metrics_service.user_data_save_seconds.observe(time.perf_counter() - start)
 
     def get_user_by_client_id(self, client_id: str) -> OctothorpeUser | None:
-        if client_id in self.active_users.keys():
-            active_client_user_id = self.active_users[client_id]
-            return self.users[active_client_user_id]
-        else:
+        active_client_user_id: str | None = self.active_users.get(client_id)
+        if active_client_user_id is None:
             return None
+        return self.users.get(active_client_user_id)
+
+    def get_loaded_user(self, user_id: str) -> OctothorpeUser | None:
+        '''Returns the user if it is in memory, without touching the user store.'''
+        return self.users.get(user_id) or self.user_cache.get(user_id)
 
     def get_user_by_username(self, username: str) -> OctothorpeUser | None:
-        return next((u for u in self.users.values() if u.username == username), None)
+        with self.lock:
+            user_id: str | None = self.user_ids_by_username.get(username)
+            if user_id is not None:
+                if user_id in self.user_cache:
+                    self.user_cache.move_to_end(user_id)
+                return self.get_loaded_user(user_id)
+        if not self.lazy:
+            return None
+
+        # the user store is read without holding the lock, so other logins and saves don't wait on the disk
+        stored_user: StoredUser | None = self.user_store.load_user_by_username(username)
+        if stored_user is None:
+            return None
+        with self.lock:
+            user_id = self.user_ids_by_username.get(username)
+            if user_id is not None:
+                # loaded or registered by a concurrent login while the store was read
+                return self.get_loaded_user(user_id)
+            user_id, username, score = stored_user
+            user: OctothorpeUser = OctothorpeUser(user_id, username, self.server_game_logic.spawnpoint, score)
+            self.user_cache[user_id] = user
+            self.user_ids_by_username[username] = user_id
+        self.evict_users()
+        return user
+
+    def evict_users(self) -> None:
+        '''Drops the least recently used logged-out users beyond the cache size, saving the ones that changed.'''
+        evicted: list[OctothorpeUser] = []
+        with self.lock:
+            while len(self.user_cache) > self.user_cache_size:
+                user_id, user = self.user_cache.popitem(last=False)
+                if self.user_ids_by_username.get(user.username) == user_id:
+                    del self.user_ids_by_username[user.username]
+                if user_id in self.dirty_user_ids:
+                    self.dirty_user_ids.discard(user_id)
+                    evicted.append(user)
+        if evicted:
+            try:
+                self.user_store.save_users(evicted)
+            except Exception:
+                logger.error(f'Failed to save {len(evicted)} evicted users')
+                with self.lock:
+                    # keep them in memory so the next save retries them
+                    for user in evicted:
+                        self.user_cache[user.user_id] = user
+                        self.user_ids_by_username.setdefault(user.username, user.user_id)
+                        self.dirty_user_ids.add(user.user_id)
+                raise
+
+    def get_client_id_by_user_id(self, user_id: str) -> str | None:
+        return self.active_sessions.get(user_id)
+
+    def get_player_id(self, user: OctothorpeUser) -> int:
+        player_id: int | None = self.player_ids.get(user.user_id)
+        if player_id is None:
+            # next() on a count is atomic, so concurrent logins can't get the same id
+            player_id = self.player_ids.setdefault(user.user_id, next(self.player_id_counter))
+        return player_id
 
     def register_new_user(self, username: str) -> OctothorpeUser:
         user_id: str = str(uuid.uuid4())
-        self.users[user_id] = OctothorpeUser(user_id, username, self.server_game_logic.spawnpoint)
+        with self.lock:
+            self.users[user_id] = OctothorpeUser(user_id, username, self.server_game_logic.spawnpoint)
+            self.user_ids_by_username[username] = user_id
+            self.dirty_user_ids.add(user_id)
 
-        return self.users[user_id]
+            return self.users[user_id]
 
     def login_user(self, client_id: str, username: str) -> tuple[OctothorpeUser, bool]:
         if not username:
             raise UserRequestException(f'Invalid username')
-        if username in self.active_users.values():
-            raise UserRequestException(f'Username [{username}] is already logged in')
-
-        logger.debug(f'Client has logged in as user {username}')
 
         user: OctothorpeUser | None = self.get_user_by_username(username)
-        new_user: bool = bool(not user)
-        if not user:
-            user = self.register_new_user(username)
-
-        self.active_users[client_id] = user.user_id
+        with self.lock:
+            user_id: str | None = self.user_ids_by_username.get(username)
+            if user_id is not None:
+                # registered by a concurrent login since the lookup
+                user = self.get_loaded_user(user_id)
+            elif user is not None:
+                # evicted by a concurrent logout since the lookup. Eviction saved it, so it is still current
+                self.user_cache[user.user_id] = user
+                self.user_ids_by_username[username] = user.user_id
+            if user and user.user_id in self.active_sessions:
+                raise UserRequestException(f'Username [{username}] is already logged in')
+            if client_id in self.active_users:
+                raise UserRequestException(f'You\'re already logged in!')
+
+            new_user: bool = bool(not user)
+            if not user:
+                user = self.register_new_user(username)
+            elif user.user_id in self.user_cache:
+                # pin the user in memory while they are logged in
+                self.users[user.user_id] = self.user_cache.pop(user.user_id)
+
+            self.active_users[client_id] = user.user_id
+            self.active_sessions[user.user_id] = client_id
+            self.get_player_id(user)
 
+        logger.debug(f'Client has logged in as user {username}')
         return (user, new_user)
     
     def logout_user(self, client_id: str):
-        if client_id in self.active_users.keys():
-            self.active_users.pop(client_id)
+        with self.lock:
+            user_id: str | None = self.active_users.pop(client_id, None)
+            if user_id is not None and self.active_sessions.get(user_id) == client_id:
+                del self.active_sessions[user_id]
+                if self.lazy and user_id in self.users:
+                    # unpin the user. They stay cached until enough other users have logged out
+                    self.user_cache[user_id] = self.users.pop(user_id)
         self.client_manager.disconnect_client(client_id)
-        self.user_data_save()
\ No newline at end of file
+        self.user_data_save()
+        if self.lazy:
+            self.evict_users()
\ No newline at end of file
@@ -1,12 +1,15 @@
-from queue import Queue
-
 from common.services.serviceBase import ServiceBase
+from common.utils.eventQueue import EventQueue
 from server.models.serverWriterEvent import ServerWriterEventBase
 
 
 class ServerWriterService(ServiceBase):
-    def __init__(self) -> None:
-        self.queue: Queue[ServerWriterEventBase] = Queue()
+    def __init__(self, tick_rate: int = 0) -> None:
+        self.queue: EventQueue[ServerWriterEventBase] = EventQueue()
+        self.tick_rate: int = tick_rate # in ticks per second. 0 sends every move as soon as it happens
 
     def dispatch_event(self, event: ServerWriterEventBase) -> None:
-        self.queue.put(event)
\ No newline at end of file
+        self.queue.put(event)
+
+    def shutdown(self) -> None:
+        self.queue.close()
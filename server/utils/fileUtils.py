@@ -3,7 +3,9 @@ import os
 
 class FileUtils(object):
     USER_STORE_FILENAME = 'users.json'
+    USER_DB_FILENAME = 'users.db'
     MAP_FILENAME = 'map.txt'
+    PROFILE_DIRNAME = 'profiles'
 
     @staticmethod
     def get_data_dir(root_path: str) -> str:
@@ -21,10 +23,26 @@ class FileUtils(object):
             FileUtils.get_data_dir(root_path), FileUtils.USER_STORE_FILENAME
         )
 
+    @staticmethod
+    def get_userdb_filepath(root_path: str) -> str:
+        root_path = os.path.abspath(root_path)
+
+        return os.path.join(
+            FileUtils.get_data_dir(root_path), FileUtils.USER_DB_FILENAME
+        )
+
     @staticmethod
     def get_map_filepath(root_path: str) -> str:
         root_path = os.path.abspath(root_path)
 
         return os.path.join(
             FileUtils.get_data_dir(root_path), FileUtils.MAP_FILENAME
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def get_profile_dir(root_path: str) -> str:
+        root_path = os.path.abspath(root_path)
+
+        return os.path.join(
+            FileUtils.get_data_dir(root_path), FileUtils.PROFILE_DIRNAME
+        )
@@ -0,0 +1,69 @@
+import logging
+
+from common.models.game.treasure import Treasure
+from common.models.protocol import PlayerStatusEnum
+from common.utils.binaryProtocolUtils import BinaryProtocolUtils
+from constants import SERVER_NAME
+from server.models.serverFrame import ServerFrame
+
+logger = logging.getLogger(SERVER_NAME)
+logger.setLevel(logging.INFO)
+
+
+class ProtocolUtils(object):
+    CODE_MSGS: dict[int, str] = {101: 'PlayerUpdate', 102:'TreasureProximity', 103: 'TreasureUpdate', 104: 'Map', 200: 'Success', 400: 'UserError', 500: 'ServerError'}
+
+    @staticmethod
+    def resolve(code: int, msg: str = '') -> tuple[int, str]:
+        '''Returns a valid code and the message to send with it. A missing message is replaced by the default message for the code.'''
+        if not code or code not in ProtocolUtils.CODE_MSGS:
+            logger.error('Invalid code given: ' + str(code) if code else 'None')
+            code = 500
+
+        code_msg: str = msg if msg else ProtocolUtils.CODE_MSGS.get(code, ProtocolUtils.CODE_MSGS.get(500, ''))
+        return code, code_msg
+
+    @staticmethod
+    def text(code: int, msg: str = '') -> str:
+        code, code_msg = ProtocolUtils.resolve(code, msg)
+        return f'{code}:{code_msg}'
+
+    @staticmethod
+    def message(code: int, msg: str = '') -> ServerFrame:
+        code, code_msg = ProtocolUtils.resolve(code, msg)
+        return ServerFrame(lambda: f'{code}:{code_msg}', lambda: BinaryProtocolUtils.message(code, code_msg))
+
+    @staticmethod
+    def player_update(player_id: int, username: str, position: tuple[int, int], score: int, status: PlayerStatusEnum = PlayerStatusEnum.UPDATE) -> ServerFrame:
+        x, y = position
+        return ServerFrame(
+            lambda: ProtocolUtils.text(101, f'{username}, {x}, {y}, {score}{status.text_suffix}'),
+            lambda: BinaryProtocolUtils.player_update(player_id, x, y, score, status),
+            ((player_id, username),),
+            # a player leaving the view is sent at (-1, -1), and no later update would remove them if it were dropped
+            position_of=player_id if status == PlayerStatusEnum.UPDATE and position != (-1, -1) else None
+        )
+
+    @staticmethod
+    def treasure_proximity(treasure: Treasure) -> ServerFrame:
+        x, y = treasure.position
+        return ServerFrame(
+            lambda: ProtocolUtils.text(102, f'{treasure.id}, {x}, {y}'),
+            lambda: BinaryProtocolUtils.treasure_proximity(treasure.id, x, y)
+        )
+
+    @staticmethod
+    def treasure_update(player_id: int, username: str, treasure: Treasure) -> ServerFrame:
+        return ServerFrame(
+            lambda: ProtocolUtils.text(103, f'{username}, {treasure.id}, {treasure.score}'),
+            lambda: BinaryProtocolUtils.treasure_update(player_id, treasure.id, treasure.score),
+            ((player_id, username),)
+        )
+
+    @staticmethod
+    def map_size(rows: int, columns: int) -> ServerFrame:
+        return ServerFrame(lambda: ProtocolUtils.text(104, str((rows, columns))), lambda: BinaryProtocolUtils.map_size(rows, columns))
+
+    @staticmethod
+    def map_row(row_idx: int, row: str) -> ServerFrame:
+        return ServerFrame(lambda: ProtocolUtils.text(104, row), lambda: BinaryProtocolUtils.map_row(row_idx, row.encode('utf-8')))